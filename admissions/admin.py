@@ -2,11 +2,14 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from school_management.caching import invalidate
+from school_management.changelist import HighVolumeAdminMixin
 from .models import AdmissionApplication
+from .search import search_applications
 
 
 @admin.register(AdmissionApplication)
-class AdmissionApplicationAdmin(admin.ModelAdmin):
+class AdmissionApplicationAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
     """Admin interface for AdmissionApplication model"""
     
     list_display = [
@@ -21,8 +24,9 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
         'surname', 'first_name', 'other_names', 'father_name', 'mother_name',
         'father_contact', 'mother_contact'
     ]
+    autocomplete_fields = ['reviewed_by']
     readonly_fields = [
-        'application_date', 'created_at', 'updated_at', 'full_name'
+        'application_date', 'created_at', 'updated_at', 'full_name', 'possible_duplicate_of'
     ]
     fieldsets = (
         ('Pupil Information', {
@@ -52,7 +56,8 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
         }),
         ('Application Status', {
             'fields': (
-                'status', 'application_date', 'reviewed_date', 'reviewed_by', 'notes'
+                'status', 'application_date', 'reviewed_date', 'reviewed_by', 'notes',
+                'possible_duplicate_of'
             )
         }),
         ('System Information', {
@@ -99,6 +104,8 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
     def approve_applications(self, request, queryset):
         """Action to approve selected applications"""
         updated = queryset.update(status='accepted')
+        # update() sends no post_save
+        invalidate('admissions')
         self.message_user(
             request, 
             f'Successfully approved {updated} application(s).'
@@ -108,6 +115,7 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
     def reject_applications(self, request, queryset):
         """Action to reject selected applications"""
         updated = queryset.update(status='rejected')
+        invalidate('admissions')
         self.message_user(
             request, 
             f'Successfully rejected {updated} application(s).'
@@ -117,6 +125,7 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
     def mark_as_reviewed(self, request, queryset):
         """Action to mark applications as reviewed"""
         updated = queryset.update(status='reviewed')
+        invalidate('admissions')
         self.message_user(
             request, 
             f'Successfully marked {updated} application(s) as reviewed.'
@@ -127,6 +136,12 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
         """Custom queryset with select_related for better performance"""
         return super().get_queryset(request).select_related('reviewed_by')
     
+    def get_search_results(self, request, queryset, search_term):
+        """Answer searches from the token index instead of icontains scans"""
+        if not search_term.strip():
+            return queryset, False
+        return search_applications(queryset, search_term), False
+    
     def save_model(self, request, obj, form, change):
         """Custom save to track who reviewed the application"""
         if change and 'status' in form.changed_data:
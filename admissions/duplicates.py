@@ -0,0 +1,187 @@
+"""
+Duplicate applicant detection for admission applications.
+
+Each application carries a normalized name and two phonetic blocking keys
+(surname + date of birth, first name + date of birth). Candidates are only
+scored against applications that share a block, so finding duplicates stays
+close to linear in the number of applications instead of comparing every pair.
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.db.models import Q
+
+
+DUPLICATE_THRESHOLD = 0.85
+BLOCK_KEY_FIELDS = ('surname_block_key', 'first_name_block_key')
+KEY_SOURCE_FIELDS = ('surname', 'first_name', 'date_of_birth')
+SCORE_FIELDS = ('id', 'normalized_name', 'father_contact', 'mother_contact') + BLOCK_KEY_FIELDS
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+
+
+# Names repeat a lot (bulk indexing, synthetic data), so both are memoized
+@lru_cache(maxsize=65536)
+def normalize_name(value):
+    """Upper-case, strip accents and keep only letters and single spaces"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r'[^A-Z ]+', ' ', value.upper())
+    return ' '.join(value.split())
+
+
+@lru_cache(maxsize=65536)
+def soundex(value):
+    """Return the American Soundex code of a normalized name"""
+    letters = normalize_name(value).replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code
+        if letter not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def duplicate_keys(surname, first_name, date_of_birth):
+    """Return (normalized_name, surname_block_key, first_name_block_key)"""
+    normalized = ' '.join(filter(None, [normalize_name(surname), normalize_name(first_name)]))
+    if not date_of_birth:
+        return normalized, '', ''
+    dob = date_of_birth.isoformat() if hasattr(date_of_birth, 'isoformat') else str(date_of_birth)
+    surname_code = soundex(surname)
+    first_name_code = soundex(first_name)
+    return (
+        normalized,
+        f'{surname_code}|{dob}' if surname_code else '',
+        f'{first_name_code}|{dob}' if first_name_code else '',
+    )
+
+
+def _digits(value):
+    return re.sub(r'\D', '', value or '')[-9:]
+
+
+def _get(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def match_score(a, b):
+    """
+    Score two applications (dicts or instances) between 0 and 1.
+
+    Names are compared both as written and with their words sorted, so a
+    swapped surname and first name still match. A shared parent contact
+    number adds a small bonus.
+    """
+    name_a, name_b = _get(a, 'normalized_name'), _get(b, 'normalized_name')
+    if not name_a or not name_b:
+        return 0.0
+    score = max(
+        SequenceMatcher(None, name_a, name_b).ratio(),
+        SequenceMatcher(None, ' '.join(sorted(name_a.split())), ' '.join(sorted(name_b.split()))).ratio(),
+    )
+    contacts_a = {_digits(_get(a, 'father_contact')), _digits(_get(a, 'mother_contact'))} - {''}
+    contacts_b = {_digits(_get(b, 'father_contact')), _digits(_get(b, 'mother_contact'))} - {''}
+    if contacts_a & contacts_b:
+        score = min(1.0, score + 0.1)
+    return score
+
+
+def find_duplicates(application, threshold=DUPLICATE_THRESHOLD):
+    """Return [(candidate_id, score)] for applications sharing a block with ``application``"""
+    block_filter = None
+    for field in BLOCK_KEY_FIELDS:
+        key = getattr(application, field)
+        if key:
+            block_filter = Q(**{field: key}) if block_filter is None else block_filter | Q(**{field: key})
+    if block_filter is None:
+        return []
+
+    candidates = type(application)._default_manager.filter(block_filter)
+    if application.pk:
+        candidates = candidates.exclude(pk=application.pk)
+
+    matches = []
+    for row in candidates.values(*SCORE_FIELDS):
+        score = match_score(application, row)
+        if score >= threshold:
+            matches.append((row['id'], score))
+    matches.sort(key=itemgetter(1), reverse=True)
+    return matches
+
+
+def flag_possible_duplicate(application, threshold=DUPLICATE_THRESHOLD):
+    """Link a freshly created application to its best earlier match, if any"""
+    matches = [m for m in find_duplicates(application, threshold) if m[0] < application.pk]
+    if matches:
+        application.possible_duplicate_of_id = matches[0][0]
+        application.save(update_fields=['possible_duplicate_of'])
+    return matches
+
+
+def iter_duplicate_pairs(queryset, threshold=DUPLICATE_THRESHOLD, chunk_size=2000):
+    """
+    Yield (earlier_id, later_id, score) for every duplicate pair in ``queryset``.
+
+    Rows are streamed ordered by each block key in turn and only rows inside
+    the same block are compared.
+    """
+    reported = set()
+    for field in BLOCK_KEY_FIELDS:
+        rows = (
+            queryset.exclude(**{field: ''})
+            .order_by(field, 'id')
+            .values(*SCORE_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+        for _, block in groupby(rows, key=itemgetter(field)):
+            block = list(block)
+            for a, b in combinations(block, 2):
+                pair = (a['id'], b['id'])
+                if pair in reported:
+                    continue
+                score = match_score(a, b)
+                if score >= threshold:
+                    reported.add(pair)
+                    yield a['id'], b['id'], score
+
+
+def rebuild_duplicate_keys(queryset, batch_size=1000):
+    """Recompute stored keys for rows written without ``save()`` (bulk paths, old data)"""
+    model = queryset.model
+    updated = 0
+    batch = []
+    for application in queryset.only('id', *KEY_SOURCE_FIELDS).iterator(chunk_size=batch_size):
+        application.normalized_name, application.surname_block_key, application.first_name_block_key = (
+            duplicate_keys(application.surname, application.first_name, application.date_of_birth)
+        )
+        batch.append(application)
+        if len(batch) >= batch_size:
+            model._default_manager.bulk_update(batch, ['normalized_name', *BLOCK_KEY_FIELDS])
+            updated += len(batch)
+            batch = []
+    if batch:
+        model._default_manager.bulk_update(batch, ['normalized_name', *BLOCK_KEY_FIELDS])
+        updated += len(batch)
+    return updated
@@ -0,0 +1,14 @@
+from rest_framework import filters
+
+from .search import search_applications
+
+
+class ApplicationSearchFilter(filters.SearchFilter):
+    """``?search=`` backed by the application token index; ``&fuzzy=0`` disables typo matching"""
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '')
+        if not search.strip():
+            return queryset
+        fuzzy = request.query_params.get('fuzzy', '1').lower() not in ('0', 'false', 'no')
+        return search_applications(queryset, search, fuzzy=fuzzy)
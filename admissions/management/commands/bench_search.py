@@ -0,0 +1,95 @@
+import random
+import time
+from datetime import date, timedelta
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from admissions.duplicates import rebuild_duplicate_keys
+from admissions.models import AdmissionApplication
+from admissions.search import SEARCH_NAME_FIELDS, rebuild_search_index, search_applications
+from school_management.benchmark import benchmark_database, format_row, summarize, time_call
+
+
+SURNAMES = [
+    'MENSAH', 'OWUSU', 'BOATENG', 'ASANTE', 'OSEI', 'ADJEI', 'AGYEMANG', 'AMOAH', 'APPIAH', 'DARKO',
+    'OPOKU', 'ANSAH', 'KUMI', 'FRIMPONG', 'GYAMFI', 'ACHEAMPONG', 'ADDO', 'QUAYE', 'TETTEH', 'LARBI',
+]
+FIRST_NAMES = [
+    'Kwame', 'Kofi', 'Kwabena', 'Kwaku', 'Yaw', 'Kojo', 'Kwasi', 'Ama', 'Akosua', 'Abena',
+    'Akua', 'Yaa', 'Afua', 'Adwoa', 'Esi', 'Efua', 'Nana', 'Ekow', 'Fiifi', 'Selasi',
+]
+QUERIES = [
+    ('exact surname', 'Mensah'),
+    ('prefix', 'Boat'),
+    ('accented', 'Adwóa'),
+    ('typo', 'Gyamphi'),
+    ('two terms', 'Kofi Owusu'),
+    ('phone', '0241000042'),
+]
+
+
+def legacy_search(queryset, search):
+    """The previous SearchFilter behaviour: OR-ed icontains per term, AND across terms"""
+    for term in search.split():
+        queryset = queryset.filter(reduce(or_, (Q(**{f'{field}__icontains': term}) for field in SEARCH_NAME_FIELDS)))
+    return queryset
+
+
+class Command(BaseCommand):
+    help = 'Benchmark application search latency: icontains scans vs the token index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def seed(self, rows, rng):
+        batch = []
+        base = date(2010, 1, 1)
+        for i in range(rows):
+            surname = rng.choice(SURNAMES) + ('' if rng.random() < 0.7 else rng.choice(['', 'A', 'E']))
+            batch.append(AdmissionApplication(
+                surname=surname,
+                first_name=rng.choice(FIRST_NAMES),
+                other_names=rng.choice(FIRST_NAMES) if rng.random() < 0.4 else None,
+                date_of_birth=base + timedelta(days=rng.randrange(4000)),
+                age=rng.randint(3, 15),
+                gender=rng.choice(['male', 'female']),
+                place_of_birth='Accra',
+                region_of_birth='Greater Accra',
+                home_town='Kumasi',
+                region_of_home_town='Ashanti',
+                class_before_admission=f'Class {rng.randint(1, 6)}',
+                father_name=f'{rng.choice(FIRST_NAMES)} {surname}',
+                mother_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}',
+                father_contact=f'0241{i:06d}',
+                postal_address='P.O. Box 1, Accra',
+                place_of_residence='Accra',
+            ))
+            if len(batch) == 5000:
+                AdmissionApplication.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            AdmissionApplication.objects.bulk_create(batch)
+        queryset = AdmissionApplication.objects.all()
+        rebuild_duplicate_keys(queryset, batch_size=5000)
+        rebuild_search_index(queryset, batch_size=5000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmark_database():
+            start = time.perf_counter()
+            self.seed(options['rows'], rng)
+            self.stdout.write(f"Seeded and indexed {options['rows']} applications in {time.perf_counter() - start:.1f}s")
+
+            base = AdmissionApplication.objects.order_by('-application_date')
+            for label, search in QUERIES:
+                for name, apply in (('icontains', legacy_search), ('index', search_applications)):
+                    queryset = apply(base, search)
+                    # What a paginated list request does: count plus the first page
+                    samples = time_call(lambda: (queryset.count(), list(queryset[:20])), repeat=options['repeat'])
+                    matches = queryset.count()
+                    self.stdout.write(format_row(f'{label} [{name}]', summarize(samples)) + f'   {matches} hits')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from admissions.duplicates import DUPLICATE_THRESHOLD, iter_duplicate_pairs, rebuild_duplicate_keys
+from admissions.models import AdmissionApplication
+from school_management.caching import invalidate
+
+
+class Command(BaseCommand):
+    help = 'Find likely duplicate admission applications using phonetic blocking keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=DUPLICATE_THRESHOLD,
+            help='Minimum similarity score (0-1) to report a pair'
+        )
+        parser.add_argument(
+            '--rebuild-keys', action='store_true',
+            help='Recompute stored blocking keys before scanning (after bulk imports)'
+        )
+        parser.add_argument(
+            '--flag', action='store_true',
+            help='Set possible_duplicate_of on the later application of each pair'
+        )
+
+    def handle(self, *args, **options):
+        queryset = AdmissionApplication.objects.all()
+
+        if options['rebuild_keys']:
+            updated = rebuild_duplicate_keys(queryset)
+            self.stdout.write(f'Rebuilt duplicate keys for {updated} application(s).')
+
+        pairs = 0
+        flagged = {}
+        for earlier_id, later_id, score in iter_duplicate_pairs(queryset, options['threshold']):
+            pairs += 1
+            self.stdout.write(f'{earlier_id}\t{later_id}\t{score:.3f}')
+            best = flagged.get(later_id)
+            if best is None or score > best[1]:
+                flagged[later_id] = (earlier_id, score)
+
+        if options['flag']:
+            for later_id, (earlier_id, _) in flagged.items():
+                AdmissionApplication.objects.filter(pk=later_id).update(possible_duplicate_of=earlier_id)
+            invalidate('admissions')
+
+        self.stdout.write(self.style.SUCCESS(f'Found {pairs} possible duplicate pair(s).'))
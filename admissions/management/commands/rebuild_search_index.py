@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from admissions.models import AdmissionApplication
+from admissions.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the application search index after bulk imports or updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_search_index(AdmissionApplication.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {updated} application(s).'))
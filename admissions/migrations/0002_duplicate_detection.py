@@ -0,0 +1,108 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import unicodedata
+
+
+# Frozen copies of admissions.duplicates as of this migration, so the
+# backfill does not change when that module does
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+
+
+def normalize_name(value):
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r'[^A-Z ]+', ' ', value.upper())
+    return ' '.join(value.split())
+
+
+def soundex(value):
+    letters = normalize_name(value).replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def duplicate_keys(surname, first_name, date_of_birth):
+    normalized = ' '.join(filter(None, [normalize_name(surname), normalize_name(first_name)]))
+    if not date_of_birth:
+        return normalized, '', ''
+    dob = date_of_birth.isoformat()
+    surname_code = soundex(surname)
+    first_name_code = soundex(first_name)
+    return (
+        normalized,
+        f'{surname_code}|{dob}' if surname_code else '',
+        f'{first_name_code}|{dob}' if first_name_code else '',
+    )
+
+
+def populate_duplicate_keys(apps, schema_editor, batch_size=1000):
+    AdmissionApplication = apps.get_model('admissions', 'AdmissionApplication')
+    fields = ['normalized_name', 'surname_block_key', 'first_name_block_key']
+    batch = []
+    for application in AdmissionApplication.objects.only('id', 'surname', 'first_name', 'date_of_birth').iterator(
+        chunk_size=batch_size
+    ):
+        application.normalized_name, application.surname_block_key, application.first_name_block_key = (
+            duplicate_keys(application.surname, application.first_name, application.date_of_birth)
+        )
+        batch.append(application)
+        if len(batch) >= batch_size:
+            AdmissionApplication.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        AdmissionApplication.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='first_name_block_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='normalized_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='possible_duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier application that looks like the same child', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='possible_duplicates', to='admissions.admissionapplication'),
+        ),
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='surname_block_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(populate_duplicate_keys, migrations.RunPython.noop),
+    ]
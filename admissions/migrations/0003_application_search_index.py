@@ -0,0 +1,121 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import unicodedata
+
+
+# Frozen copies of admissions.search and admissions.duplicates as of this
+# migration, so the backfill does not change when those modules do
+
+SEARCH_NAME_FIELDS = ('surname', 'first_name', 'other_names', 'father_name', 'mother_name')
+SEARCH_CONTACT_FIELDS = ('father_contact', 'mother_contact')
+MAX_TOKEN_LENGTH = 50
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+
+
+def normalize_name(value):
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r'[^A-Z ]+', ' ', value.upper())
+    return ' '.join(value.split())
+
+
+def soundex(value):
+    letters = normalize_name(value).replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def phone_token(value):
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('233'):
+        digits = digits[3:]
+    return digits.lstrip('0')
+
+
+def build_search_text(application):
+    tokens = set()
+    for field in SEARCH_NAME_FIELDS:
+        tokens.update(normalize_name(getattr(application, field)).split())
+    for field in SEARCH_CONTACT_FIELDS:
+        token = phone_token(getattr(application, field))
+        if token:
+            tokens.add(token)
+    return ' '.join(sorted(token[:MAX_TOKEN_LENGTH] for token in tokens))
+
+
+def populate_search_index(apps, schema_editor, batch_size=1000):
+    AdmissionApplication = apps.get_model('admissions', 'AdmissionApplication')
+    ApplicationSearchToken = apps.get_model('admissions', 'ApplicationSearchToken')
+
+    def flush(batch):
+        AdmissionApplication.objects.bulk_update(batch, ['search_text'])
+        ApplicationSearchToken.objects.bulk_create([
+            ApplicationSearchToken(application_id=application.pk, token=token,
+                                   phonetic='' if token.isdigit() else soundex(token))
+            for application in batch for token in application.search_text.split()
+        ], batch_size=batch_size * 4)
+
+    batch = []
+    fields = SEARCH_NAME_FIELDS + SEARCH_CONTACT_FIELDS
+    for application in AdmissionApplication.objects.only('id', *fields).iterator(chunk_size=batch_size):
+        application.search_text = build_search_text(application)
+        batch.append(application)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0002_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.CreateModel(
+            name='ApplicationSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('phonetic', models.CharField(blank=True, default='', max_length=4)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='admissions.admissionapplication')),
+            ],
+            options={
+                'verbose_name': 'Application Search Token',
+                'verbose_name_plural': 'Application Search Tokens',
+                'indexes': [models.Index(fields=['token', 'application'], name='admissions_token_idx'), models.Index(fields=['phonetic', 'application'], name='admissions_phonetic_idx')],
+            },
+        ),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
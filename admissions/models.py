@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
+from .duplicates import KEY_SOURCE_FIELDS, duplicate_keys
+from .search import SEARCH_SOURCE_FIELDS, build_search_text, index_application
+
 
 class AdmissionApplication(models.Model):
     """
@@ -66,6 +69,22 @@ class AdmissionApplication(models.Model):
     )
     notes = models.TextField(blank=True, null=True, help_text="Internal notes for the application")
     
+    # Duplicate detection
+    normalized_name = models.CharField(max_length=200, blank=True, default='', editable=False)
+    surname_block_key = models.CharField(max_length=20, blank=True, default='', editable=False, db_index=True)
+    first_name_block_key = models.CharField(max_length=20, blank=True, default='', editable=False, db_index=True)
+    possible_duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='possible_duplicates',
+        help_text="Earlier application that looks like the same child"
+    )
+    
+    # Normalized name and contact tokens, mirrored into ApplicationSearchToken
+    search_text = models.TextField(blank=True, default='', editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -78,6 +97,13 @@ class AdmissionApplication(models.Model):
     def __str__(self):
         return f"{self.surname} {self.first_name} - {self.status}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the indexed text so saves that leave names untouched skip reindexing
+        instance._indexed_search_text = instance.__dict__.get('search_text')
+        return instance
+    
     def save(self, *args, **kwargs):
         # Auto-calculate age if not provided
         if not self.age and self.date_of_birth:
@@ -86,7 +112,32 @@ class AdmissionApplication(models.Model):
             self.age = today.year - self.date_of_birth.year - (
                 (today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day)
             )
-        super().save(*args, **kwargs)
+        
+        # Keep duplicate detection keys in step with the name fields
+        self.normalized_name, self.surname_block_key, self.first_name_block_key = duplicate_keys(
+            self.surname, self.first_name, self.date_of_birth
+        )
+        self.search_text = build_search_text(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & set(KEY_SOURCE_FIELDS):
+                update_fields |= {'normalized_name', 'surname_block_key', 'first_name_block_key'}
+            if update_fields & set(SEARCH_SOURCE_FIELDS):
+                update_fields.add('search_text')
+            kwargs['update_fields'] = update_fields
+        reindex = (
+            (update_fields is None or 'search_text' in update_fields)
+            and self.search_text != getattr(self, '_indexed_search_text', None)
+        )
+        if not reindex:
+            super().save(*args, **kwargs)
+            return
+        # The row and its token rows change together or not at all
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+            super().save(*args, **kwargs)
+            index_application(self)
+        self._indexed_search_text = self.search_text
     
     @property
     def full_name(self):
@@ -110,3 +161,27 @@ class AdmissionApplication(models.Model):
     def is_rejected(self):
         """Check if application is rejected"""
         return self.status == 'rejected'
+
+
+class ApplicationSearchToken(models.Model):
+    """
+    One normalized name or contact token of an application, used as a search index
+    """
+    application = models.ForeignKey(
+        AdmissionApplication,
+        on_delete=models.CASCADE,
+        related_name='search_tokens'
+    )
+    token = models.CharField(max_length=50)
+    phonetic = models.CharField(max_length=4, blank=True, default='')
+    
+    class Meta:
+        verbose_name = 'Application Search Token'
+        verbose_name_plural = 'Application Search Tokens'
+        indexes = [
+            models.Index(fields=['token', 'application'], name='admissions_token_idx'),
+            models.Index(fields=['phonetic', 'application'], name='admissions_phonetic_idx'),
+        ]
+    
+    def __str__(self):
+        return self.token
@@ -0,0 +1,130 @@
+"""
+Indexed, accent- and case-insensitive search for admission applications.
+
+Every application has a ``search_text`` column holding its normalized name
+and contact tokens, and one ``ApplicationSearchToken`` row per distinct
+token. Searches are answered from the indexed token table with range scans
+(prefix match) and phonetic codes (typo-tolerant match) instead of OR-ed
+``icontains`` scans over every name column.
+"""
+import re
+
+from django.db.models import Q
+
+from .duplicates import normalize_name, soundex
+
+
+SEARCH_NAME_FIELDS = ('surname', 'first_name', 'other_names', 'father_name', 'mother_name')
+SEARCH_CONTACT_FIELDS = ('father_contact', 'mother_contact')
+SEARCH_SOURCE_FIELDS = SEARCH_NAME_FIELDS + SEARCH_CONTACT_FIELDS
+
+# Terms shorter than this only use prefix matching; phonetic codes are too loose
+FUZZY_MIN_LENGTH = 4
+MAX_TOKEN_LENGTH = 50
+
+
+def phone_token(value):
+    """Reduce a phone number to its national digits (no +233 / 233 / 0 prefix)"""
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('233'):
+        digits = digits[3:]
+    return digits.lstrip('0')
+
+
+def search_tokens(application):
+    """Return the sorted set of normalized tokens for an application"""
+    tokens = set()
+    for field in SEARCH_NAME_FIELDS:
+        tokens.update(normalize_name(getattr(application, field)).split())
+    for field in SEARCH_CONTACT_FIELDS:
+        token = phone_token(getattr(application, field))
+        if token:
+            tokens.add(token)
+    return sorted(token[:MAX_TOKEN_LENGTH] for token in tokens)
+
+
+def build_search_text(application):
+    return ' '.join(search_tokens(application))
+
+
+def _token_rows(token_model, application_id, search_text):
+    return [
+        token_model(application_id=application_id, token=token, phonetic='' if token.isdigit() else soundex(token))
+        for token in search_text.split()
+    ]
+
+
+def index_application(application):
+    """Replace the token rows of a single saved application"""
+    token_model = application.search_tokens.model
+    token_model.objects.filter(application_id=application.pk).delete()
+    token_model.objects.bulk_create(_token_rows(token_model, application.pk, application.search_text))
+
+
+def rebuild_search_index(queryset, batch_size=1000):
+    """
+    Recompute ``search_text`` and token rows for ``queryset`` in batches.
+
+    Use after bulk writes that bypass ``save()`` (``bulk_create``,
+    ``bulk_update`` or ``update()`` on a name or contact field).
+    """
+    model = queryset.model
+    token_model = model._meta.get_field('search_tokens').related_model
+    updated = 0
+    batch = []
+
+    def flush():
+        model._default_manager.bulk_update(batch, ['search_text'])
+        ids = [application.pk for application in batch]
+        token_model.objects.filter(application_id__in=ids).delete()
+        rows = []
+        for application in batch:
+            rows.extend(_token_rows(token_model, application.pk, application.search_text))
+        token_model.objects.bulk_create(rows, batch_size=batch_size * 4)
+
+    for application in queryset.only('id', *SEARCH_SOURCE_FIELDS).iterator(chunk_size=batch_size):
+        application.search_text = build_search_text(application)
+        batch.append(application)
+        if len(batch) >= batch_size:
+            flush()
+            updated += len(batch)
+            batch = []
+    if batch:
+        flush()
+        updated += len(batch)
+    return updated
+
+
+def _prefix_range(prefix):
+    # A range scan up to the next prefix uses the token index, unlike LIKE 'x%'
+    return Q(token__gte=prefix, token__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+def term_filter(term, fuzzy=True):
+    """Return a Q on ``ApplicationSearchToken`` matching one normalized search term"""
+    condition = _prefix_range(term)
+    if fuzzy and len(term) >= FUZZY_MIN_LENGTH and not term.isdigit():
+        # Same sound and same first two letters: GYAMPHI finds GYAMFI, OSEI does not find OWUSU
+        condition |= Q(phonetic=soundex(term)) & _prefix_range(term[:2])
+    return condition
+
+
+def normalize_terms(search):
+    """Split a search string into the same tokens the index stores"""
+    terms = []
+    for raw in search.replace(',', ' ').split():
+        if re.fullmatch(r'[\d+\-()]+', raw):
+            terms.append(phone_token(raw))
+        else:
+            terms.extend(normalize_name(raw).split())
+    return [term for term in terms if term]
+
+
+def search_applications(queryset, search, fuzzy=True):
+    """Filter ``queryset`` to applications matching every term of ``search``"""
+    token_model = queryset.model._meta.get_field('search_tokens').related_model
+    for term in normalize_terms(search):
+        matching = token_model.objects.filter(term_filter(term, fuzzy)).values('application_id')
+        queryset = queryset.filter(id__in=matching)
+    return queryset
+
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from school_management.tracing import TracedRepresentationMixin
 from .models import AdmissionApplication
 from django.utils import timezone
 
 
-class AdmissionApplicationSerializer(serializers.ModelSerializer):
+class AdmissionApplicationSerializer(TracedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for AdmissionApplication model"""
     
     full_name = serializers.ReadOnlyField()
@@ -13,8 +14,19 @@ class AdmissionApplicationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AdmissionApplication
-        fields = '__all__'
-        read_only_fields = ['application_date', 'reviewed_date', 'reviewed_by', 'created_at', 'updated_at']
+        # Everything except the internal duplicate-detection and search index columns
+        exclude = ['normalized_name', 'surname_block_key', 'first_name_block_key', 'search_text']
+        read_only_fields = [
+            'application_date', 'reviewed_date', 'reviewed_by', 'possible_duplicate_of',
+            'created_at', 'updated_at'
+        ]
+        # Model columns the read-only properties use (for the fast list path)
+        property_sources = {
+            'full_name': ['surname', 'first_name', 'other_names'],
+            'is_pending': ['status'],
+            'is_accepted': ['status'],
+            'is_rejected': ['status'],
+        }
     
     def validate_date_of_birth(self, value):
         """Validate date of birth is not in the future"""
@@ -52,7 +64,7 @@ class AdmissionApplicationSerializer(serializers.ModelSerializer):
         return data
 
 
-class AdmissionApplicationListSerializer(serializers.ModelSerializer):
+class AdmissionApplicationListSerializer(TracedRepresentationMixin, serializers.ModelSerializer):
     """Simplified serializer for listing applications"""
     
     full_name = serializers.ReadOnlyField()
@@ -63,6 +75,7 @@ class AdmissionApplicationListSerializer(serializers.ModelSerializer):
             'id', 'surname', 'first_name', 'full_name', 'age', 'gender',
             'class_before_admission', 'status', 'application_date', 'created_at'
         ]
+        property_sources = {'full_name': ['surname', 'first_name', 'other_names']}
 
 
 class AdmissionApplicationUpdateSerializer(serializers.ModelSerializer):
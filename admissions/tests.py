@@ -1,9 +1,17 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import connection
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
+from unittest import mock
+import uuid
 from rest_framework import status
 from datetime import date, timedelta
+from .duplicates import find_duplicates, iter_duplicate_pairs, rebuild_duplicate_keys
+from .search import rebuild_search_index
+from school_management.changelist import ApproximateCountPaginator
 from .models import AdmissionApplication
 
 
@@ -264,3 +272,247 @@ class AdmissionApplicationAPITest(APITestCase):
         
         application.refresh_from_db()
         self.assertEqual(application.status, 'rejected')
+
+
+class DuplicateDetectionTest(TestCase):
+    """Test cases for duplicate applicant detection"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.application_data = {
+            'surname': 'MENSAH',
+            'first_name': 'Kwame',
+            'date_of_birth': date(2015, 5, 15),
+            'age': 8,
+            'gender': 'male',
+            'place_of_birth': 'Accra',
+            'region_of_birth': 'Greater Accra',
+            'home_town': 'Kumasi',
+            'region_of_home_town': 'Ashanti',
+            'class_before_admission': 'Class 2',
+            'father_contact': '+233123456789',
+            'postal_address': 'P.O. Box 123, Accra',
+            'place_of_residence': 'Accra',
+        }
+    
+    def test_keys_are_normalized(self):
+        """Test that accents, case and punctuation do not change the keys"""
+        first = AdmissionApplication.objects.create(**self.application_data)
+        data = self.application_data.copy()
+        data.update({'surname': 'Mënsah', 'first_name': ' kwame-'})
+        second = AdmissionApplication.objects.create(**data)
+        self.assertEqual(first.normalized_name, 'MENSAH KWAME')
+        self.assertEqual(first.normalized_name, second.normalized_name)
+        self.assertEqual(first.surname_block_key, 'M520|2015-05-15')
+        self.assertEqual(first.surname_block_key, second.surname_block_key)
+    
+    def test_find_duplicates_within_block_only(self):
+        """Test that a misspelling matches but a different birth date does not"""
+        original = AdmissionApplication.objects.create(**self.application_data)
+        data = self.application_data.copy()
+        data.update({'surname': 'MENSA', 'father_contact': '0123456789'})
+        misspelt = AdmissionApplication.objects.create(**data)
+        data = self.application_data.copy()
+        data['date_of_birth'] = date(2016, 5, 15)
+        AdmissionApplication.objects.create(**data)
+        
+        matches = find_duplicates(misspelt)
+        self.assertEqual([m[0] for m in matches], [original.id])
+    
+    def test_batch_mode_reports_each_pair_once(self):
+        """Test that batch mode reports pairs found through either block key"""
+        first = AdmissionApplication.objects.create(**self.application_data)
+        data = self.application_data.copy()
+        data['surname'] = 'AMENSAH'  # different surname block, same first name block
+        second = AdmissionApplication.objects.create(**data)
+        
+        pairs = list(iter_duplicate_pairs(AdmissionApplication.objects.all()))
+        self.assertEqual([(a, b) for a, b, _ in pairs], [(first.id, second.id)])
+    
+    def test_rebuild_keys_after_bulk_create(self):
+        """Test that rows written with bulk_create get their keys rebuilt"""
+        AdmissionApplication.objects.bulk_create([AdmissionApplication(**self.application_data)])
+        self.assertEqual(AdmissionApplication.objects.filter(surname_block_key='').count(), 1)
+        
+        rebuild_duplicate_keys(AdmissionApplication.objects.all())
+        self.assertEqual(AdmissionApplication.objects.filter(surname_block_key='').count(), 0)
+    
+    def test_create_flags_possible_duplicate(self):
+        """Test that the create endpoint links a resubmission to the earlier application"""
+        original = AdmissionApplication.objects.create(**self.application_data)
+        data = self.application_data.copy()
+        data.update({'surname': 'MENSAH', 'first_name': 'Kwamé', 'date_of_birth': '2015-05-15'})
+        
+        response = APIClient().post(reverse('admission-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        duplicate = AdmissionApplication.objects.get(pk=response.data['id'])
+        self.assertEqual(duplicate.possible_duplicate_of, original)
+    
+    def test_keys_not_exposed_or_writable(self):
+        """Test that the API neither returns nor accepts the blocking key columns"""
+        data = self.application_data.copy()
+        data.update({'date_of_birth': '2015-05-15', 'surname_block_key': 'X000|2000-01-01'})
+        
+        response = APIClient().post(reverse('admission-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for field in ('normalized_name', 'surname_block_key', 'first_name_block_key'):
+            self.assertNotIn(field, response.data)
+        application = AdmissionApplication.objects.get(pk=response.data['id'])
+        self.assertEqual(application.surname_block_key, 'M520|2015-05-15')
+
+
+class ApplicationSearchTest(APITestCase):
+    """Test cases for the indexed application search"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='adminpass123',
+            is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        base = {
+            'date_of_birth': date(2015, 5, 15),
+            'age': 8,
+            'gender': 'female',
+            'place_of_birth': 'Accra',
+            'region_of_birth': 'Greater Accra',
+            'home_town': 'Kumasi',
+            'region_of_home_town': 'Ashanti',
+            'class_before_admission': 'Class 2',
+            'postal_address': 'P.O. Box 123, Accra',
+            'place_of_residence': 'Accra',
+        }
+        self.gyamfi = AdmissionApplication.objects.create(
+            surname='GYAMFI', first_name='Adwoa', mother_name='Efua Ánsah',
+            father_contact='+233 24 100 0042', **base
+        )
+        self.owusu = AdmissionApplication.objects.create(
+            surname='OWUSU', first_name='Kofi', mother_contact='0201234567', **base
+        )
+    
+    def search(self, term):
+        response = self.client.get(reverse('admission-list'), {'search': term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row['id'] for row in response.data['results']}
+    
+    def test_prefix_accent_and_case_insensitive(self):
+        """Test prefix matching regardless of accents and case"""
+        self.assertEqual(self.search('gyam'), {self.gyamfi.id})
+        self.assertEqual(self.search('ANSAH'), {self.gyamfi.id})
+        self.assertEqual(self.search('adwóa gyamfi'), {self.gyamfi.id})
+    
+    def test_typo_tolerant_and_phone_search(self):
+        """Test phonetic matching and phone numbers in any format"""
+        self.assertEqual(self.search('Gyamphi'), {self.gyamfi.id})
+        self.assertEqual(self.search('0241000042'), {self.gyamfi.id})
+        self.assertEqual(self.search('+233201234567'), {self.owusu.id})
+        self.assertEqual(self.search('Osei'), set())
+    
+    def test_index_follows_saves(self):
+        """Test that renaming an application reindexes it and unrelated saves do not"""
+        self.owusu.surname = 'BOATENG'
+        self.owusu.save()
+        self.assertEqual(self.search('boateng'), {self.owusu.id})
+        self.assertEqual(self.search('owusu'), set())
+        
+        application = AdmissionApplication.objects.get(pk=self.owusu.pk)
+        application.status = 'reviewed'
+        with self.assertNumQueries(1):
+            application.save()
+    
+    def test_failed_reindex_rolls_back_save(self):
+        """Test that a rename is not saved without its token rows"""
+        self.owusu.surname = 'MENSAH'
+        with mock.patch('admissions.models.index_application', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            self.owusu.save()
+        self.assertEqual(AdmissionApplication.objects.get(pk=self.owusu.pk).surname, 'OWUSU')
+        self.assertEqual(self.search('owusu'), {self.owusu.id})
+    
+    def test_rebuild_after_bulk_update(self):
+        """Test that the rebuild helper picks up queryset.update() renames"""
+        AdmissionApplication.objects.filter(pk=self.owusu.pk).update(surname='DARKO')
+        self.assertEqual(self.search('darko'), set())
+        rebuild_search_index(AdmissionApplication.objects.all())
+        self.assertEqual(self.search('darko'), {self.owusu.id})
+
+
+class AdmissionAdminChangelistTest(TestCase):
+    """Test cases for the high-volume admission changelist"""
+    
+    # Session, user, table estimate, count and page of results
+    MAX_CHANGELIST_QUERIES = 5
+    
+    def setUp(self):
+        """Set up test data"""
+        self.use_empty_cache()
+        self.superuser = User.objects.create_superuser('root', 'root@test.com', 'rootpass123')
+        self.client.force_login(self.superuser)
+        self.url = reverse('admin:admissions_admissionapplication_changelist')
+    
+    def use_empty_cache(self):
+        """Point the default cache at a new locmem cache: cold filter choices"""
+        empty = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': uuid.uuid4().hex}
+        caches_setting = override_settings(CACHES={**settings.CACHES, 'default': empty})
+        caches_setting.enable()
+        self.addCleanup(caches_setting.disable)
+    
+    def create_applications(self, count):
+        AdmissionApplication.objects.bulk_create([
+            AdmissionApplication(
+                surname=f'PUPIL{i}', first_name='Ama', date_of_birth=date(2015, 1, 1), age=8,
+                gender='female', place_of_birth='Accra', region_of_birth=f'Region {i % 4}',
+                home_town='Kumasi', region_of_home_town='Ashanti', class_before_admission=f'Class {i % 6}',
+                postal_address='P.O. Box 1', place_of_residence='Accra'
+            )
+            for i in range(count)
+        ])
+    
+    def count_changelist_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+    
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that the changelist query count is bounded and independent of row count"""
+        self.create_applications(5)
+        small = self.count_changelist_queries()
+        self.use_empty_cache()
+        self.create_applications(150)
+        large = self.count_changelist_queries()
+        self.assertEqual(small, large)
+        # Plus one SELECT DISTINCT per free-text filter on a cold cache
+        self.assertLessEqual(large, self.MAX_CHANGELIST_QUERIES + 3)
+    
+    def test_filter_choices_are_cached(self):
+        """Test that free-text filter choices are not recomputed on every page load"""
+        self.create_applications(10)
+        first = self.count_changelist_queries()
+        second = self.count_changelist_queries({'status': 'pending'})
+        self.assertLess(second, first)
+        self.assertLessEqual(second, self.MAX_CHANGELIST_QUERIES)
+    
+    def test_approximate_count_paginator(self):
+        """Test table estimates and capped counts"""
+        self.create_applications(30)
+        queryset = AdmissionApplication.objects.all()
+        paginator = ApproximateCountPaginator(queryset, 10)
+        paginator.count_limit = 20
+        self.assertEqual(paginator.count, 30)  # primary key range estimate
+        paginator = ApproximateCountPaginator(queryset.filter(gender='female'), 10)
+        paginator.count_limit = 20
+        self.assertEqual(paginator.count, 20)  # capped count
+    
+    def test_reviewed_by_uses_autocomplete(self):
+        """Test that the change form does not render every user as an option"""
+        self.create_applications(1)
+        for i in range(5):
+            User.objects.create_user(f'staff{i}')
+        application = AdmissionApplication.objects.get()
+        response = self.client.get(reverse('admin:admissions_admissionapplication_change', args=[application.id]))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, '>staff3<')
@@ -7,6 +7,14 @@ from django.utils import timezone
 from django.db.models import Count, Q
 from datetime import datetime, timedelta
 
+from school_management.budgets import Budget
+from school_management.caching import cache_response
+from school_management.fast_serializers import FastSerializationMixin
+from school_management.routing import ReplicaReadMixin
+from school_management.tracing import TracingMixin
+
+from .duplicates import flag_possible_duplicate
+from .filters import ApplicationSearchFilter
 from .models import AdmissionApplication
 from .serializers import (
     AdmissionApplicationSerializer,
@@ -15,16 +23,26 @@ from .serializers import (
 )
 
 
-class AdmissionApplicationViewSet(viewsets.ModelViewSet):
+class AdmissionApplicationViewSet(TracingMixin, ReplicaReadMixin, FastSerializationMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing admission applications
     """
     queryset = AdmissionApplication.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Safe to serve slightly stale, from the read replica when configured
+    replica_actions = ('list', 'statistics', 'pending', 'export')
+    filter_backends = [DjangoFilterBackend, ApplicationSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'gender', 'class_before_admission']
+    # Served from the ApplicationSearchToken index, see admissions/search.py
     search_fields = ['surname', 'first_name', 'other_names', 'father_name', 'mother_name']
     ordering_fields = ['application_date', 'created_at', 'surname', 'first_name']
     ordering = ['-application_date']
+    performance_budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=2),
+        'pending': Budget(queries=2),
+        'export': Budget(queries=2),
+        'statistics': Budget(queries=8),
+    }
     
     def get_permissions(self):
         """Set permissions based on action"""
@@ -61,11 +79,17 @@ class AdmissionApplicationViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @cache_response('admissions')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
-        """Set application date when creating"""
-        serializer.save(application_date=timezone.now())
+        """Set application date when creating and flag likely duplicates"""
+        application = serializer.save(application_date=timezone.now())
+        flag_possible_duplicate(application)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @cache_response('admissions', stale=True)
     def statistics(self, request):
         """Get admission statistics for admin dashboard"""
         total_applications = AdmissionApplication.objects.count()
@@ -100,11 +124,11 @@ class AdmissionApplicationViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @cache_response('admissions')
     def pending(self, request):
         """Get all pending applications"""
         pending_applications = AdmissionApplication.objects.filter(status='pending')
-        serializer = self.get_serializer(pending_applications, many=True)
-        return Response(serializer.data)
+        return self.fast_response(pending_applications)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def approve(self, request, pk=None):
@@ -134,5 +158,4 @@ class AdmissionApplicationViewSet(viewsets.ModelViewSet):
     def export(self, request):
         """Export applications data (basic implementation)"""
         applications = self.get_queryset()
-        serializer = AdmissionApplicationSerializer(applications, many=True)
-        return Response(serializer.data)
+        return self.fast_response(applications, AdmissionApplicationSerializer)
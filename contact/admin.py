@@ -1,10 +1,27 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db.models.functions import Length, Substr
+from django.http import Http404, JsonResponse
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from django.utils.safestring import mark_safe
 from .models import ContactMessage
 
 
+PREVIEW_LENGTH = 100
+
+
+class ContactMessageChangeList(ChangeList):
+    """Changelist that never loads full message bodies or user agents"""
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('message', 'user_agent').annotate(
+            message_head=Substr('message', 1, PREVIEW_LENGTH),
+            message_length=Length('message'),
+        )
+
+
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     """Admin interface for ContactMessage model"""
@@ -37,6 +54,9 @@ class ContactMessageAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_read', 'mark_as_replied', 'archive_messages']
     
+    class Media:
+        js = ['contact/admin/message_preview.js']
+    
     def name_display(self, obj):
         """Display name with link to detail view"""
         url = reverse('admin:contact_contactmessage_change', args=[obj.id])
@@ -67,9 +87,10 @@ class ContactMessageAdmin(admin.ModelAdmin):
     status_display.admin_order_field = 'status'
     
     def message_preview(self, obj):
-        """Display a preview of the message"""
-        preview = obj.message[:100] + '...' if len(obj.message) > 100 else obj.message
-        return format_html('<span title="{}">{}</span>', obj.message, preview)
+        """Display a preview of the message; the full text is fetched on hover"""
+        preview = obj.message_head + '...' if obj.message_length > PREVIEW_LENGTH else obj.message_head
+        url = reverse('admin:contact_contactmessage_message', args=[obj.id])
+        return format_html('<span class="message-preview" data-message-url="{}">{}</span>', url, preview)
     message_preview.short_description = 'Message Preview'
     
     def mark_as_read(self, request, queryset):
@@ -116,6 +137,30 @@ class ContactMessageAdmin(admin.ModelAdmin):
         """Custom queryset with optimized ordering"""
         return super().get_queryset(request).order_by('-created_at')
     
+    def get_changelist(self, request, **kwargs):
+        """Use a changelist that computes previews in the database"""
+        return ContactMessageChangeList
+    
+    def get_urls(self):
+        """Add the JSON endpoint used to load a full message lazily"""
+        urls = [
+            path(
+                '<path:object_id>/message/',
+                self.admin_site.admin_view(self.message_view),
+                name='contact_contactmessage_message',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def message_view(self, request, object_id):
+        """Return the full message and user agent of one message as JSON"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        message = ContactMessage.objects.filter(pk=object_id).values('id', 'message', 'user_agent').first()
+        if message is None:
+            raise Http404
+        return JsonResponse(message)
+    
     def has_add_permission(self, request):
         """Disable adding messages through admin (they come from contact form)"""
         return False
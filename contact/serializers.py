@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from school_management.tracing import TracedRepresentationMixin
 from .models import ContactMessage
 
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(TracedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for ContactMessage model"""
     
     class Meta:
@@ -23,12 +24,14 @@ class ContactMessageSerializer(serializers.ModelSerializer):
         return value.strip()
 
 
-class ContactMessageListSerializer(serializers.ModelSerializer):
+class ContactMessageListSerializer(TracedRepresentationMixin, serializers.ModelSerializer):
     """Simplified serializer for listing contact messages (admin only)"""
     
     class Meta:
         model = ContactMessage
         fields = ['id', 'name', 'email', 'status', 'created_at', 'is_new', 'is_read', 'is_replied']
+        # Model columns the read-only properties use (for the fast list path)
+        property_sources = {'is_new': ['status'], 'is_read': ['status'], 'is_replied': ['status']}
 
 
 class ContactMessageUpdateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,38 @@
+/**
+ * Contact message changelist: load the full message the first time a
+ * preview is hovered or clicked, instead of shipping every body with the page.
+ */
+(function() {
+    'use strict';
+
+    function loadMessage(preview) {
+        if (preview.dataset.loaded) {
+            return;
+        }
+        preview.dataset.loaded = 'loading';
+        fetch(preview.dataset.messageUrl, {credentials: 'same-origin'})
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then(function(data) {
+                preview.title = data.message;
+                preview.dataset.loaded = 'yes';
+            })
+            .catch(function() {
+                delete preview.dataset.loaded;
+            });
+    }
+
+    function onEvent(event) {
+        var preview = event.target.closest && event.target.closest('.message-preview');
+        if (preview) {
+            loadMessage(preview);
+        }
+    }
+
+    document.addEventListener('mouseover', onEvent);
+    document.addEventListener('click', onEvent);
+})();
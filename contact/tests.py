@@ -1,5 +1,7 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.db import connection
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
@@ -230,3 +232,54 @@ class ContactMessageAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)  # Only new message
+
+
+class ContactMessageAdminTest(TestCase):
+    """Test cases for the contact message changelist"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.superuser = User.objects.create_superuser('root', 'root@test.com', 'rootpass123')
+        self.client.force_login(self.superuser)
+        self.url = reverse('admin:contact_contactmessage_changelist')
+    
+    def create_messages(self, count=20):
+        ContactMessage.objects.bulk_create([
+            ContactMessage(name=f'Visitor {i}', email=f'visitor{i}@example.com', message='')
+            for i in range(count)
+        ])
+    
+    def set_message_length(self, length):
+        ContactMessage.objects.update(
+            message=('Enquiry about admissions for my ward. ' * 1000)[:length],
+            user_agent='Mozilla/5.0 ' * (length // 12)
+        )
+    
+    def test_response_size_independent_of_message_length(self):
+        """Test that long bodies are neither loaded nor rendered"""
+        self.create_messages()
+        self.set_message_length(200)
+        short = self.client.get(self.url)
+        self.set_message_length(20000)
+        with CaptureQueriesContext(connection) as queries:
+            long = self.client.get(self.url)
+        self.assertEqual(len(short.content), len(long.content))
+        self.assertNotContains(long, 'Mozilla')
+        results_query = queries.captured_queries[-1]['sql']
+        self.assertIn('SUBSTR', results_query.upper())
+        self.assertNotIn('"user_agent"', results_query)
+    
+    def test_message_endpoint(self):
+        """Test the JSON endpoint used to load a full message on hover"""
+        self.create_messages(1)
+        self.set_message_length(500)
+        message = ContactMessage.objects.get()
+        url = reverse('admin:contact_contactmessage_message', args=[message.id])
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], message.message)
+        
+        self.client.force_login(User.objects.create_user('visitor'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)  # redirected to the admin login
@@ -7,6 +7,12 @@ from django.utils import timezone
 from django.db.models import Count
 from datetime import datetime, timedelta
 
+from school_management.budgets import Budget
+from school_management.caching import cache_response
+from school_management.fast_serializers import FastSerializationMixin
+from school_management.routing import ReplicaReadMixin
+from school_management.tracing import TracingMixin
+
 from .models import ContactMessage
 from .serializers import (
     ContactMessageSerializer,
@@ -15,16 +21,25 @@ from .serializers import (
 )
 
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ContactMessageViewSet(TracingMixin, ReplicaReadMixin, FastSerializationMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing contact messages
     """
     queryset = ContactMessage.objects.all()
+    # Safe to serve slightly stale, from the read replica when configured
+    replica_actions = ('list', 'statistics', 'new', 'export')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status']
     search_fields = ['name', 'email', 'message']
     ordering_fields = ['created_at', 'name', 'email']
     ordering = ['-created_at']
+    performance_budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=2),
+        'new': Budget(queries=2),
+        'export': Budget(queries=2),
+        'statistics': Budget(queries=9),
+    }
     
     def get_permissions(self):
         """Set permissions based on action"""
@@ -48,6 +63,10 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
             return ContactMessage.objects.none()
         return super().get_queryset()
     
+    @cache_response('contact')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """Capture additional information when creating contact message"""
         # Get client IP address
@@ -63,6 +82,7 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         serializer.save(ip_address=ip, user_agent=user_agent)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @cache_response('contact', stale=True)
     def statistics(self, request):
         """Get contact message statistics for admin dashboard"""
         total_messages = ContactMessage.objects.count()
@@ -102,11 +122,11 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @cache_response('contact')
     def new(self, request):
         """Get all new messages"""
         new_messages = ContactMessage.objects.filter(status='new')
-        serializer = self.get_serializer(new_messages, many=True)
-        return Response(serializer.data)
+        return self.fast_response(new_messages)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def mark_as_read(self, request, pk=None):
@@ -136,5 +156,4 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
     def export(self, request):
         """Export contact messages data"""
         messages = self.get_queryset()
-        serializer = ContactMessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        return self.fast_response(messages, ContactMessageSerializer)
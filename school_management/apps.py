@@ -0,0 +1,43 @@
+from django.apps import AppConfig
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.core import checks
+
+
+class SchoolManagementConfig(AppConfig):
+    name = 'school_management'
+    verbose_name = 'School Management'
+    # The app's config, not LazyAdminConfig below
+    default = True
+
+    def ready(self):
+        # Connect the cache namespace invalidation handlers
+        from .caching import connect_invalidation
+        connect_invalidation()
+        # Record slow SQL statements on every connection
+        from . import slowlog, tracing
+        slowlog.install()
+        tracing.install()
+        # tracemalloc at startup and the memory report signal
+        from . import memory
+        memory.install()
+
+
+def check_admin(app_configs, **kwargs):
+    from django.contrib import admin
+    from django.contrib.admin.checks import check_admin_app
+    admin.autodiscover()
+    return check_admin_app(app_configs, **kwargs)
+
+
+class LazyAdminConfig(SimpleAdminConfig):
+    """
+    ``django.contrib.admin`` without autodiscovery in ``ready()``: the
+    apps' admin modules (and the DRF serializers they import) load with
+    the URLconf, which calls ``admin.autodiscover()``, so management
+    commands that never resolve a URL do not import them.
+    """
+
+    def ready(self):
+        from django.contrib.admin.checks import check_dependencies
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(check_admin, checks.Tags.admin)
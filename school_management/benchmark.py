@@ -0,0 +1,59 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks never touch the real database: they run against a throwaway
+test database created from the migrations, the same way ``manage.py test``
+does.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """Create a disposable database for the duration of the block"""
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def time_call(func, repeat=5, warmup=1):
+    """Return the wall-clock durations (seconds) of ``repeat`` calls to ``func``"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Summarize durations in milliseconds"""
+    return {
+        'min_ms': round(min(samples) * 1000, 3),
+        'p50_ms': round(statistics.median(samples) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+    }
+
+
+def format_row(label, summary, width=36):
+    return (
+        f"{label:<{width}} p50 {summary['p50_ms']:>10.3f} ms   "
+        f"p95 {summary['p95_ms']:>10.3f} ms   min {summary['min_ms']:>10.3f} ms"
+    )
@@ -0,0 +1,104 @@
+"""
+Query-count and latency budgets for every API endpoint.
+
+Each ViewSet declares, next to its actions, what one request may cost:
+
+    performance_budgets = {
+        'list': Budget(queries=3),
+        'statistics': Budget(queries=3, ms=100),
+    }
+
+``router_endpoints()`` finds every ``GET`` action registered with a
+DRF router (``admission-list``, ``contact-statistics``, ``user-me``,
+...). ``EndpointBudgetTest`` in ``school_management/tests.py`` calls each
+of them on a small and a larger data set and fails when:
+
+* an endpoint has no budget,
+* its query count differs between the two sizes (a query per row),
+* it makes more queries than budgeted, or
+* with ``ENFORCE_LATENCY_BUDGETS``, its fastest of ``Endpoint.runs``
+  requests takes longer than the budgeted milliseconds (wall-clock time
+  is only meaningful on a quiet machine, so this is opt-in).
+
+Failure messages list the queries the request made.
+"""
+import time
+from typing import NamedTuple
+
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+
+class Budget(NamedTuple):
+    """
+    The most queries and milliseconds one request to an action may take,
+    whatever the number of rows. Every routed ``GET`` action needs one in
+    its ViewSet's ``performance_budgets``.
+    """
+    queries: int
+    ms: float = 250
+
+
+class Endpoint(NamedTuple):
+    name: str
+    method: str
+    action: str
+    viewset: type
+    detail: bool
+
+    runs = 3
+
+    @property
+    def budget(self):
+        return getattr(self.viewset, 'performance_budgets', {}).get(self.action)
+
+    def url(self):
+        if not self.detail:
+            return reverse(self.name)
+        model = self.viewset.queryset.model
+        return reverse(self.name, kwargs={'pk': model._default_manager.order_by('pk').values_list('pk', flat=True).last()})
+
+    def measure(self, client, using='default'):
+        """Call the endpoint ``runs`` times; return the last response, its queries and the fastest time"""
+        # Test-only; the ViewSets import Budget from this module
+        from django.test.utils import CaptureQueriesContext
+
+        url = self.url()
+        call = getattr(client, self.method.lower())
+        fastest = None
+        for _ in range(self.runs):
+            with CaptureQueriesContext(connections[using]) as queries:
+                started = time.perf_counter()
+                response = call(url)
+                elapsed = (time.perf_counter() - started) * 1000
+            fastest = elapsed if fastest is None else min(fastest, elapsed)
+        return response, queries.captured_queries, fastest
+
+
+def _patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def router_endpoints(urlconf=None):
+    """Every ViewSet action routed for ``GET`` in ``urlconf``, once each"""
+    seen = set()
+    for pattern in _patterns(get_resolver(urlconf).url_patterns):
+        viewset = getattr(pattern.callback, 'cls', None)
+        actions = getattr(pattern.callback, 'actions', None)
+        if viewset is None or not actions or not pattern.name:
+            continue
+        # DRF adds 'head' to the mapping when a view is first called
+        for method, action in list(actions.items()):
+            method = method.upper()
+            if method == 'GET' and (pattern.name, method) not in seen:
+                seen.add((pattern.name, method))
+                detail = 'pk' in pattern.pattern.regex.groupindex
+                yield Endpoint(pattern.name, method, action, viewset, detail)
+
+
+def describe_queries(queries):
+    return '\n'.join(f"{number:>3}. {query['sql']}" for number, query in enumerate(queries, 1))
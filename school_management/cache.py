@@ -0,0 +1,372 @@
+"""
+Cache backends shared by every worker process.
+
+``SQLiteCache``
+    Entries live in a small SQLite file in WAL mode, separate from the main
+    database, so cache reads never wait on (or take) the application's
+    write lock and readers do not block the single writer. Shared by the
+    workers of one host.
+
+``RespCache``
+    Any server speaking the Redis protocol, for several hosts.
+
+``cache_settings`` builds the ``'default'`` entry of ``CACHES`` from
+``CACHE_BACKEND`` and ``CACHE_LOCATION``:
+
+``locmem``   per process; fine for ``runserver`` and one worker
+``file``     Django's file cache in a directory
+``sqlite``   ``SQLiteCache``, shared by the workers of one host
+``redis``    ``RespCache`` at ``redis://host:port/db``, shared by hosts
+"""
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'school_management.cache.SQLiteCache',
+    'redis': 'school_management.cache.RespCache',
+}
+
+
+def cache_settings(backend, location, base_dir):
+    """Return the ``CACHES`` entry for a ``CACHE_BACKEND`` name"""
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(f'Unsupported CACHE_BACKEND: {backend!r}')
+    entry = {'BACKEND': CACHE_BACKENDS[backend]}
+    if backend == 'file':
+        entry['LOCATION'] = location or str(base_dir / 'cache' / 'default')
+    elif backend == 'sqlite':
+        entry['LOCATION'] = location or str(base_dir / 'cache' / 'default.sqlite3')
+        entry['OPTIONS'] = {'MAX_ENTRIES': 100000}
+    elif backend == 'redis':
+        entry['LOCATION'] = location or 'redis://127.0.0.1:6379/0'
+    elif location:
+        entry['LOCATION'] = location
+    return entry
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    # Expired/overflow entries are culled on one in ``cull_every`` writes
+    cull_every = 200
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit: every write below is a single statement
+            connection = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL) WITHOUT ROWID'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _live(self):
+        return '(expires IS NULL OR expires > ?)'
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # One statement, so two workers adding the same key cannot both win
+        cursor = self._connection.execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires <= ?',
+            (key, pickle.dumps(value, self.pickle_protocol), self.get_backend_timeout(timeout), time.time())
+        )
+        self._maybe_cull()
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection.execute(
+            f'SELECT value FROM cache_entry WHERE key = ? AND {self._live()}', (key, time.time())
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection.execute(
+            f'SELECT key, value FROM cache_entry WHERE key IN ({placeholders}) AND {self._live()}',
+            (*keys, time.time())
+        )
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), pickle.dumps(value, self.pickle_protocol), expires)
+            for key, value in data.items()
+        ]
+        self._connection.executemany('REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)', rows)
+        self._maybe_cull()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection.execute(
+            f'UPDATE cache_entry SET expires = ? WHERE key = ? AND {self._live()}',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version) > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return 0
+        cursor = self._connection.execute(
+            f'DELETE FROM cache_entry WHERE key IN ({", ".join("?" * len(keys))})', keys
+        )
+        return cursor.rowcount
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection.execute(
+            f'SELECT 1 FROM cache_entry WHERE key = ? AND {self._live()}', (key, time.time())
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Atomic across processes: the read and the write share one write lock"""
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                f'SELECT value FROM cache_entry WHERE key = ? AND {self._live()}', (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found.")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entry SET value = ? WHERE key = ?', (pickle.dumps(value, self.pickle_protocol), key)
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache_entry')
+
+    def purge_expired(self):
+        """Delete expired entries; returns how many were removed"""
+        cursor = self._connection.execute('DELETE FROM cache_entry WHERE expires <= ?', (time.time(),))
+        return cursor.rowcount
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % self.cull_every:
+            return
+        self.purge_expired()
+        connection = self._connection
+        count = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count > self._max_entries:
+            # Drop the entries closest to expiry first
+            connection.execute(
+                'DELETE FROM cache_entry WHERE key IN '
+                '(SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,)
+            )
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+
+class RespCache(BaseCache):
+    """
+    Cache backend for any server speaking the Redis protocol (RESP), with
+    no client library dependency.
+
+    ``LOCATION`` is ``redis://host:port/db``. Integers are stored as plain
+    numbers so ``incr()`` is atomic on the server; everything else is
+    pickled. ``school_management.resp_server`` is a local stand-in for
+    development and tests.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        url = urlsplit(location if '://' in location else f'redis://{location}')
+        self._address = (url.hostname or '127.0.0.1', url.port or 6379)
+        self._db = int(url.path.lstrip('/') or 0)
+        self._timeout = params.get('OPTIONS', {}).get('socket_timeout', 1.0)
+        self._local = threading.local()
+
+    # Protocol
+
+    def _socket(self):
+        sock = getattr(self._local, 'socket', None)
+        if sock is None or getattr(self._local, 'pid', None) != os.getpid():
+            sock = socket.create_connection(self._address, timeout=self._timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.socket = sock
+            self._local.reader = sock.makefile('rb')
+            self._local.pid = os.getpid()
+            if self._db:
+                self._pipeline([('SELECT', self._db)])
+        return sock
+
+    @staticmethod
+    def _encode(command):
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        reader = self._local.reader
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the cache server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RespError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            return reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RespError(f'Unexpected reply {line!r}')
+
+    def _pipeline(self, commands):
+        """Send ``commands`` in one write and return their replies"""
+        try:
+            self._socket().sendall(b''.join(self._encode(command) for command in commands))
+            return [self._read_reply() for _ in commands]
+        except (OSError, ConnectionError):
+            # Drop the broken connection; the next call reconnects
+            self._local.socket = None
+            raise
+
+    def _execute(self, *command):
+        return self._pipeline([command])[0]
+
+    # Serialization
+
+    def _dumps(self, value):
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _loads(self, value):
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return pickle.loads(value)
+
+    def _expiry_args(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return ()
+        return ('PX', max(1, int((timeout - time.time()) * 1000)))
+
+    # Cache API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute('SET', key, self._dumps(value), *self._expiry_args(timeout), 'NX') == 'OK'
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._execute('GET', key)
+        return default if value is None else self._loads(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        values = self._execute('MGET', *keys)
+        return {keys[key]: self._loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expiry = self._expiry_args(timeout)
+        if data:
+            self._pipeline([
+                ('SET', self.make_and_validate_key(key, version=version), self._dumps(value), *expiry)
+                for key, value in data.items()
+            ])
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expiry = self._expiry_args(timeout)
+        if expiry:
+            return self._execute('PEXPIRE', key, expiry[1]) == 1
+        return self._execute('PERSIST', key) == 1 or self._execute('EXISTS', key) == 1
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version) > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        return self._execute('DEL', *keys) if keys else 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute('EXISTS', key) == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if not self._execute('EXISTS', key):
+            raise ValueError(f"Key '{key}' not found.")
+        return self._execute('INCRBY', key, delta)
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+
+class RespError(Exception):
+    pass
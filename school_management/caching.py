@@ -0,0 +1,353 @@
+"""
+Application cache layer: namespaced keys and cross-worker invalidation.
+
+The cache itself is chosen by ``CACHE_BACKEND`` (see
+``school_management.cache.cache_settings``).
+
+Invalidation works by version counters rather than by deleting keys.
+Every namespace (``CACHE_NAMESPACES`` in settings, one per app) has a
+counter in the shared cache, and every key built with ``make_key``
+embeds it. A ``post_save``/``post_delete`` of one of the namespace's
+models, in any worker, increments the counter (``bump``), so the next
+lookup in every worker misses; old entries simply expire. Writes that
+bypass signals (``bulk_create``, ``update()``) call ``invalidate`` themselves.
+
+``cache_response`` caches the result of a DRF action under its namespace,
+computing it once for concurrent identical requests and optionally
+serving the last good value while it is refreshed. ``flight_counters``
+counts hits and avoided computations (``manage.py cache_stats``).
+"""
+import atexit
+import contextvars
+import hashlib
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import Counter
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .routing import SAFE_METHODS, pin_seconds, reading_from_replica, recently_wrote
+from .tracing import traced
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache():
+    return caches[getattr(settings, 'APP_CACHE_ALIAS', 'default')]
+
+
+def _counter_key(namespace):
+    return f'ns:{namespace}:version'
+
+
+def _changed_key(namespace):
+    return f'ns:{namespace}:changed'
+
+
+def _initial_version():
+    # A counter that was evicted restarts above every value it ever had
+    return time.time_ns() // 1000
+
+
+def namespace_state(namespace):
+    """Return ``(version, last change as a Unix time)`` for ``namespace``"""
+    cache = get_cache()
+    counter, changed = _counter_key(namespace), _changed_key(namespace)
+    values = cache.get_many([counter, changed])
+    version = values.get(counter)
+    if version is None:
+        cache.add(counter, _initial_version(), None)
+        version = cache.get(counter)
+    return version, values.get(changed, 0)
+
+
+def namespace_version(namespace):
+    return namespace_state(namespace)[0]
+
+
+def bump(namespace):
+    """Invalidate every key of ``namespace`` in every worker"""
+    cache = get_cache()
+    key = _counter_key(namespace)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _initial_version(), None):
+            return bump(namespace)
+        version = cache.get(key)
+    cache.set(_changed_key(namespace), time.time(), None)
+    return version
+
+
+def invalidate(*namespaces, using=DEFAULT_DB_ALIAS):
+    """
+    Bump ``namespaces`` now and again when the current transaction commits,
+    so a worker that reads the old rows before the commit cannot cache them
+    under the new version.
+    """
+    for namespace in namespaces:
+        bump(namespace)
+        if connections[using].in_atomic_block:
+            transaction.on_commit(partial(bump, namespace), using=using)
+
+
+def bump_all(**kwargs):
+    for namespace in getattr(settings, 'CACHE_NAMESPACES', {}):
+        bump(namespace)
+
+
+def make_key(namespace, *parts, version=None):
+    """Build a key that stops matching once ``namespace`` is bumped"""
+    if version is None:
+        version = namespace_version(namespace)
+    digest = hashlib.md5(':'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+    return f'{namespace}:{version}:{digest}'
+
+
+def response_cache_timeout():
+    return getattr(settings, 'CACHE_RESPONSE_TIMEOUT', 300)
+
+
+def stale_timeout():
+    """Seconds the last good value of a response may still be served"""
+    return getattr(settings, 'CACHE_STALE_TIMEOUT', 3600)
+
+
+def lock_timeout():
+    """Seconds a response computation may hold its lock"""
+    return getattr(settings, 'CACHE_LOCK_TIMEOUT', 30)
+
+
+def storable(changed):
+    """
+    Whether data read now may be cached: not from inside a transaction (it
+    may still roll back) and not from a replica that may not have the last
+    change (made at ``changed``) yet.
+    """
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    return not (reading_from_replica() and time.time() - changed < pin_seconds())
+
+
+class FlightCounters:
+    """
+    Response cache events per namespace, counted in the process and added
+    to shared counters at most every ``flush_interval`` seconds, so a cache
+    hit does not cost a write to the shared store.
+    """
+    EVENTS = ('hit', 'miss', 'computed', 'coalesced', 'stale', 'wait_timeout')
+    flush_interval = 5
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flushed = time.monotonic()
+
+    def add(self, namespace, event):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Counts inherited across a fork belong to the parent
+                self._pending.clear()
+                self._pid = os.getpid()
+            self._pending[namespace, event] += 1
+            due = time.monotonic() - self._flushed >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed = time.monotonic()
+        cache = get_cache()
+        for (namespace, event), count in pending.items():
+            key = f'stats:{namespace}:{event}'
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                if not cache.add(key, count, None):
+                    cache.incr(key, count)
+
+    def totals(self, namespace):
+        """Return every event count for ``namespace``, across all workers"""
+        self.flush()
+        keys = {event: f'stats:{namespace}:{event}' for event in self.EVENTS}
+        values = get_cache().get_many(list(keys.values()))
+        totals = {event: values.get(key, 0) for event, key in keys.items()}
+        # Requests answered without computing the response again
+        totals['avoided'] = totals['coalesced'] + totals['stale']
+        return totals
+
+    def reset(self, namespace):
+        self.flush()
+        get_cache().delete_many([f'stats:{namespace}:{event}' for event in self.EVENTS])
+
+
+flight_counters = FlightCounters()
+atexit.register(flight_counters.flush)
+
+
+class ResponseFlight:
+    """
+    One cacheable response: its entry for the current namespace version,
+    the last good value of any version, and the lock that lets a single
+    worker compute it while the others wait for (or are served) a result.
+    """
+    max_poll_interval = 0.1
+
+    def __init__(self, namespace, *parts):
+        self.namespace = namespace
+        self.cache = get_cache()
+        self.version, self.changed = namespace_state(namespace)
+        self.key = make_key(namespace, *parts, version=self.version)
+        self.latest_key = f'{namespace}:latest:{self.key.rsplit(":", 1)[1]}'
+        self.lock_key = f'{self.key}:lock'
+        self.token = secrets.token_hex(8)
+
+    def count(self, event):
+        flight_counters.add(self.namespace, event)
+
+    def acquire(self):
+        return self.cache.add(self.lock_key, self.token, lock_timeout())
+
+    def release(self):
+        # Not atomic: a lock that expired and was taken over in between is
+        # deleted early, which costs at most one duplicate computation
+        if self.cache.get(self.lock_key) == self.token:
+            self.cache.delete(self.lock_key)
+
+    def respond(self, compute, timeout, coalesce=True, stale=False):
+        cached = self.cache.get(self.key)
+        if cached is not None:
+            self.count('hit')
+            return restore_response(cached)
+        self.count('miss')
+        if not storable(self.changed):
+            return compute()
+        if not coalesce:
+            return self.compute_and_store(compute, timeout)
+        # A client that just wrote must see its write, not the last value
+        latest = self.cache.get(self.latest_key) if stale and not recently_wrote() else None
+        if self.acquire():
+            if latest is not None:
+                self.count('stale')
+                self.refresh_in_background(compute, timeout)
+                return restore_response(latest)
+            try:
+                return self.compute_and_store(compute, timeout)
+            finally:
+                self.release()
+        if latest is not None:
+            self.count('stale')
+            return restore_response(latest)
+        return self.wait(compute, timeout)
+
+    def wait(self, compute, timeout):
+        """Wait for the worker holding the lock; take over if it gives up"""
+        deadline = time.monotonic() + lock_timeout()
+        delay = 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+            cached = self.cache.get(self.key)
+            if cached is not None:
+                self.count('coalesced')
+                return restore_response(cached)
+            if self.acquire():
+                try:
+                    return self.compute_and_store(compute, timeout)
+                finally:
+                    self.release()
+        self.count('wait_timeout')
+        return compute()
+
+    def compute_and_store(self, compute, timeout):
+        response = compute()
+        self.count('computed')
+        if response.status_code == 200:
+            value = (response.data, response.status_code)
+            self.cache.set(self.key, value, response_cache_timeout() if timeout is None else timeout)
+            self.cache.set(self.latest_key, value, stale_timeout())
+        return response
+
+    def refresh_in_background(self, compute, timeout):
+        # The copied context keeps the request's routing state (read intent)
+        context = contextvars.copy_context()
+
+        def refresh():
+            try:
+                context.run(self.compute_and_store, compute, timeout)
+            except Exception:
+                logger.exception('Background refresh of %s failed', self.key)
+            finally:
+                self.release()
+                connections.close_all()
+
+        threading.Thread(target=refresh, name='cache-refresh', daemon=True).start()
+
+
+def restore_response(value):
+    from rest_framework.response import Response
+    data, status = value
+    return Response(data, status=status)
+
+
+def cache_response(namespace, timeout=None, coalesce=True, stale=False):
+    """
+    Cache a DRF action's response data under ``namespace``.
+
+    The key covers the full path and query string, and the requesting user
+    (staff share one entry). Only safe-method 200 responses are stored,
+    and only when ``storable``.
+
+    With ``coalesce``, identical requests that miss at the same time, in
+    any thread or worker, wait for one of them to compute the response
+    (a lock in the shared cache) instead of all computing it. With
+    ``stale``, they are served the last good value instead of waiting,
+    and the first of them refreshes it in a background thread.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in SAFE_METHODS or not getattr(settings, 'CACHE_RESPONSES', True):
+                return view_method(self, request, *args, **kwargs)
+            user = request.user
+            audience = 'staff' if user.is_staff else f'user-{user.pk}'
+            flight = ResponseFlight(namespace, 'response', request.get_full_path(), audience)
+            return flight.respond(partial(view_method, self, request, *args, **kwargs), timeout, coalesce, stale)
+        return wrapper
+    return decorator
+
+
+@traced('signal cache invalidation')
+def _model_changed(sender, namespaces, using=DEFAULT_DB_ALIAS, update_fields=None, **kwargs):
+    # Logins only touch last_login, which nothing cached shows
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate(*namespaces, using=using)
+
+
+def connect_invalidation():
+    """Bump each namespace when one of its models is saved or deleted"""
+    from django.apps import apps
+    from django.db.models.signals import post_delete, post_migrate, post_save
+
+    models = {}
+    for namespace, labels in getattr(settings, 'CACHE_NAMESPACES', {}).items():
+        for label in labels:
+            models.setdefault(apps.get_model(label), []).append(namespace)
+    for model, namespaces in models.items():
+        handler = partial(_model_changed, namespaces=tuple(namespaces))
+        uid = f'cache-invalidation:{model._meta.label_lower}'
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    # A migrated or flushed database (including a fresh test database)
+    # must not be served entries cached from the old one
+    post_migrate.connect(bump_all, dispatch_uid='cache-invalidation:migrate')
@@ -0,0 +1,102 @@
+"""
+High-volume mode for admin changelists.
+
+With ``ADMIN_HIGH_VOLUME`` enabled (the default), admins using
+``HighVolumeAdminMixin``:
+
+* serve the choices of free-text ``list_filter`` fields from the cache
+  instead of running a ``SELECT DISTINCT`` per page load,
+* count results with ``ApproximateCountPaginator`` (a catalog estimate for
+  the unfiltered table, a capped ``COUNT`` otherwise),
+* skip the second, unfiltered ``COUNT(*)`` Django runs for the
+  "N results (M total)" line.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+
+from .caching import get_cache, make_key
+
+
+def high_volume_enabled():
+    return getattr(settings, 'ADMIN_HIGH_VOLUME', True)
+
+
+class CachedAllValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """``AllValuesFieldListFilter`` whose distinct values are cached for a while"""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # Invalidated with the app's cache namespace (see caching.py)
+        key = make_key(model._meta.app_label, 'admin-filter-choices', model._meta.label_lower, field_path)
+        timeout = getattr(settings, 'ADMIN_FILTER_CACHE_TIMEOUT', 600)
+        distinct_values = self.lookup_choices
+        self.lookup_choices = get_cache().get_or_set(key, lambda: list(distinct_values), timeout)
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded ``COUNT(*)``.
+
+    An unfiltered table is estimated from database statistics (PostgreSQL)
+    or the primary key range (other backends); a filtered queryset is
+    counted up to ``count_limit`` rows.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, models.QuerySet):
+            return super().count
+        if not queryset.query.where:
+            estimate = self.estimate_table_rows(queryset)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        return queryset.order_by()[:self.count_limit].count()
+
+    def estimate_table_rows(self, queryset):
+        model = queryset.model
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                    [model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            return row[0] if row and row[0] > 0 else None
+        bounds = model._default_manager.using(queryset.db).aggregate(
+            low=models.Min('pk'), high=models.Max('pk')
+        )
+        if bounds['low'] is None:
+            return 0
+        return bounds['high'] - bounds['low'] + 1
+
+
+class HighVolumeAdminMixin:
+    """Apply the high-volume changelist behaviour to a ModelAdmin"""
+
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if not high_volume_enabled():
+            return list_filter
+        wrapped = []
+        for item in list_filter:
+            if isinstance(item, str) and '__' not in item:
+                field = self.model._meta.get_field(item)
+                if isinstance(field, (models.CharField, models.TextField)) and not field.choices:
+                    item = (item, CachedAllValuesFieldListFilter)
+            wrapped.append(item)
+        return wrapped
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if high_volume_enabled():
+            return ApproximateCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    @property
+    def show_full_result_count(self):
+        return not high_volume_enabled()
@@ -0,0 +1,11 @@
+"""
+Database backends used by ``school_management.database``.
+
+Both subclass Django's own backends and only change how connections are
+opened and closed:
+
+* ``sqlite3``: applies PRAGMAs on connect and can start write
+  transactions with ``BEGIN IMMEDIATE``,
+* ``postgresql``: keeps closed connections in a per-process pool and
+  health-checks them on checkout.
+"""
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+
+class ConnectionPool:
+    """
+    Per-process pool of idle psycopg connections.
+
+    Connections handed back by ``DatabaseWrapper.close()`` are kept instead
+    of being closed, and reused by the next ``connect()`` in any thread.
+    On checkout a connection is dropped if it is closed, older than
+    ``max_lifetime``, or has been idle longer than ``check_interval`` and
+    fails a ``SELECT 1``.
+    """
+
+    def __init__(self, max_size=10, check_interval=30, max_lifetime=3600):
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self.max_lifetime = max_lifetime
+        self.pid = os.getpid()
+        self._idle = []
+        self._created = {}
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0}
+
+    def get(self, connect):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                connection = connect()
+                self._created[id(connection)] = now
+                self.stats['created'] += 1
+                return connection
+            connection, returned_at = entry
+            if self._expired(connection, now) or (
+                now - returned_at > self.check_interval and not self._alive(connection)
+            ):
+                self._discard(connection)
+                continue
+            self.stats['reused'] += 1
+            return connection
+
+    def put(self, connection):
+        if connection.closed or self._expired(connection, time.monotonic()):
+            self._discard(connection)
+            return
+        try:
+            # Never hand out a connection with an open transaction
+            connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._discard(connection)
+
+    def _expired(self, connection, now):
+        return connection.closed or now - self._created.get(id(connection), now) > self.max_lifetime
+
+    def _alive(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        self._created.pop(id(connection), None)
+        self.stats['discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """Return this process's pool for ``alias`` (pools are never shared across a fork)"""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            # Inherited connections belong to the parent; leave them alone
+            pool = _pools[alias] = ConnectionPool(**options)
+        return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend with a connection pool configured by ``OPTIONS['pool']``
+    (``max_size``, ``check_interval``, ``max_lifetime``). Without that key it
+    behaves exactly like Django's backend.
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        return None if options is None else get_pool(self.alias, options)
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.get(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.put(self.connection)
@@ -0,0 +1,33 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend with connection tuning taken from ``OPTIONS``:
+
+    ``pragmas``
+        ``{name: value}`` executed on every new connection (journal_mode,
+        synchronous, busy_timeout, cache_size, ...).
+    ``transaction_mode``
+        ``'IMMEDIATE'`` takes the write lock when ``atomic()`` starts. A
+        deferred transaction that reads and then writes cannot wait for
+        the lock and fails at once with "database is locked"; an
+        immediate one waits up to ``busy_timeout`` instead.
+    """
+
+    def get_connection_params(self):
+        # Everything else in OPTIONS is passed on to sqlite3.connect()
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
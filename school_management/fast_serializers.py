@@ -0,0 +1,230 @@
+"""
+Fast read-only serialization for list and export responses.
+
+``compile_serializer`` turns a ``ModelSerializer`` class into a flat
+function that maps one ``values_list()`` tuple to the same dict
+``serializer.data`` would produce, skipping DRF's per-field
+``get_attribute``/``to_representation`` dispatch for every row.
+
+Only plain model columns, forward foreign keys (as primary keys), nested
+model serializers over one-to-one/foreign-key relations, and read-only
+model properties are supported. Anything else raises
+``ImproperlyConfigured`` at compile time so the view keeps its normal
+serializer.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .tracing import span
+
+
+# to_representation implementations that can be replaced by a builtin
+FAST_CONVERTERS = {
+    drf_fields.CharField.to_representation: str,
+    drf_fields.IntegerField.to_representation: int,
+    drf_fields.BooleanField.to_representation: bool,
+    drf_fields.ReadOnlyField.to_representation: None,
+}
+
+
+class CompiledSerializer:
+    """A serializer class compiled to a single row -> dict function"""
+
+    def __init__(self, serializer_class, columns, row_to_dict, source):
+        self.serializer_class = serializer_class
+        self.columns = columns
+        self.row_to_dict = row_to_dict
+        self.source = source
+
+    def rows(self, queryset):
+        """Return the ``values_list`` queryset the compiled function expects"""
+        return queryset.values_list(*self.columns)
+
+    def to_dicts(self, rows):
+        row_to_dict = self.row_to_dict
+        # Resolved once per response instead of once per datetime value
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [row_to_dict(row, tz) for row in rows]
+
+    def serialize(self, queryset):
+        return self.to_dicts(self.rows(queryset))
+
+
+def _iso_datetime_converter(field):
+    """DateTimeField.to_representation for aware values in the active timezone"""
+    slow = field.to_representation
+
+    def convert(value, tz):
+        if tz is None or value.tzinfo is None:
+            return slow(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+class _Compiler:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.columns = []
+        self.namespace = {'_new': object.__new__}
+        self.lines = []
+        self.counter = 0
+
+    def name(self, prefix, value):
+        self.counter += 1
+        key = f'{prefix}{self.counter}'
+        self.namespace[key] = value
+        return key
+
+    def column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return f'row[{self.columns.index(lookup)}]'
+
+    def convert(self, field, expression):
+        """Return an expression applying ``field.to_representation`` to ``expression``"""
+        method = type(field).to_representation
+        if method in FAST_CONVERTERS:
+            converter = FAST_CONVERTERS[method]
+            if converter is None:
+                return expression
+            call = f'{converter.__name__}({expression})'
+        elif (
+            method is drf_fields.DateTimeField.to_representation
+            and not hasattr(field, 'timezone')
+            and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601
+        ):
+            call = f'{self.name("_dt", _iso_datetime_converter(field))}({expression}, tz)'
+        elif method is drf_fields.ChoiceField.to_representation:
+            call = f'{self.name("_choices", field.choice_strings_to_values)}.get(str({expression}), {expression})'
+        elif isinstance(field, relations.PrimaryKeyRelatedField):
+            if field.pk_field is None:
+                return expression
+            call = f'{self.name("_f", field.pk_field.to_representation)}({expression})'
+        else:
+            call = f'{self.name("_f", field.to_representation)}({expression})'
+        return f'(None if {expression} is None else {call})'
+
+    def compile_fields(self, serializer, model, prefix):
+        """Return the source of a dict literal building ``serializer``'s output from ``row``"""
+        items = []
+        property_fields = []
+        for field in serializer._readable_fields:
+            if field.source == '*' or '.' in field.source:
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name}: unsupported source')
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                model_field = None
+
+            if isinstance(field, serializers.ModelSerializer):
+                items.append((field.field_name, self.compile_nested(field, model_field, prefix)))
+            elif model_field is not None and model_field.concrete and not model_field.many_to_many:
+                if model_field.is_relation and not isinstance(field, relations.PrimaryKeyRelatedField):
+                    raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name}: unsupported relation')
+                expression = self.column(prefix + model_field.attname)
+                items.append((field.field_name, self.convert(field, expression)))
+            elif isinstance(getattr(model, field.source, None), property):
+                property_fields.append(field)
+                items.append((field.field_name, None))
+            else:
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name}: unsupported field')
+
+        if property_fields:
+            proxy = self.proxy_expression(serializer, model, prefix)
+            for field in property_fields:
+                getter = self.name('_p', getattr(model, field.source).fget)
+                expression = self.convert(field, f'{getter}({proxy})')
+                items[[name for name, _ in items].index(field.field_name)] = (field.field_name, expression)
+
+        return '{' + ', '.join(f'{name!r}: {expression}' for name, expression in items) + '}'
+
+    def proxy_expression(self, serializer, model, prefix):
+        """Build a per-row stand-in whose attributes are the model columns a property reads"""
+        meta = getattr(type(serializer), 'Meta', None)
+        sources = getattr(meta, 'property_sources', None)
+        if sources:
+            attnames = sorted({model._meta.get_field(name).attname for names in sources.values() for name in names})
+        else:
+            attnames = [f.attname for f in model._meta.concrete_fields]
+        proxy_class = type(f'{model.__name__}Row', (), {
+            name: value for klass in reversed(model.__mro__) for name, value in vars(klass).items()
+            if isinstance(value, property)
+        })
+        proxy_class._meta = model._meta
+        variable = f'p{self.counter}'
+        self.counter += 1
+        state = ', '.join(f'{name!r}: {self.column(prefix + name)}' for name in attnames)
+        self.lines.append(f'{variable} = _new({self.name("_c", proxy_class)})')
+        self.lines.append(f'{variable}.__dict__ = {{{state}}}')
+        return variable
+
+    def compile_nested(self, field, model_field, prefix):
+        if model_field is None or not model_field.is_relation or model_field.many_to_many or model_field.one_to_many:
+            raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name}: unsupported nested field')
+        related_model = model_field.related_model
+        nested_prefix = f'{prefix}{model_field.name}__'
+        pk = self.column(nested_prefix + related_model._meta.pk.attname)
+        body = self.compile_fields(field, related_model, nested_prefix)
+        # DRF renders a null foreign key and a missing reverse one-to-one as None
+        return f'(None if {pk} is None else {body})'
+
+    def compile(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        body = self.compile_fields(serializer, model, '')
+        lines = ['def row_to_dict(row, tz=None):', *(f'    {line}' for line in self.lines), f'    return {body}']
+        source = '\n'.join(lines)
+        exec(compile(source, f'<fast serializer {self.serializer_class.__name__}>', 'exec'), self.namespace)
+        return CompiledSerializer(self.serializer_class, tuple(self.columns), self.namespace['row_to_dict'], source)
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """Compile (once per class) a ModelSerializer for read-only list output"""
+    return _Compiler(serializer_class).compile()
+
+
+class FastSerializationMixin:
+    """
+    Opt-in fast path for ViewSet list-style responses.
+
+    Actions named in ``fast_serializer_actions`` serialize straight from
+    ``values_list()`` rows with the compiled serializer. Set
+    ``FAST_SERIALIZATION = False`` in settings to fall back to DRF.
+    """
+    fast_serializer_actions = ('list',)
+
+    def fast_response(self, queryset, serializer_class=None, paginate=False):
+        """Return a Response for ``queryset``, paginated like ``list`` when asked"""
+        serializer_class = serializer_class or self.get_serializer_class()
+        if getattr(settings, 'FAST_SERIALIZATION', True):
+            compiled = compile_serializer(serializer_class)
+            queryset = compiled.rows(queryset)
+            serialize = compiled.to_dicts
+        else:
+            context = self.get_serializer_context()
+            serialize = lambda rows: serializer_class(rows, many=True, context=context).data
+
+        if paginate:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                with span('serialize', rows=len(page)):
+                    data = serialize(page)
+                return self.get_paginated_response(data)
+        with span('serialize'):
+            data = serialize(queryset)
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        if self.action not in self.fast_serializer_actions:
+            return super().list(request, *args, **kwargs)
+        return self.fast_response(self.filter_queryset(self.get_queryset()), paginate=True)
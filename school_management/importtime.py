@@ -0,0 +1,155 @@
+"""
+Cold-start import profiling.
+
+Every ``manage.py`` command and every gunicorn worker starts in a fresh
+interpreter and pays for its imports. ``measure()`` starts one with
+``python -X importtime`` for a target:
+
+``setup``  ``django.setup()``: settings, app registry, models and
+           ``ready()`` hooks, what every management command pays
+``wsgi``   the WSGI application, which adds the middleware: a worker boot
+``urls``   the URLconf too (views, serializers, admin): a worker's
+           first request
+
+and parses the import tree. ``manage.py import_profile`` groups it per
+app (``breakdown``); ``ColdStartTest`` holds startup to a time budget and
+checks that the modules in ``DEFERRED_MODULES`` stay out of it.
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'wsgi': 'import school_management.wsgi',
+    'urls': 'import school_management.wsgi; from django.urls import get_resolver; get_resolver().url_patterns',
+}
+
+# Targets that must not load ``DEFERRED_MODULES``
+STARTUP_TARGETS = ('setup', 'wsgi')
+
+# Loaded on first use, never while a command or worker starts: DRF's
+# serializers and views with the optional PostgreSQL and YAML support they
+# pull in, and the apps' admin modules
+DEFERRED_MODULES = (
+    'rest_framework.serializers',
+    'rest_framework.views',
+    'django.contrib.postgres',
+    'psycopg2',
+    'yaml',
+    'admissions.admin',
+    'contact.admin',
+    'users.admin',
+    'school_management.changelist',
+)
+
+
+class Import(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    parent: str
+
+
+class Run(NamedTuple):
+    target: str
+    wall_ms: float
+    imports: list
+    loaded: list
+
+
+def parse(output):
+    """``Import`` rows from ``-X importtime`` output (children come before their parent)"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append([name.strip(), int(self_us), int(cumulative_us), depth, None])
+    pending = []
+    # A row's parent is the next row that is one level up
+    for row in rows:
+        while pending and pending[-1][3] > row[3]:
+            pending.pop()[4] = row[0]
+        pending.append(row)
+    return [Import(*row) for row in rows]
+
+
+def measure(target='setup', repeat=1, env=None):
+    """Run ``target`` in ``repeat`` fresh interpreters; return the fastest ``Run``"""
+    code = f"{TARGETS[target]}; import sys; print('\\n'.join(sorted(sys.modules)))"
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'school_management.settings', **(env or {})}
+    fastest = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=settings.BASE_DIR,
+                                   env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode:
+            raise RuntimeError(f'{target} failed:\n{completed.stderr[-2000:]}')
+        if fastest is None or wall_ms < fastest.wall_ms:
+            fastest = Run(target, wall_ms, parse(completed.stderr), completed.stdout.split())
+    return fastest
+
+
+def first_party_apps():
+    """Top-level packages of the project's own apps"""
+    base = str(settings.BASE_DIR)
+    apps = set()
+    for app in settings.INSTALLED_APPS:
+        top = app.split('.')[0]
+        if os.path.isdir(os.path.join(base, top)):
+            apps.add(top)
+    return apps
+
+
+def group_name(module, first_party=()):
+    """The app (or library) a module belongs to: ``admissions``, ``django.contrib.admin``, ``rest_framework``, ..."""
+    parts = module.split('.')
+    if parts[0] in first_party:
+        return parts[0]
+    if parts[0] == 'django' and len(parts) > 2 and parts[1] == 'contrib':
+        return '.'.join(parts[:3])
+    if parts[0] in sys.stdlib_module_names:
+        return 'stdlib'
+    return parts[0].lstrip('_') or module
+
+
+def breakdown(imports, first_party=None):
+    """
+    Per group: modules, ``own`` time (the group's modules themselves) and
+    ``total`` time (the group's outermost imports including everything
+    they imported first), in microseconds, worst total first.
+    """
+    first_party = first_party_apps() if first_party is None else first_party
+    groups = {}
+    by_name = {row.name: row for row in imports}
+    for row in imports:
+        name = group_name(row.name, first_party)
+        group = groups.setdefault(name, {'modules': 0, 'own': 0, 'total': 0})
+        group['modules'] += 1
+        group['own'] += row.self_us
+        parent = by_name.get(row.parent)
+        # Outermost import of this group: its parent belongs to another one
+        while parent is not None and group_name(parent.name, first_party) != name:
+            parent = by_name.get(parent.parent)
+        if parent is None:
+            group['total'] += row.cumulative_us
+    return sorted(groups.items(), key=lambda item: item[1]['total'], reverse=True)
+
+
+def import_chain(imports, name):
+    """``name`` and the modules that imported it, innermost first"""
+    by_name = {row.name: row for row in imports}
+    chain = []
+    while name is not None and name in by_name and name not in chain:
+        chain.append(name)
+        name = by_name[name].parent
+    return chain
@@ -0,0 +1,286 @@
+"""
+Structured JSON-lines logging that never blocks a request on disk I/O.
+
+``AsyncJSONLHandler`` puts each record on an in-memory queue; that is
+all the logging thread does. A listener thread per process takes
+whatever records are waiting (up to ``batch_size``), formats them as
+JSON objects (``JSONFormatter``) and appends them with one ``write()``.
+If the queue is full, records are dropped and counted instead of waiting.
+
+Files rotate when they reach ``max_bytes`` or when the ``when`` period
+(``'H'``, ``'D'`` or ``'midnight'``) changes, to ``<name>.<timestamp>``,
+gzip-compressed with ``compress``, keeping ``backup_count`` of them.
+Workers share a file: rotation happens under a lock file, and a worker
+whose file was rotated by another reopens it before its next write.
+
+``AccessLogMiddleware`` logs one record per request to
+``school_management.access`` (``logs/access.jsonl``) with the route,
+status, latency, user, query count and trace id.
+"""
+import fcntl
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.utils.functional import SimpleLazyObject, empty
+
+from .tracing import current_trace_id
+
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+PERIODS = {'H': 3600, 'D': 86400, 'MIDNIGHT': 86400}
+
+access_logger = logging.getLogger('school_management.access')
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, extras, exception"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RotatingJSONLWriter:
+    """Appends batches of lines to ``filename``, rotating by size and period"""
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, when='midnight', backup_count=14, compress=True):
+        self.filename = str(filename)
+        self.max_bytes = max_bytes
+        self.period = PERIODS[when.upper()] if when else None
+        self.backup_count = backup_count
+        self.compress = compress
+        self.stream = None
+
+    def _current_period(self):
+        return int(time.time() // self.period) if self.period else None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+        self.stream = open(self.filename, 'a', encoding='utf-8')
+        self.inode = os.fstat(self.stream.fileno()).st_ino
+        self.opened_period = self._current_period()
+
+    def _moved(self):
+        try:
+            return os.stat(self.filename).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def write(self, lines):
+        if self.stream is not None and not self._moved() and self._current_period() != self.opened_period:
+            self.rotate()
+        if self.stream is None or self._moved():
+            self.close()
+            self._open()
+        self.stream.write(''.join(f'{line}\n' for line in lines))
+        self.stream.flush()
+        if self.stream.tell() >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        with open(f'{self.filename}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another worker may have rotated it already
+            if not self._moved():
+                self.close()
+                target = f"{self.filename}.{time.strftime('%Y%m%d-%H%M%S')}"
+                suffix = 0
+                while glob.glob(f'{target}*'):
+                    suffix += 1
+                    target = f"{self.filename}.{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+                os.rename(self.filename, target)
+                if self.compress:
+                    with open(target, 'rb') as source, gzip.open(f'{target}.gz', 'wb') as destination:
+                        shutil.copyfileobj(source, destination)
+                    os.remove(target)
+                self._remove_old()
+        self.close()
+
+    def _remove_old(self):
+        backups = sorted(
+            (path for path in glob.glob(f'{self.filename}.*') if not path.endswith('.lock')),
+            key=os.path.getmtime,
+        )
+        for path in backups[:max(len(backups) - self.backup_count, 0)]:
+            os.remove(path)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+class AsyncJSONLHandler(logging.handlers.QueueHandler):
+    """
+    Logging handler for ``LOGGING``: the calling thread only enqueues; a
+    per-process listener thread formats and writes (started on first use,
+    so it is never inherited across a fork).
+    """
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, when='midnight', backup_count=14, compress=True,
+                 batch_size=256, flush_interval=0.5, queue_size=10000):
+        super().__init__(queue.SimpleQueue())
+        self.setFormatter(JSONFormatter())
+        self.writer_options = dict(filename=filename, max_bytes=max_bytes, when=when,
+                                   backup_count=backup_count, compress=compress)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._pid = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(self.queue_size)
+                self._thread = threading.Thread(
+                    target=self._listen, args=(self.queue, RotatingJSONLWriter(**self.writer_options)),
+                    name='jsonl-log-writer', daemon=True,
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Freeze what may change or cannot cross threads; the listener
+        # does the JSON formatting
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _listen(self, lines, writer):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [lines.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(lines.get_nowait())
+                except queue.Empty:
+                    break
+            taken = len(batch)
+            if None in batch:
+                stopping = True
+            batch = [self.format(record) for record in batch if record is not None]
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                batch.append(json.dumps({'level': 'WARNING', 'logger': __name__,
+                                         'message': f'Dropped {dropped} log record(s): queue full'}))
+            if batch:
+                try:
+                    writer.write(batch)
+                except OSError:
+                    self.dropped += len(batch)
+            for _ in range(taken):
+                lines.task_done()
+        writer.close()
+
+    def flush(self, timeout=5):
+        """Wait until everything queued so far is written (tests, shutdown)"""
+        if self._pid != os.getpid():
+            return
+        with self.queue.all_tasks_done:
+            self.queue.all_tasks_done.wait_for(lambda: not self.queue.unfinished_tasks, timeout)
+
+    def close(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            try:
+                self.queue.put(None, timeout=1)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=5)
+            self._pid = None
+        super().close()
+
+
+def read_jsonl(filename):
+    """Yield the objects in ``filename`` and its rotated files, oldest first"""
+    filename = str(filename)
+    backups = sorted(
+        (path for path in glob.glob(f'{glob.escape(filename)}.*') if not path.endswith('.lock')),
+        key=os.path.getmtime,
+    )
+    for path in [*backups, filename]:
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as lines:
+                for line in lines:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def request_user_id(request):
+    """The user id, without loading a user nobody has looked at yet"""
+    user = getattr(request, 'user', None)
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return None
+    return user.pk if user.is_authenticated else None
+
+
+class AccessLogMiddleware:
+    """Log one structured access record per request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        if access_logger.isEnabledFor(logging.INFO):
+            match = getattr(request, 'resolver_match', None)
+            timings = getattr(request, 'timings', None)
+            access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'path': request.path,
+                'route': match.view_name if match is not None else None,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                'bytes': None if response.streaming else len(response.content),
+                'user_id': request_user_id(request),
+                'db_queries': timings.db_queries if timings is not None else None,
+                'remote_addr': request.META.get('REMOTE_ADDR'),
+                'trace_id': current_trace_id(),
+                'peak_alloc': getattr(request, 'memory_peak', None),
+            })
+        return response
@@ -0,0 +1,375 @@
+"""
+End-to-end HTTP load tests, driven by an asyncio load generator.
+
+``manage.py bench_http`` boots the app under gunicorn (or uvicorn) on
+localhost against a freshly migrated and seeded database, then runs one
+or more workload profiles against it:
+
+``mixed``        steady traffic: public pages, admission and contact
+                 forms, staff lists, searches and statistics
+``results-day``  parents reading news and sending messages, staff
+                 working through the inbox; concurrency spikes to 4x
+``open-day``     admissions pages and form submissions, with a 3x spike
+
+Each virtual user is a closed loop on its own keep-alive connection:
+pick a target by weight, send it, wait for the full response, repeat.
+Profiles scale the number of active users over time with ``stages``.
+Everything random comes from ``Random(seed:user)``, so a run sends the
+same request sequence each time (the timing decides how far it gets).
+
+Results (throughput and p50/p95/p99 per endpoint) are JSON, and
+``compare`` reports what got slower or lost throughput against a stored
+baseline beyond a threshold.
+"""
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Callable, NamedTuple, Optional, Union
+
+from .benchmark import percentile
+from .synthetic import CLASS_STAGES, FEMALE_NAMES, KUMASI_SUBURBS, MALE_NAMES, MESSAGES, PHONE_PREFIXES, SURNAMES
+
+
+class Target(NamedTuple):
+    """One kind of request; ``path`` and ``body`` may be functions of the user's ``Random``"""
+    name: str
+    method: str
+    path: Union[str, Callable]
+    weight: float
+    auth: bool = False
+    body: Optional[Callable] = None
+
+
+class Profile(NamedTuple):
+    name: str
+    description: str
+    targets: tuple
+    # (share of the duration, multiple of the base number of users)
+    stages: tuple = ((1.0, 1),)
+
+
+def _phone(rng):
+    return f'{rng.choice(PHONE_PREFIXES)}{rng.randrange(10_000_000):07d}'
+
+
+def admission_form(rng):
+    """A valid public admission application"""
+    stage, age, _ = rng.choice(CLASS_STAGES)
+    surname = rng.choice(SURNAMES)
+    return {
+        'surname': surname,
+        'first_name': rng.choice(MALE_NAMES + FEMALE_NAMES),
+        'date_of_birth': (date.today() - timedelta(days=age * 365 + rng.randrange(300))).isoformat(),
+        'age': age,
+        'gender': rng.choice(('male', 'female')),
+        'place_of_birth': 'Kumasi',
+        'region_of_birth': 'Ashanti',
+        'home_town': 'Kumasi',
+        'region_of_home_town': 'Ashanti',
+        'class_before_admission': stage,
+        'father_name': f'{rng.choice(MALE_NAMES)} {surname.title()}',
+        'father_contact': _phone(rng),
+        'postal_address': f'P.O. Box {rng.randrange(1, 9999)}, Kumasi',
+        'place_of_residence': rng.choice(KUMASI_SUBURBS),
+    }
+
+
+def contact_form(rng):
+    first_name = rng.choice(MALE_NAMES + FEMALE_NAMES)
+    return {
+        'name': f'{first_name} {rng.choice(SURNAMES).title()}',
+        'email': f'{first_name.lower()}{rng.randrange(100_000)}@gmail.com',
+        'message': rng.choice(MESSAGES).format(stage=rng.choice(CLASS_STAGES)[0], town=rng.choice(KUMASI_SUBURBS)),
+    }
+
+
+def page(filename, weight):
+    """A page served by ``serve_html`` (``index.html`` by ``homepage``, at ``/``)"""
+    path = '/' if filename == 'index.html' else f'/{filename}'
+    return Target(f'GET {path}', 'GET', path, weight)
+
+
+SUBMIT_ADMISSION = ('POST /api/admissions/', 'POST', '/api/admissions/')
+SUBMIT_CONTACT = ('POST /api/contact/', 'POST', '/api/contact/')
+
+
+def admissions_list(weight):
+    statuses = ('pending', 'pending', 'reviewed', 'accepted')
+    return Target('GET /api/admissions/?status=', 'GET', lambda rng: f'/api/admissions/?status={rng.choice(statuses)}',
+                  weight, auth=True)
+
+
+def admissions_search(weight):
+    return Target('GET /api/admissions/?search=', 'GET',
+                  lambda rng: f'/api/admissions/?search={rng.choice(SURNAMES).lower()}', weight, auth=True)
+
+
+def contact_list(weight):
+    return Target('GET /api/contact/?status=new', 'GET', '/api/contact/?status=new', weight, auth=True)
+
+
+def statistics(app, weight):
+    return Target(f'GET /api/{app}/statistics/', 'GET', f'/api/{app}/statistics/', weight, auth=True)
+
+
+PROFILES = {profile.name: profile for profile in (
+    Profile('mixed', 'Steady public and staff traffic', (
+        page('index.html', 15), page('admissions.html', 10), page('contact.html', 5), page('about.html', 5),
+        page('academics.html', 5), page('gallery.html', 5), page('news.html', 5),
+        Target(*SUBMIT_CONTACT, 5, body=contact_form), Target(*SUBMIT_ADMISSION, 3, body=admission_form),
+        admissions_list(8), admissions_search(6), contact_list(6),
+        statistics('admissions', 3), statistics('contact', 3),
+    )),
+    Profile('results-day', 'Results are out: news and contact traffic spikes to 4x', (
+        page('news.html', 25), page('index.html', 20), page('academics.html', 10), page('contact.html', 10),
+        Target(*SUBMIT_CONTACT, 15, body=contact_form),
+        contact_list(8), statistics('contact', 5), statistics('admissions', 4), admissions_search(3),
+    ), stages=((0.2, 1), (0.5, 4), (0.3, 1))),
+    Profile('open-day', 'Admissions open day: page views and applications spike to 3x', (
+        page('index.html', 15), page('admissions.html', 20), page('about.html', 8), page('gallery.html', 12),
+        page('contact.html', 5), Target(*SUBMIT_ADMISSION, 15, body=admission_form),
+        Target(*SUBMIT_CONTACT, 6, body=contact_form),
+        admissions_list(6), admissions_search(6), statistics('admissions', 4),
+    ), stages=((0.25, 1), (0.25, 3), (0.5, 2))),
+)}
+
+
+class Connection:
+    """A minimal HTTP/1.1 client connection, reopened when the server closes it"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        """Return ``(status, headers, body)``; a request on a stale kept-alive connection is retried once"""
+        reused = self.writer is not None
+        try:
+            return await self._request(method, path, headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+            return await self._request(method, path, headers, body)
+
+    async def _request(self, method, path, headers, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'User-Agent: school-loadtest']
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        if body is not None:
+            lines.append(f'Content-Length: {len(body)}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by the server')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        if 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = await self._read_chunked()
+        else:
+            content = await self.reader.read()
+            response_headers['connection'] = 'close'
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, response_headers, content
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+
+class Recorder:
+    """Latencies (seconds), errors and status codes per target name"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = Counter()
+        self.statuses = {}
+
+    def add(self, name, latency, status):
+        self.latencies.setdefault(name, []).append(latency)
+        self.statuses.setdefault(name, Counter())[str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[name] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for name, samples in sorted(self.latencies.items()):
+            endpoints[name] = _summarize(samples, self.errors[name], elapsed)
+            endpoints[name]['statuses'] = dict(self.statuses[name])
+        every = [latency for samples in self.latencies.values() for latency in samples]
+        return {
+            'duration_s': round(elapsed, 3),
+            'total': _summarize(every, sum(self.errors.values()), elapsed),
+            'endpoints': endpoints,
+        }
+
+
+def _summarize(samples, errors, elapsed):
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'max_ms': round(max(samples, default=0) * 1000, 2),
+    }
+
+
+async def _user(index, profile, connection, token, seed, clock, recorder):
+    rng = random.Random(f'{seed}:{profile.name}:{index}')
+    weights = [target.weight for target in profile.targets]
+    while not clock.done():
+        if index >= clock.active_users():
+            await asyncio.sleep(0.02)
+            continue
+        target = rng.choices(profile.targets, weights)[0]
+        path = target.path(rng) if callable(target.path) else target.path
+        headers = {'Accept': 'application/json' if path.startswith('/api/') else 'text/html'}
+        if target.auth:
+            headers['Authorization'] = f'Bearer {token}'
+        body = None
+        if target.body is not None:
+            body = json.dumps(target.body(rng)).encode()
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            status, _, _ = await connection.request(target.method, path, headers, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            status = type(exc).__name__
+        recorder.add(target.name, time.perf_counter() - started, status)
+    await connection.close()
+
+
+class Clock:
+    """How many users are active at each point of a profile's stages"""
+
+    def __init__(self, stages, duration, users):
+        self.started = time.perf_counter()
+        self.duration = duration
+        self.users = users
+        total = sum(share for share, _ in stages)
+        self.stages = []
+        end = 0.0
+        for share, multiple in stages:
+            end += share / total * duration
+            self.stages.append((end, max(1, round(users * multiple))))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def done(self):
+        return self.elapsed() >= self.duration
+
+    def active_users(self):
+        elapsed = self.elapsed()
+        for end, users in self.stages:
+            if elapsed < end:
+                return users
+        return self.stages[-1][1]
+
+
+async def run_profile(profile, host, port, duration, users, token=None, seed=0):
+    """Run ``profile`` for ``duration`` seconds with ``users`` base users; return its summary"""
+    clock = Clock(profile.stages, duration, users)
+    recorder = Recorder()
+    peak = max(count for _, count in clock.stages)
+    await asyncio.gather(*(
+        _user(index, profile, Connection(host, port), token, seed, clock, recorder) for index in range(peak)
+    ))
+    summary = recorder.summary(clock.elapsed())
+    summary['description'] = profile.description
+    summary['peak_users'] = peak
+    return summary
+
+
+async def wait_until_ready(host, port, timeout=30.0, path='/'):
+    """Poll ``path`` until it answers (any status below 500); return False on timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        connection = Connection(host, port)
+        try:
+            status, _, _ = await connection.request('GET', path)
+            if status < 500:
+                return True
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            pass
+        finally:
+            await connection.close()
+        await asyncio.sleep(0.2)
+    return False
+
+
+async def fetch_token(host, port, username, password):
+    connection = Connection(host, port)
+    try:
+        body = json.dumps({'username': username, 'password': password}).encode()
+        status, _, content = await connection.request(
+            'POST', '/api/users/token/', {'Content-Type': 'application/json'}, body
+        )
+    finally:
+        await connection.close()
+    if status != 200:
+        raise ValueError(f'Token request failed with HTTP {status}: {content[:200]!r}')
+    return json.loads(content)['token']
+
+
+def compare(results, baseline, threshold=0.2, min_requests=20):
+    """
+    Regressions of ``results`` against ``baseline`` (both ``bench_http``
+    JSON): endpoints whose p95 grew, or whose throughput fell, by more than
+    ``threshold`` (a fraction). Endpoints with fewer than ``min_requests``
+    requests in either run are too noisy to compare.
+    """
+    regressions = []
+    for name, profile in results.get('profiles', {}).items():
+        before = baseline.get('profiles', {}).get(name)
+        if before is None:
+            continue
+        rows = [('total', profile['total'], before['total'])]
+        rows += [
+            (endpoint, summary, before['endpoints'][endpoint])
+            for endpoint, summary in profile['endpoints'].items() if endpoint in before['endpoints']
+        ]
+        for endpoint, now, then in rows:
+            if min(now['requests'], then['requests']) < min_requests:
+                continue
+            if then['p95_ms'] and now['p95_ms'] > then['p95_ms'] * (1 + threshold):
+                regressions.append((name, endpoint, 'p95_ms', then['p95_ms'], now['p95_ms']))
+            if then['rps'] and now['rps'] < then['rps'] * (1 - threshold):
+                regressions.append((name, endpoint, 'rps', then['rps'], now['rps']))
+    return regressions
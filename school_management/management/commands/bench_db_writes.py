@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.utils import ConnectionHandler
+
+from contact.models import ContactMessage
+from school_management.database import sqlite_settings
+
+
+ALIAS = 'bench_writes'
+
+
+def configure(settings_dict):
+    """Register ``settings_dict`` as the ALIAS connection in this process"""
+    connections.settings[ALIAS] = ConnectionHandler({'default': settings_dict}).settings['default']
+    if hasattr(connections._connections, ALIAS):
+        # Drop the wrapper built from the previous settings
+        del connections[ALIAS]
+
+
+def submit_forms(args):
+    """Worker: one transaction per submission, a duplicate check then an INSERT"""
+    settings_dict, worker, count = args
+    configure(settings_dict)
+    ok = failed = 0
+    messages = ContactMessage.objects.using(ALIAS)
+    for i in range(count):
+        email = f'visitor{worker}-{i}@example.com'
+        try:
+            with transaction.atomic(using=ALIAS):
+                if not messages.filter(email=email).exists():
+                    messages.create(name=f'Visitor {worker}', email=email, message='Admission enquiry')
+            ok += 1
+        except OperationalError:
+            failed += 1
+    connections[ALIAS].close()
+    return ok, failed
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent form-style writes on SQLite with the stock and the tuned connection settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200, help='Writes per worker')
+
+    def handle(self, *args, **options):
+        tuned = sqlite_settings('')
+        # Stock Django settings, but with a short lock wait so the run finishes
+        stock = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': '', 'OPTIONS': {'timeout': 1}}
+        context = multiprocessing.get_context('fork')
+        self.stdout.write(f"{options['workers']} processes x {options['writes']} writes\n")
+        with tempfile.TemporaryDirectory() as directory:
+            for label, settings_dict in [('stock', stock), ('tuned', tuned)]:
+                settings_dict = {**settings_dict, 'NAME': os.path.join(directory, f'{label}.sqlite3')}
+                configure(settings_dict)
+                with connections[ALIAS].schema_editor() as editor:
+                    editor.create_model(ContactMessage)
+                connections[ALIAS].close()
+
+                jobs = [(settings_dict, worker, options['writes']) for worker in range(options['workers'])]
+                start = time.perf_counter()
+                with context.Pool(options['workers']) as pool:
+                    results = pool.map(submit_forms, jobs)
+                elapsed = time.perf_counter() - start
+                ok = sum(result[0] for result in results)
+                failed = sum(result[1] for result in results)
+                total = ok + failed
+                self.stdout.write(
+                    f'{label:<6} {ok / elapsed:>8.0f} writes/s   failed {failed}/{total} '
+                    f'({failed / total:.1%})   {elapsed:.2f} s'
+                )
@@ -0,0 +1,173 @@
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from school_management.loadtest import PROFILES, compare, fetch_token, run_profile, wait_until_ready
+
+
+HOST = '127.0.0.1'
+STAFF_USERNAME, STAFF_PASSWORD = 'bench-staff', 'bench-staff-password'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port, workers):
+    if server == 'uvicorn':
+        return [sys.executable, '-m', 'uvicorn', 'school_management.asgi:application', '--host', HOST,
+                '--port', str(port), '--workers', str(workers), '--no-access-log', '--log-level', 'warning']
+    return [sys.executable, '-m', 'gunicorn', 'school_management.wsgi', '--bind', f'{HOST}:{port}',
+            '--workers', str(workers), '--log-level', 'warning']
+
+
+class Command(BaseCommand):
+    help = ('Boot the app under gunicorn/uvicorn against a seeded throwaway database and measure throughput '
+            'and p50/p95/p99 latency per endpoint for each workload profile')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', dest='profiles', action='append', choices=sorted(PROFILES),
+                            help='Workload profile to run (repeatable; default: all)')
+        parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+        parser.add_argument('--users', type=int, default=8, help='Concurrent virtual users before spikes')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds per profile')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the data and the request sequence')
+        parser.add_argument('--applications', type=int, default=5_000, help='Seeded admission applications')
+        parser.add_argument('--contacts', type=int, default=20_000, help='Seeded contact messages')
+        parser.add_argument('--output', default=str(settings.LOG_DIR / 'bench_http.json'),
+                            help='JSON file for the results')
+        parser.add_argument('--baseline', help='Results JSON to compare against')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the results to --baseline instead of comparing against it')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed p95 growth / throughput loss against the baseline (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        server = options['server']
+        if importlib.util.find_spec(server) is None:
+            raise CommandError(f'{server} is not installed')
+        if options['update_baseline'] and not options['baseline']:
+            raise CommandError('--update-baseline needs --baseline')
+        baseline = None
+        if options['baseline'] and not options['update_baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+        profiles = [PROFILES[name] for name in options['profiles'] or PROFILES]
+
+        with tempfile.TemporaryDirectory(prefix='bench_http-') as directory:
+            env = self.server_env(Path(directory))
+            self.prepare_database(env, options)
+            port = free_port()
+            process = subprocess.Popen(server_command(server, port, options['workers']), cwd=settings.BASE_DIR,
+                                       env=env)
+            try:
+                results = asyncio.run(self.run(port, profiles, options))
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+        results['meta'] = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'server': server,
+            'workers': options['workers'],
+            'users': options['users'],
+            'duration_s': options['duration'],
+            'seed': options['seed'],
+            'applications': options['applications'],
+            'contacts': options['contacts'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'cpus': os.cpu_count(),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        self.report(results)
+        self.stdout.write(f"Results written to {options['output']}")
+        if options['update_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Baseline {options['baseline']} updated")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            for profile, endpoint, metric, before, now in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f'{profile:<12} {endpoint:<32} {metric} {before} -> {now} ({now / before - 1:+.0%})'
+                ))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) beyond {options['threshold']:.0%} "
+                                   f"against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
+
+    def server_env(self, directory):
+        """Settings for the server and setup commands: everything it writes stays in ``directory``"""
+        return {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'school_management.settings',
+            'DATABASE_URL': f"sqlite:///{directory / 'db.sqlite3'}",
+            'DATABASE_REPLICA_URL': '',
+            'DEBUG': 'False',
+            'CACHE_LOCATION': str(directory / 'cache.sqlite3'),
+            'SESSION_CACHE_LOCATION': str(directory / 'sessions.sqlite3'),
+            'METRICS_DIR': str(directory / 'metrics'),
+            'LOG_DIR': str(directory / 'logs'),
+            'PROFILING_DIR': str(directory / 'profiles'),
+            'DJANGO_SUPERUSER_PASSWORD': STAFF_PASSWORD,
+        }
+
+    def prepare_database(self, env, options):
+        os.makedirs(env['LOG_DIR'], exist_ok=True)
+        manage = [sys.executable, str(settings.BASE_DIR / 'manage.py')]
+        for command in (
+            ['migrate', '--noinput', '-v0'],
+            ['generate_data', '--seed', str(options['seed']), '--users', '200',
+             '--applications', str(options['applications']), '--contacts', str(options['contacts'])],
+            ['createsuperuser', '--noinput', '--username', STAFF_USERNAME, '--email', 'bench@example.com'],
+        ):
+            completed = subprocess.run([*manage, *command], cwd=settings.BASE_DIR, env=env, capture_output=True,
+                                       text=True)
+            if completed.returncode:
+                raise CommandError(f"{command[0]} failed:\n{completed.stderr[-2000:]}")
+        self.stdout.write(f"Seeded {options['applications']} applications and {options['contacts']} messages")
+
+    async def run(self, port, profiles, options):
+        if not await wait_until_ready(HOST, port):
+            raise CommandError(f'{options["server"]} did not answer on {HOST}:{port}')
+        token = await fetch_token(HOST, port, STAFF_USERNAME, STAFF_PASSWORD)
+        results = {'profiles': {}}
+        for profile in profiles:
+            self.stdout.write(f'Running {profile.name} for {options["duration"]:g} s ...')
+            results['profiles'][profile.name] = await run_profile(
+                profile, HOST, port, options['duration'], options['users'], token, options['seed']
+            )
+        return results
+
+    def report(self, results):
+        for name, profile in results['profiles'].items():
+            self.stdout.write(f"\n{name}: {profile['description']} (up to {profile['peak_users']} users)")
+            self.stdout.write(f"{'endpoint':<32}{'requests':>9}{'errors':>8}{'rps':>9}"
+                              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+            for endpoint, summary in [*profile['endpoints'].items(), ('total', profile['total'])]:
+                self.stdout.write(
+                    f"{endpoint:<32}{summary['requests']:>9}{summary['errors']:>8}{summary['rps']:>9.1f}"
+                    f"{summary['p50_ms']:>9.1f}{summary['p95_ms']:>9.1f}{summary['p99_ms']:>9.1f}"
+                )
@@ -0,0 +1,75 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from admissions.models import AdmissionApplication
+from admissions.serializers import AdmissionApplicationSerializer, AdmissionApplicationListSerializer
+from contact.models import ContactMessage
+from contact.serializers import ContactMessageSerializer, ContactMessageListSerializer
+from users.models import UserProfile
+from users.serializers import UserSerializer
+from school_management.benchmark import benchmark_database, format_row, summarize, time_call
+from school_management.fast_serializers import compile_serializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF serializers against the compiled fast path for list/export responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def seed(self, rows, rng):
+        statuses = ['pending', 'reviewed', 'accepted', 'rejected']
+        AdmissionApplication.objects.bulk_create([
+            AdmissionApplication(
+                surname=f'SURNAME{i}', first_name='Ama', other_names='Yaw' if i % 3 else None,
+                date_of_birth=date(2012, 1, 1) + timedelta(days=rng.randrange(3000)), age=8,
+                gender=rng.choice(['male', 'female']), place_of_birth='Accra', region_of_birth='Greater Accra',
+                home_town='Kumasi', region_of_home_town='Ashanti', class_before_admission='Class 2',
+                father_contact='0241234567', postal_address='P.O. Box 1, Accra', place_of_residence='Accra',
+                status=rng.choice(statuses),
+            )
+            for i in range(rows)
+        ], batch_size=2000)
+        ContactMessage.objects.bulk_create([
+            ContactMessage(
+                name=f'Visitor {i}', email=f'visitor{i}@example.com', message='Enquiry about admissions. ' * 10,
+                ip_address='127.0.0.1', user_agent='Mozilla/5.0', status=rng.choice(['new', 'read', 'replied']),
+            )
+            for i in range(rows)
+        ], batch_size=2000)
+        users = User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com', first_name='Kofi', last_name='Mensah')
+            for i in range(rows)
+        ], batch_size=2000)
+        UserProfile.objects.bulk_create([UserProfile(user=user, role='parent') for user in users], batch_size=2000)
+
+    def handle(self, *args, **options):
+        cases = [
+            ('admissions export', AdmissionApplicationSerializer, AdmissionApplication.objects.all()),
+            ('admissions list', AdmissionApplicationListSerializer, AdmissionApplication.objects.all()),
+            ('contact export', ContactMessageSerializer, ContactMessage.objects.all()),
+            ('contact list', ContactMessageListSerializer, ContactMessage.objects.all()),
+            ('users list', UserSerializer, User.objects.select_related('profile')),
+        ]
+        renderer = JSONRenderer()
+        with benchmark_database():
+            self.seed(options['rows'], random.Random(options['seed']))
+            self.stdout.write(f"{options['rows']} rows per model, query + serialize + render\n")
+            for label, serializer_class, queryset in cases:
+                compiled = compile_serializer(serializer_class)
+                drf = summarize(time_call(
+                    lambda: renderer.render(serializer_class(queryset.all(), many=True).data),
+                    repeat=options['repeat']
+                ))
+                fast = summarize(time_call(
+                    lambda: renderer.render(compiled.serialize(queryset.all())),
+                    repeat=options['repeat']
+                ))
+                self.stdout.write(format_row(f'{label} [drf]', drf))
+                self.stdout.write(format_row(f'{label} [fast]', fast) + f"   {drf['p50_ms'] / fast['p50_ms']:.1f}x")
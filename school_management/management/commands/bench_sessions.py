@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from school_management.benchmark import benchmark_database, format_row, summarize, time_call
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-request cost of each session engine on a session-authenticated API call'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            User.objects.create_user(username='bench', password='bench-pass-123')
+            url = reverse('user-me')
+            self.stdout.write(f'GET {url} with session authentication, {options["repeat"]} requests\n')
+            for name, engine in settings.SESSION_ENGINES.items():
+                with override_settings(SESSION_ENGINE=engine):
+                    client = APIClient(HTTP_HOST='localhost')
+                    client.login(username='bench', password='bench-pass-123')
+                    assert client.get(url).status_code == 200, name
+                    with CaptureQueriesContext(connection) as queries:
+                        client.get(url)
+                    session_queries = sum('django_session' in q['sql'] for q in queries.captured_queries)
+                    summary = summarize(time_call(lambda: client.get(url), repeat=options['repeat']))
+                    self.stdout.write(format_row(name, summary) + f'   session queries {session_queries}')
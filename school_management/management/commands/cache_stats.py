@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from school_management.caching import flight_counters, namespace_version
+
+
+class Command(BaseCommand):
+    help = 'Show response cache hits, computations and duplicate computations avoided, per namespace'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        columns = ('hit', 'miss', 'computed', 'coalesced', 'stale', 'wait_timeout', 'avoided')
+        self.stdout.write(f"{'namespace':<12}{'version':>18}" + ''.join(f'{column:>13}' for column in columns)
+                          + f"{'hit ratio':>11}")
+        for namespace in settings.CACHE_NAMESPACES:
+            totals = flight_counters.totals(namespace)
+            lookups = totals['hit'] + totals['miss']
+            ratio = f"{totals['hit'] / lookups:.1%}" if lookups else '-'
+            self.stdout.write(
+                f'{namespace:<12}{namespace_version(namespace):>18}'
+                + ''.join(f'{totals[column]:>13}' for column in columns) + f'{ratio:>11}'
+            )
+            if options['reset']:
+                flight_counters.reset(namespace)
@@ -0,0 +1,57 @@
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from school_management.synthetic import DERIVED_TABLES, generate
+
+
+class Command(BaseCommand):
+    help = ('Generate seeded synthetic users, admission applications and contact messages for load tests '
+            '(bypasses signals; see school_management/synthetic.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5_000, help='Users, each with a profile')
+        parser.add_argument('--applications', type=int, default=300_000)
+        parser.add_argument('--contacts', type=int, default=2_000_000, help='Contact messages')
+        parser.add_argument('--seed', type=int, default=0, help='The same seed and --end give the same rows')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day of generated dates (default: today)')
+        parser.add_argument('--years', type=float, default=3, help='Years of history before --end')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Rows per batch and transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes generating batches (1 runs them in this process)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        counts = {
+            'users': options['users'],
+            'applications': options['applications'],
+            'messages': options['contacts'],
+        }
+        done = dict.fromkeys(counts, 0)
+
+        def progress(written):
+            for table in counts.keys() & written.keys():
+                done[table] += written[table]
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{table:<13}{done[table]:>10} / {counts[table]}')
+
+        totals, elapsed = generate(
+            counts, seed=options['seed'], end=options['end'], years=options['years'],
+            batch_size=options['batch_size'], workers=options['workers'], using=options['database'],
+            progress=progress,
+        )
+        for table, count in totals.items():
+            self.stdout.write(f"{table:<13}{count:>10} rows{' (derived)' if table in DERIVED_TABLES else ''}")
+        # The headline rate counts the requested models' rows only
+        rows = sum(count for table, count in totals.items() if table not in DERIVED_TABLES)
+        derived = sum(totals[table] for table in DERIVED_TABLES)
+        self.stdout.write(self.style.SUCCESS(
+            f'{rows} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s) with {options["workers"]} worker(s), '
+            f'plus {derived} derived profile and search token rows ({(rows + derived) / elapsed:,.0f} rows/s in all)'
+        ))
+        if totals['applications']:
+            self.stdout.write('Run find_duplicate_applications to flag duplicates among the new applications.')
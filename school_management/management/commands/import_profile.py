@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from school_management.importtime import (
+    DEFERRED_MODULES, STARTUP_TARGETS, TARGETS, breakdown, import_chain, measure,
+)
+
+
+class Command(BaseCommand):
+    help = ('Profile cold-start imports with python -X importtime and break them down per app '
+            '(see school_management/importtime.py)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', dest='targets', action='append', choices=list(TARGETS),
+                            help='What to start: setup, wsgi or urls (repeatable; default: all)')
+        parser.add_argument('--repeat', type=int, default=5, help='Interpreters per target; the fastest is reported')
+        parser.add_argument('--top', type=int, default=15, help='Groups and modules to list')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        results = {}
+        for target in options['targets'] or TARGETS:
+            run = measure(target, repeat=max(options['repeat'], 1))
+            slowest = sorted(run.imports, key=lambda row: row.self_us, reverse=True)[:options['top']]
+            results[target] = {
+                'wall_ms': round(run.wall_ms, 1),
+                'import_ms': round(sum(row.self_us for row in run.imports) / 1000, 1),
+                'modules': len(run.loaded),
+                'groups': [
+                    {'group': name, 'modules': group['modules'], 'own_ms': round(group['own'] / 1000, 1),
+                     'total_ms': round(group['total'] / 1000, 1)}
+                    for name, group in breakdown(run.imports)[:options['top']]
+                ],
+                'slowest': [
+                    {'module': row.name, 'own_ms': round(row.self_us / 1000, 1),
+                     'chain': import_chain(run.imports, row.name)[1:]}
+                    for row in slowest
+                ],
+                'deferred_loaded': [name for name in DEFERRED_MODULES
+                                    if target in STARTUP_TARGETS and name in run.loaded],
+            }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for target, result in results.items():
+            self.report(target, result)
+
+    def report(self, target, result):
+        self.stdout.write(f"\n{target}: {result['wall_ms']:.0f} ms wall, {result['import_ms']:.0f} ms importing "
+                          f"{result['modules']} modules")
+        self.stdout.write(f"{'group':<32}{'modules':>8}{'own ms':>9}{'total ms':>10}")
+        for group in result['groups']:
+            self.stdout.write(f"{group['group']:<32}{group['modules']:>8}{group['own_ms']:>9.1f}"
+                              f"{group['total_ms']:>10.1f}")
+        self.stdout.write(f"\n{'module':<48}{'own ms':>9}  imported by")
+        for row in result['slowest']:
+            self.stdout.write(f"{row['module']:<48}{row['own_ms']:>9.1f}  {' < '.join(row['chain'][:3])}")
+        if result['deferred_loaded']:
+            self.stdout.write(self.style.WARNING(f"Deferred modules loaded: {', '.join(result['deferred_loaded'])}"))
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.tokens import purge_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions in small batches so the database write lock '
+        'is never held for long (unlike clearsessions, which uses one DELETE), '
+        'and revocations of expired API tokens'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by()
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired session(s) from the database.'))
+        purged = purge_revoked_tokens()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {purged} revoked token(s) past their expiry.'))
+
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        if hasattr(cache, 'purge_expired'):
+            purged = cache.purge_expired()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {purged} expired entry(ies) from the session cache.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from school_management.resp_server import RespServer
+
+
+class Command(BaseCommand):
+    help = 'Run the in-memory Redis-protocol stand-in for CACHE_BACKEND=redis in development'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=6380)
+
+    def handle(self, *args, **options):
+        server = RespServer((options['host'], options['port']))
+        self.stdout.write(f'Listening on {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
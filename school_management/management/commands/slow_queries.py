@@ -0,0 +1,61 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from school_management.jsonlog import read_jsonl
+from school_management.slowlog import normalize_sql
+
+
+class Command(BaseCommand):
+    help = 'Summarise the slow query log by statement fingerprint, worst total time first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=str(settings.LOG_DIR / 'slow_queries.jsonl'),
+                            help='Slow query log to read (rotated files next to it are read too)')
+        parser.add_argument('--top', type=int, default=10, help='Number of fingerprints to show')
+        parser.add_argument('--since', type=float, help='Only entries from the last SINCE hours')
+        parser.add_argument('--plans', action='store_true', help='Show the query plan of each fingerprint')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since'] is not None:
+            since = datetime.now(timezone.utc) - timedelta(hours=options['since'])
+        groups = {}
+        for entry in read_jsonl(options['file']):
+            if 'fingerprint' not in entry:
+                continue
+            if since is not None and datetime.fromisoformat(entry['time']) < since:
+                continue
+            group = groups.setdefault(entry['fingerprint'], {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'sql': entry['sql'], 'plan': None,
+                'views': Counter(), 'origins': Counter(),
+            })
+            group['count'] += 1
+            group['total'] += entry['duration_ms']
+            group['max'] = max(group['max'], entry['duration_ms'])
+            group['views'][entry.get('view') or '-'] += 1
+            group['origins'][entry.get('origin') or '-'] += 1
+            if entry.get('plan'):
+                group['plan'] = entry['plan']
+        if not groups:
+            self.stdout.write('No slow queries logged.')
+            return
+
+        worst = sorted(groups.items(), key=lambda item: item[1]['total'], reverse=True)[:options['top']]
+        self.stdout.write(f"{'fingerprint':<18}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}  statement")
+        for key, group in worst:
+            statement = normalize_sql(group['sql'])
+            if len(statement) > 100:
+                statement = statement[:97] + '...'
+            self.stdout.write(
+                f"{key:<18}{group['count']:>8}{group['total']:>12.1f}{group['total'] / group['count']:>10.1f}"
+                f"{group['max']:>10.1f}  {statement}"
+            )
+            views = ', '.join(f'{view} ({count})' for view, count in group['views'].most_common(3))
+            self.stdout.write(f'{"":<18}views: {views}')
+            self.stdout.write(f'{"":<18}from: {group["origins"].most_common(1)[0][0]}')
+            if options['plans'] and group['plan']:
+                for line in group['plan']:
+                    self.stdout.write(f'{"":<20}{line}')
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from school_management.routing import REPLICA_ALIAS, replica_configured, sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the DATABASE_REPLICA_URL file (once or every --interval seconds)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Keep syncing every N seconds')
+        parser.add_argument('--pages', type=int, default=1024, help='Pages copied per backup step')
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            self.stderr.write(f'No {REPLICA_ALIAS!r} database configured; set DATABASE_REPLICA_URL.')
+            return
+        while True:
+            start = time.perf_counter()
+            sync_sqlite_replica(pages=options['pages'])
+            self.stdout.write(f'Replica synced in {(time.perf_counter() - start) * 1000:.0f} ms')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from school_management.jsonlog import read_jsonl
+
+
+def read_traces(filename):
+    """Spans from an OTLP JSON lines file, grouped by trace id"""
+    traces = defaultdict(list)
+    for export in read_jsonl(filename):
+        for resource in export.get('resourceSpans', ()):
+            for scope in resource.get('scopeSpans', ()):
+                for span in scope.get('spans', ()):
+                    span['start'] = int(span['startTimeUnixNano'])
+                    span['duration'] = int(span['endTimeUnixNano']) - span['start']
+                    span['attributes'] = {
+                        item['key']: next(iter(item['value'].values())) for item in span.get('attributes', ())
+                    }
+                    traces[span['traceId']].append(span)
+    return traces
+
+
+def span_tree(spans):
+    """``(roots, children by span id)``, children in start order"""
+    ids = {span['spanId'] for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in sorted(spans, key=lambda span: span['start']):
+        parent = span.get('parentSpanId')
+        if parent in ids:
+            children[parent].append(span)
+        else:
+            roots.append(span)
+    return roots, children
+
+
+class Command(BaseCommand):
+    help = 'Print recorded request traces as span trees, or as folded stacks for flame graphs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('trace_id', nargs='?', help='Trace to print (default: the slowest)')
+        parser.add_argument('--file', default=str(settings.LOG_DIR / 'traces.jsonl'),
+                            help='OTLP JSON lines file (rotated files next to it are read too)')
+        parser.add_argument('--slowest', type=int, default=1, help='Number of slowest traces to print')
+        parser.add_argument('--folded', action='store_true',
+                            help='Print "a;b;c <self microseconds>" lines for flamegraph.pl or speedscope')
+
+    def handle(self, *args, **options):
+        traces = read_traces(options['file'])
+        if options['trace_id']:
+            if options['trace_id'] not in traces:
+                raise CommandError(f"No trace {options['trace_id']} in {options['file']}")
+            chosen = [options['trace_id']]
+        else:
+            def duration(trace_id):
+                return max(span['duration'] for span in span_tree(traces[trace_id])[0])
+            chosen = sorted(traces, key=duration, reverse=True)[:options['slowest']]
+        for trace_id in chosen:
+            roots, children = span_tree(traces[trace_id])
+            if options['folded']:
+                for root in roots:
+                    self.write_folded(root, children, [])
+            else:
+                self.stdout.write(f'trace {trace_id}')
+                for root in roots:
+                    self.write_tree(root, children, 1)
+
+    def write_tree(self, span, children, depth):
+        label = span['name']
+        statement = span['attributes'].get('db.statement')
+        if statement:
+            label = f'{label}  {statement[:80]}'
+        if span.get('status', {}).get('code') == 2:
+            label = f"{label}  [error: {span['status'].get('message', '')}]"
+        self.stdout.write(f"{span['duration'] / 1e6:>10.2f} ms  {'  ' * depth}{label}")
+        for child in children[span['spanId']]:
+            self.write_tree(child, children, depth + 1)
+
+    def write_folded(self, span, children, stack):
+        stack = [*stack, span['name'].replace(';', ',')]
+        own = span['duration'] - sum(child['duration'] for child in children[span['spanId']])
+        if own > 0:
+            self.stdout.write(f"{';'.join(stack)} {own // 1000}")
+        for child in children[span['spanId']]:
+            self.write_folded(child, children, stack)
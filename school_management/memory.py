@@ -0,0 +1,219 @@
+"""
+Per-worker memory diagnostics: tracemalloc snapshots, sampled per-request
+peak allocation and recycling of workers that grow too large.
+
+Each worker process has its own ``MemoryProfiler``. Allocation tracing
+starts when the worker starts if ``MEMORY_TRACEMALLOC_FRAMES`` is above 0
+(it slows Python allocations down, so it is off by default), or on
+demand. Reports list the top allocation sites (``file:line``, with the
+stack when more than one frame is kept) and the difference against a
+baseline snapshot, which is what grows between two points in time:
+
+* ``GET /diagnostics/memory`` (staff only, ``views.memory_view``) returns the report of the
+  worker that answers; ``POST`` with ``action`` ``start``, ``stop`` or
+  ``baseline`` controls tracing and takes a new baseline,
+* ``MEMORY_SIGNAL`` (``SIGUSR2`` by default) writes the report of every
+  worker it is sent to as ``memory-<pid>-<time>.json`` in ``LOG_DIR``:
+  ``pkill -USR2 -f 'gunicorn: worker'``.
+
+``MemoryMiddleware`` measures the peak allocation of a random
+``MEMORY_SAMPLE_RATE`` fraction of requests, tracing just for the
+request, into the ``http_request_peak_alloc_bytes`` histogram and the
+access log's ``peak_alloc`` field, so the unpaginated
+``export``/``pending``/``new`` actions show up. No request is sampled
+while tracing is on, so a diagnostic session's ``traced_peak_bytes`` is
+left alone. With threaded workers the peak includes other threads'
+allocations.
+
+Under gunicorn, every ``MEMORY_CHECK_INTERVAL`` requests the middleware
+reads the worker's resident set size; past ``MEMORY_MAX_RSS_MB`` the
+worker finishes its request and sends itself ``SIGTERM``, a graceful
+exit after which gunicorn starts a fresh worker.
+"""
+import json
+import linecache
+import logging
+import os
+import random
+import signal
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+
+from .metrics import registry
+from .profiling import url_name
+
+
+logger = logging.getLogger('school_management.memory')
+
+# Allocations by the import machinery and by tracemalloc itself are noise
+IGNORED = (
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+)
+
+
+def rss_bytes():
+    """This process's resident set size, or its peak where the current size is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def _site(statistic):
+    frames = statistic.traceback
+    site = {'site': f'{frames[0].filename}:{frames[0].lineno}'}
+    if len(frames) > 1:
+        site['stack'] = [f'{frame.filename}:{frame.lineno}' for frame in frames]
+    return site
+
+
+class MemoryProfiler:
+    """tracemalloc control and reports for this process"""
+
+    def __init__(self):
+        self.baseline = None
+        self.baseline_time = None
+        self._lock = threading.Lock()
+
+    def start(self, frames=None):
+        frames = frames or getattr(settings, 'MEMORY_TRACEMALLOC_FRAMES', 0) or 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.take_baseline()
+
+    def stop(self):
+        with self._lock:
+            self.baseline = self.baseline_time = None
+        tracemalloc.stop()
+
+    def snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(IGNORED)
+
+    def take_baseline(self):
+        snapshot = self.snapshot()
+        with self._lock:
+            self.baseline, self.baseline_time = snapshot, time.time()
+
+    def report(self, top=20):
+        """RSS, tracemalloc totals, the top allocation sites and the growth since the baseline"""
+        report = {
+            'pid': os.getpid(),
+            'time': time.time(),
+            'rss_bytes': rss_bytes(),
+            'max_rss_bytes': getattr(settings, 'MEMORY_MAX_RSS_MB', 0) * 1024 * 1024 or None,
+            'tracing': tracemalloc.is_tracing(),
+        }
+        if not report['tracing']:
+            return report
+        current, peak = tracemalloc.get_traced_memory()
+        key = 'traceback' if tracemalloc.get_traceback_limit() > 1 else 'lineno'
+        snapshot = self.snapshot()
+        report.update({
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'tracemalloc_overhead_bytes': tracemalloc.get_tracemalloc_memory(),
+            'top': [
+                {**_site(stat), 'size': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics(key)[:top]
+            ],
+        })
+        with self._lock:
+            baseline, baseline_time = self.baseline, self.baseline_time
+        if baseline is not None:
+            report['baseline_time'] = baseline_time
+            report['growth'] = [
+                {**_site(stat), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff, 'size': stat.size}
+                for stat in snapshot.compare_to(baseline, key)[:top] if stat.size_diff > 0
+            ]
+        return report
+
+    def write_report(self, directory=None, top=20):
+        """Write ``report()`` to ``memory-<pid>-<time>.json``; return the path"""
+        directory = str(directory or settings.LOG_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"memory-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(top), f, indent=2)
+        return path
+
+
+profiler = MemoryProfiler()
+
+
+def _on_signal(signum, frame):
+    try:
+        path = profiler.write_report()
+    except Exception:
+        logger.exception('Memory report failed')
+    else:
+        logger.warning('Memory report of worker %s written to %s', os.getpid(), path)
+
+
+def install():
+    """Start tracing if configured and handle ``MEMORY_SIGNAL``; call from the app's ``ready()``"""
+    if getattr(settings, 'MEMORY_TRACEMALLOC_FRAMES', 0) > 0:
+        profiler.start()
+    name = getattr(settings, 'MEMORY_SIGNAL', '')
+    if name and threading.current_thread() is threading.main_thread():
+        signal.signal(getattr(signal, name), _on_signal)
+
+
+class MemoryMiddleware:
+    """Sampled per-request peak allocation and RSS-based worker recycling"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.requests = 0
+        self.recycling = False
+
+    def __call__(self, request):
+        rate = getattr(settings, 'MEMORY_SAMPLE_RATE', 0.0)
+        # The peak belongs to a diagnostic session (or another thread's
+        # sample) while tracing is on
+        if rate and not tracemalloc.is_tracing() and random.random() < rate:
+            response = self.measure(request)
+        else:
+            response = self.get_response(request)
+        self.check_ceiling(request)
+        return response
+
+    def measure(self, request):
+        tracemalloc.start(1)
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            return self.get_response(request)
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - before
+            # Unless the request itself started tracing for diagnostics
+            if profiler.baseline is None:
+                tracemalloc.stop()
+            request.memory_peak = peak
+            registry.observe('http_request_peak_alloc_bytes', {'view': registry.view_label(url_name(request))}, peak)
+
+    def check_ceiling(self, request):
+        ceiling = getattr(settings, 'MEMORY_MAX_RSS_MB', 0)
+        if not ceiling or self.recycling:
+            return
+        self.requests += 1
+        if self.requests % max(getattr(settings, 'MEMORY_CHECK_INTERVAL', 20), 1):
+            return
+        # Only servers that replace a worker which exits on SIGTERM
+        if not request.META.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+            return
+        rss = rss_bytes()
+        if rss > ceiling * 1024 * 1024:
+            self.recycling = True
+            logger.warning('Worker %s uses %.0f MiB (ceiling %s MiB) after %s requests; recycling it',
+                           os.getpid(), rss / 1024 / 1024, ceiling, self.requests)
+            registry.inc('worker_recycles_total', {'reason': 'memory'})
+            os.kill(os.getpid(), signal.SIGTERM)
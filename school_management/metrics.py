@@ -0,0 +1,306 @@
+"""
+Prometheus metrics, aggregated across worker processes.
+
+``MetricsMiddleware`` records for every request, labelled by the resolved
+URL name (``admission-list``, ``contact-statistics``, ...):
+
+* ``http_requests_total`` by method and status class,
+* ``http_request_duration_seconds`` and ``http_response_size_bytes``
+  histograms,
+* ``db_queries_total`` and ``db_query_duration_seconds_total`` (from the
+  ``ProfilingMiddleware`` timings),
+* ``form_submissions_total`` by outcome for the views in
+  ``METRICS_FORM_VIEWS`` (the public admission and contact forms),
+* ``http_request_peak_alloc_bytes`` for sampled requests and
+  ``worker_recycles_total`` (see ``school_management/memory.py``).
+
+``GET /metrics`` serves them in the Prometheus text format, with the
+response cache counters (``cache_response_events_total`` and a hit ratio
+per namespace).
+
+Each process keeps its metrics in memory and writes them to its own
+file in ``METRICS_DIR`` at most every ``METRICS_FLUSH_INTERVAL`` seconds;
+``/metrics`` sums the files of every worker. Files of workers that have
+exited are folded into one archive file, so counters survive worker
+restarts. Label values are bounded: unknown methods become ``other``,
+statuses are reported by class (``2xx``), and past ``METRICS_MAX_VIEWS``
+distinct URL names the rest are reported as ``other``.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ALLOC_BUCKETS = (65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456)
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by URL name, method and status class', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by URL name', DURATION_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size by URL name', SIZE_BUCKETS),
+    'db_queries_total': ('counter', 'SQL queries by URL name', None),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in SQL by URL name', None),
+    'form_submissions_total': ('counter', 'Public form submissions by outcome', None),
+    'http_request_peak_alloc_bytes': ('histogram', 'Peak allocation of sampled requests by URL name', ALLOC_BUCKETS),
+    'worker_recycles_total': ('counter', 'Workers that exited to be replaced, by reason', None),
+}
+
+
+def metrics_dir():
+    return str(getattr(settings, 'METRICS_DIR', settings.BASE_DIR / 'cache' / 'metrics'))
+
+
+class Registry:
+    """
+    This process's metric values: counters as numbers, histograms as
+    ``[bucket counts..., +Inf count, sum]``, keyed by ``(name, labels)``.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._views = set()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flushed = 0.0
+        self._flush_at_exit = False
+
+    def _check_fork(self):
+        # A forked worker starts empty; the parent's values are in the parent's file
+        if self._pid != os.getpid():
+            self._values = {}
+            self._pid = os.getpid()
+            self._token = secrets.token_hex(4)
+
+    def _recording(self):
+        # Only processes that record (served a request) write a file when they exit
+        self._check_fork()
+        if not self._flush_at_exit:
+            self._flush_at_exit = True
+            atexit.register(self.flush)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+            self._views = set()
+
+    def view_label(self, name):
+        with self._lock:
+            if name in self._views:
+                return name
+            if len(self._views) < getattr(settings, 'METRICS_MAX_VIEWS', 200):
+                self._views.add(name)
+                return name
+        return 'other'
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._recording()
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._recording()
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = [0] * (len(buckets) + 2)
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 1):
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to its file (atomically)"""
+        with self._lock:
+            self._check_fork()
+            self._flushed = time.monotonic()
+            if not self._values:
+                return
+            data = [[name, list(labels), value] for (name, labels), value in self._values.items()]
+            path = os.path.join(metrics_dir(), f'worker-{self._pid}-{self._token}.json')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(data, handle)
+        os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+def _merge(totals, entries):
+    for name, labels, value in entries:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        if isinstance(value, list):
+            current = totals.get(key)
+            totals[key] = value if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Sum the metrics of every worker, folding exited workers into the archive"""
+    registry.flush()
+    directory = metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    archive = os.path.join(directory, 'archive.json')
+    totals = {}
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archived = {}
+        if os.path.exists(archive):
+            with open(archive) as handle:
+                _merge(archived, json.load(handle))
+        dead = []
+        for path in glob.glob(os.path.join(directory, 'worker-*.json')):
+            with open(path) as handle:
+                entries = json.load(handle)
+            if _pid_alive(int(os.path.basename(path).split('-')[1])):
+                _merge(totals, entries)
+            else:
+                _merge(archived, entries)
+                dead.append(path)
+        if dead:
+            temporary = f'{archive}.tmp'
+            with open(temporary, 'w') as handle:
+                json.dump([[name, list(labels), value] for (name, labels), value in archived.items()], handle)
+            os.replace(temporary, archive)
+            for path in dead:
+                os.remove(path)
+    _merge(totals, [[name, list(labels), value] for (name, labels), value in archived.items()])
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    """Prometheus text exposition of ``totals`` plus the response cache counters"""
+    series = defaultdict(list)
+    for (name, labels), value in sorted(totals.items()):
+        series[name].append((labels, value))
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in series.get(name, ()):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    lines += _cache_lines()
+    return '\n'.join(lines) + '\n'
+
+
+def _cache_lines():
+    from .caching import flight_counters
+
+    events = ['# HELP cache_response_events_total Response cache events by namespace',
+              '# TYPE cache_response_events_total counter']
+    ratios = ['# HELP cache_response_hit_ratio Response cache hits / lookups by namespace',
+              '# TYPE cache_response_hit_ratio gauge']
+    for namespace in getattr(settings, 'CACHE_NAMESPACES', {}):
+        totals = flight_counters.totals(namespace)
+        for event in flight_counters.EVENTS:
+            events.append(f'cache_response_events_total{_labels([("namespace", namespace), ("event", event)])} '
+                          f'{totals[event]}')
+        lookups = totals['hit'] + totals['miss']
+        ratio = totals['hit'] / lookups if lookups else 0.0
+        ratios.append(f'cache_response_hit_ratio{_labels([("namespace", namespace)])} {ratio!r}')
+    return events + ratios
+
+
+def form_outcome(status_code):
+    if status_code < 300:
+        return 'accepted'
+    if status_code == 429:
+        return 'throttled'
+    if status_code < 500:
+        return 'invalid'
+    return 'error'
+
+
+class MetricsMiddleware:
+    """Record request metrics; place it right after ProfilingMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = registry.view_label(match.view_name if match is not None and match.view_name else 'unresolved')
+        method = request.method if request.method in METHODS else 'other'
+        registry.inc('http_requests_total', {
+            'view': view, 'method': method, 'status': f'{response.status_code // 100}xx'
+        })
+        registry.observe('http_request_duration_seconds', {'view': view}, duration)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', {'view': view}, len(response.content))
+        timings = getattr(request, 'timings', None)
+        if timings is not None:
+            registry.inc('db_queries_total', {'view': view}, timings.db_queries)
+            registry.inc('db_query_duration_seconds_total', {'view': view}, timings.db_time)
+        form = getattr(settings, 'METRICS_FORM_VIEWS', {}).get(view)
+        if form is not None and method == 'POST':
+            registry.inc('form_submissions_total', {'form': form, 'outcome': form_outcome(response.status_code)})
+        registry.maybe_flush()
+        return response
+
+
+def metrics_view(request):
+    """``GET /metrics``: bearer ``METRICS_TOKEN`` if set, else ``METRICS_ALLOWED_IPS`` only"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,167 @@
+"""
+Per-request phase timings and sampled cProfile capture.
+
+``ProfilingMiddleware`` (right after ``TracingMiddleware``) times every request:
+
+``db``      time in SQL and the number of queries, through
+            ``connection.execute_wrapper`` on every database alias
+``view``    from the view being called until it returns (DRF serializers
+            run here, since ``Response.data`` is built in the view)
+``render``  turning the response into bytes (DRF renderers, templates)
+``total``   the whole middleware stack
+
+With ``SERVER_TIMING`` the phases are sent as a ``Server-Timing`` header,
+which browser developer tools display per request.
+
+cProfile only runs for requests picked to be profiled, so other requests
+pay for a few ``perf_counter()`` calls and nothing else:
+
+* a random ``PROFILING_SAMPLE_RATE`` fraction of requests,
+* after a request to some URL name takes ``PROFILING_SLOW_MS`` or longer,
+  the next request to the same URL name (at most once a minute per name;
+  a request cannot be profiled retroactively).
+
+Each profile is written to ``PROFILING_DIR`` (``logs/profiles``) as
+``<time>-<url name>-<ms>ms-<pid>.prof``; read it with
+``python -m pstats <file>`` or snakeviz.
+"""
+import contextvars
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+SLOW_PROFILE_COOLDOWN = 60
+
+# URL name of the view being run, for code that has no request at hand
+current_view = contextvars.ContextVar('current_view', default=None)
+
+
+class RequestTimings:
+    """Phase timings for one request; also the ``execute_wrapper`` that counts SQL"""
+
+    __slots__ = ('started', 'db_time', 'db_queries', 'view_started', 'view_time', 'render_started', 'render_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.view_started = self.view_time = None
+        self.render_started = self.render_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+    def view_called(self):
+        self.view_started = time.perf_counter()
+
+    def view_returned(self):
+        if self.view_started is not None and self.view_time is None:
+            self.render_started = time.perf_counter()
+            self.view_time = self.render_started - self.view_started
+
+    def rendered(self, response):
+        if self.render_started is not None:
+            self.render_time = time.perf_counter() - self.render_started
+
+    def server_timing(self, total):
+        phases = [f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"']
+        if self.view_time is not None:
+            phases.append(f'view;dur={self.view_time * 1000:.1f}')
+        if self.render_time is not None:
+            phases.append(f'render;dur={self.render_time * 1000:.1f}')
+        phases.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(phases)
+
+
+def url_name(request):
+    """The resolved view name (``admission-statistics``), or ``unresolved``"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None and match.view_name else 'unresolved'
+
+
+class ProfilingMiddleware:
+    """Time request phases, add ``Server-Timing`` and profile sampled requests"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # URL names whose next request is profiled, and when each may be again
+        self._pending = set()
+        self._cooldown = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        timings = request.timings = RequestTimings()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timings))
+            view = current_view.set(None)
+            try:
+                response = self.get_response(request)
+            finally:
+                current_view.reset(view)
+                profiler = getattr(request, '_profiler', None)
+                if profiler is not None:
+                    profiler.disable()
+        total = time.perf_counter() - timings.started
+        timings.view_returned()
+        if getattr(settings, 'SERVER_TIMING', False):
+            response['Server-Timing'] = timings.server_timing(total)
+        if profiler is not None:
+            self.dump(profiler, request, total)
+        else:
+            self.note_latency(request, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timings.view_called()
+        current_view.set(url_name(request))
+        if self.should_profile(request):
+            request._profiler = cProfile.Profile()
+            request._profiler.enable()
+
+    def process_template_response(self, request, response):
+        # Runs after the view returns and just before the response is rendered
+        request.timings.view_returned()
+        response.add_post_render_callback(request.timings.rendered)
+        return response
+
+    def should_profile(self, request):
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        if rate and random.random() < rate:
+            return True
+        if self._pending:
+            name = url_name(request)
+            with self._lock:
+                if name in self._pending:
+                    self._pending.discard(name)
+                    self._cooldown[name] = time.monotonic() + SLOW_PROFILE_COOLDOWN
+                    return True
+        return False
+
+    def note_latency(self, request, total):
+        threshold = getattr(settings, 'PROFILING_SLOW_MS', 0)
+        if threshold and total * 1000 >= threshold:
+            name = url_name(request)
+            with self._lock:
+                if self._cooldown.get(name, 0) <= time.monotonic():
+                    self._pending.add(name)
+
+    def dump(self, profiler, request, total):
+        directory = getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'logs' / 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r'[^\w.-]', '_', url_name(request))
+        stamp = time.strftime('%Y%m%dT%H%M%S')
+        profiler.dump_stats(os.path.join(directory, f'{stamp}-{name}-{total * 1000:.0f}ms-{os.getpid()}.prof'))
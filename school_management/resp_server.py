@@ -0,0 +1,163 @@
+"""
+A small in-memory server speaking the Redis protocol (RESP).
+
+Implements the commands ``RespCache`` uses (plus a few for debugging), so
+development machines and the test suite can exercise the Redis code path
+without a Redis install::
+
+    python manage.py resp_server --port 6380
+    CACHE_BACKEND=redis CACHE_LOCATION=redis://127.0.0.1:6380/0 ...
+
+Not a replacement for Redis: no persistence, no eviction, one database.
+"""
+import socketserver
+import threading
+import time
+
+
+class RespStore:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, command, args):
+        handler = getattr(self, f'cmd_{command.lower()}', None)
+        if handler is None:
+            return RespErrorReply(f"ERR unknown command '{command}'")
+        with self.lock:
+            return handler(*args)
+
+    def cmd_ping(self, *args):
+        return args[0] if args else 'PONG'
+
+    def cmd_select(self, index):
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() if isinstance(option, bytes) else option for option in options]
+        exists = self._alive(key)
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        for unit, scale in ((b'EX', 1), (b'PX', 0.001)):
+            if unit in options:
+                self.expires[key] = time.monotonic() + int(options[options.index(unit) + 1]) * scale
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_incrby(self, key, delta):
+        value = int(self.data[key]) if self._alive(key) else 0
+        try:
+            value += int(delta)
+        except ValueError:
+            return RespErrorReply('ERR value is not an integer or out of range')
+        self.data[key] = str(value).encode()
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def cmd_pexpire(self, key, milliseconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(milliseconds) / 1000
+        return 1
+
+    def cmd_persist(self, key):
+        return 1 if self._alive(key) and self.expires.pop(key, None) is not None else 0
+
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._alive(key))
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return 'OK'
+
+
+class RespErrorReply(str):
+    pass
+
+
+def encode_reply(value):
+    if isinstance(value, RespErrorReply):
+        return b'-%s\r\n' % value.encode()
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode()
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(encode_reply(item) for item in value)
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command (e.g. typed into telnet)
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            reply = self.server.store.execute(command[0].decode(), command[1:])
+            self.wfile.write(encode_reply(reply))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, RespHandler)
+        self.store = RespStore()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        """Serve from a daemon thread; returns the server"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
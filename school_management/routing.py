@@ -0,0 +1,163 @@
+"""
+Read-replica routing.
+
+When ``DATABASE_REPLICA_URL`` is set, the replica is added to
+``DATABASES`` as ``'replica'``. ``ReplicaRouter`` then sends reads there,
+but only inside an explicit read intent:
+
+* ``with read_replica(): ...``, or the ``@use_replica`` decorator,
+* ``ReplicaReadMixin`` on a ViewSet, for the safe-method actions named in
+  ``replica_actions`` (statistics, exports, dashboard lists).
+
+Everything else, and every write, uses ``'default'``.
+
+Read-your-writes: once anything is written inside a request, the rest of
+the request reads from the primary. ``ReplicaPinMiddleware`` also sets
+a short-lived cookie after a write, so the same client's next requests
+stay on the primary until the replica has caught up.
+"""
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+
+# rest_framework.permissions.SAFE_METHODS, which would import DRF's
+# serializers into every process that loads the middleware
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'replica_pin'
+
+_read_intent = contextvars.ContextVar('read_intent', default=False)
+_pinned = contextvars.ContextVar('replica_pinned', default=False)
+_wrote = contextvars.ContextVar('replica_wrote', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in connections.settings
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+@contextmanager
+def read_replica():
+    """Let reads inside the block go to the replica (unless pinned to the primary)"""
+    # Writes made before the block (e.g. in a management command) do not
+    # pin it; writes inside it pin the rest of the block
+    token, wrote = _read_intent.set(True), _wrote.set(False)
+    try:
+        yield
+    finally:
+        wrote_inside = _wrote.get()
+        _read_intent.reset(token)
+        _wrote.reset(wrote)
+        if wrote_inside:
+            _wrote.set(True)
+
+
+def reading_from_replica():
+    """True when reads made now would go to the replica"""
+    return ReplicaRouter().db_for_read(None) == REPLICA_ALIAS
+
+
+def recently_wrote():
+    """True after a write in this request, or one by this client within the pin window"""
+    return _pinned.get() or _wrote.get()
+
+
+def use_replica(func):
+    """Decorator form of ``read_replica()``"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def pinned_to_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """Route reads with read intent to the replica; everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _read_intent.get() and not _pinned.get() and not _wrote.get() and replica_configured():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write in the same request must see it
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """Scope routing state to the request and pin recent writers to the primary"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() or request.method not in SAFE_METHODS:
+                response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+            return response
+        finally:
+            _wrote.reset(wrote)
+            _pinned.reset(pinned)
+
+
+class ReplicaReadMixin:
+    """
+    Run the safe-method ViewSet actions in ``replica_actions`` with read
+    intent. Authentication and permission checks still read the primary.
+    """
+    replica_actions = ('list', 'statistics', 'export')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and request.method in SAFE_METHODS:
+            self._read_intent_token = _read_intent.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_intent_token', None)
+        if token is not None:
+            _read_intent.reset(token)
+            self._read_intent_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def sync_sqlite_replica(source_alias='default', replica_alias=REPLICA_ALIAS, pages=1024):
+    """
+    Copy the primary SQLite database into the replica with SQLite's online
+    backup API, ``pages`` pages per step, so writers are never blocked for
+    the whole copy. A local stand-in for real replication.
+    """
+    source, replica = connections[source_alias], connections[replica_alias]
+    if source.vendor != 'sqlite' or replica.vendor != 'sqlite':
+        raise ImproperlyConfigured('sync_sqlite_replica needs two SQLite databases.')
+    source.ensure_connection()
+    replica.ensure_connection()
+    source.connection.backup(replica.connection, pages=pages)
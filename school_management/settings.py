@@ -2,10 +2,12 @@
 Django settings for school_management project.
 """
 
-import os
 from pathlib import Path
 from decouple import config
 
+from school_management.cache import cache_settings
+from school_management.database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -19,7 +21,8 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lamb
 
 # Application definition
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are imported with the URLconf, not at startup
+    'school_management.apps.LazyAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -31,9 +34,15 @@ INSTALLED_APPS = [
     'admissions',
     'contact',
     'users',
+    'school_management',
 ]
 
 MIDDLEWARE = [
+    'school_management.tracing.TracingMiddleware',
+    'school_management.profiling.ProfilingMiddleware',
+    'school_management.metrics.MetricsMiddleware',
+    'school_management.jsonlog.AccessLogMiddleware',
+    'school_management.memory.MemoryMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -41,6 +50,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'school_management.routing.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,13 +75,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'school_management.wsgi.application'
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database: DATABASE_URL plus DB_* tuning (see school_management/database.py)
+DATABASES = database_config(BASE_DIR)
+
+# Optional read replica (DATABASE_REPLICA_URL) for statistics, exports and
+# dashboard lists; writers stay on the primary for REPLICA_PIN_SECONDS
+DATABASE_ROUTERS = ['school_management.routing.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,6 +123,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
@@ -128,6 +139,123 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Signed API tokens (see users/tokens.py): lifetime and how often each
+# process reloads the revocation list
+API_TOKEN_TTL = config('API_TOKEN_TTL', default=12 * 60 * 60, cast=int)
+API_TOKEN_REVOCATION_REFRESH = config('API_TOKEN_REVOCATION_REFRESH', default=5, cast=int)
+
+# Seconds each process keeps a user's resolved roles/permissions
+# (see users/roles.py); local changes invalidate immediately
+ROLE_CACHE_TTL = config('ROLE_CACHE_TTL', default=30, cast=int)
+
+# Caches: 'default' is chosen by CACHE_BACKEND (locmem, file, sqlite or
+# redis; see school_management/cache.py) and shared by all workers unless
+# locmem. 'sessions' is a SQLite (WAL) file shared by all workers on the
+# host and kept apart from the main database.
+CACHES = {
+    'default': cache_settings(
+        config('CACHE_BACKEND', default='sqlite'), config('CACHE_LOCATION', default=''), BASE_DIR
+    ),
+    'sessions': {
+        'BACKEND': 'school_management.cache.SQLiteCache',
+        'LOCATION': config('SESSION_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'sessions.sqlite3')),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Cached responses and keys are grouped in namespaces; saving or deleting
+# one of a namespace's models invalidates it in every worker
+# (see school_management/caching.py)
+CACHE_NAMESPACES = {
+    'admissions': ['admissions.AdmissionApplication'],
+    'contact': ['contact.ContactMessage'],
+    'users': ['auth.User', 'users.UserProfile'],
+}
+CACHE_RESPONSES = config('CACHE_RESPONSES', default=True, cast=bool)
+CACHE_RESPONSE_TIMEOUT = config('CACHE_RESPONSE_TIMEOUT', default=300, cast=int)
+# Identical concurrent misses wait up to CACHE_LOCK_TIMEOUT seconds for one
+# worker to compute the response; dashboards may be served a value up to
+# CACHE_STALE_TIMEOUT seconds old while it is refreshed in the background
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=30, cast=int)
+CACHE_STALE_TIMEOUT = config('CACHE_STALE_TIMEOUT', default=3600, cast=int)
+
+# Sessions: 'cached_db' (reads from the cache, writes through to the
+# database), 'cache' (cache only), 'signed_cookies' or 'db'
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[config('SESSION_BACKEND', default='cached_db')]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Serialize list/export responses straight from values_list() rows
+# (see school_management/fast_serializers.py)
+FAST_SERIALIZATION = config('FAST_SERIALIZATION', default=True, cast=bool)
+
+# Admin changelists: cached filter choices and approximate counts
+# (see school_management/changelist.py)
+ADMIN_HIGH_VOLUME = config('ADMIN_HIGH_VOLUME', default=True, cast=bool)
+ADMIN_FILTER_CACHE_TIMEOUT = config('ADMIN_FILTER_CACHE_TIMEOUT', default=600, cast=int)
+
+# Request profiling (see school_management/profiling.py): phase timings
+# in a Server-Timing header, and cProfile dumps for a sample of requests
+# and for URL names that were just slow (0 disables either)
+SERVER_TIMING = config('SERVER_TIMING', default=DEBUG, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_SLOW_MS = config('PROFILING_SLOW_MS', default=0, cast=int)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+
+# Endpoint budgets (see school_management/budgets.py): EndpointBudgetTest
+# always checks query counts; wall-clock latency (and ColdStartTest its
+# startup time) only when enabled, on a machine quiet enough to time them
+ENFORCE_LATENCY_BUDGETS = config('ENFORCE_LATENCY_BUDGETS', default=False, cast=bool)
+
+# manage.py test runs on its own caches instead of the shared ones
+# (see school_management/test_runner.py)
+TEST_RUNNER = 'school_management.test_runner.TestRunner'
+
+# Slow query log (see school_management/slowlog.py): statements taking
+# SLOW_QUERY_MS or longer go to logs/slow_queries.jsonl with their origin
+# and, once per fingerprint, their query plan (-1 disables, 0 logs all)
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=100, cast=int)
+SLOW_QUERY_EXPLAIN = config('SLOW_QUERY_EXPLAIN', default=True, cast=bool)
+SLOW_QUERY_BUFFER = config('SLOW_QUERY_BUFFER', default=500, cast=int)
+
+# Request tracing (see school_management/tracing.py): a sample of requests,
+# and those whose traceparent header is sampled, are written as OTLP JSON
+# spans to logs/traces.jsonl
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', default=0.0, cast=float)
+TRACING_MAX_SPANS = config('TRACING_MAX_SPANS', default=2000, cast=int)
+TRACING_SERVICE_NAME = config('TRACING_SERVICE_NAME', default='school-management')
+
+# Prometheus metrics at /metrics, summed over the worker processes'
+# files in METRICS_DIR (see school_management/metrics.py). Scrapers send
+# "Authorization: Bearer $METRICS_TOKEN"; without a token only
+# METRICS_ALLOWED_IPS may scrape
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'cache' / 'metrics'))
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [s.strip() for s in v.split(',')])
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1, cast=float)
+METRICS_MAX_VIEWS = 200
+METRICS_FORM_VIEWS = {
+    'admission-list': 'admission',
+    'contact-list': 'contact',
+}
+
+# Memory diagnostics (see school_management/memory.py): tracemalloc from
+# worker start with this many frames per allocation (0: only on demand
+# from /diagnostics/memory), the signal that writes a worker's report to
+# LOG_DIR, the fraction of requests whose peak allocation is measured,
+# and the resident size in MiB past which a gunicorn worker recycles
+# itself, checked every MEMORY_CHECK_INTERVAL requests (0 disables)
+MEMORY_TRACEMALLOC_FRAMES = config('MEMORY_TRACEMALLOC_FRAMES', default=0, cast=int)
+MEMORY_SIGNAL = config('MEMORY_SIGNAL', default='SIGUSR2')
+MEMORY_SAMPLE_RATE = config('MEMORY_SAMPLE_RATE', default=0.0, cast=float)
+MEMORY_MAX_RSS_MB = config('MEMORY_MAX_RSS_MB', default=0, cast=int)
+MEMORY_CHECK_INTERVAL = config('MEMORY_CHECK_INTERVAL', default=20, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -155,14 +283,46 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 
 # Logging
+# Structured JSON-lines logs, written by a background thread per process
+# with size and daily rotation (see school_management/jsonlog.py)
+LOG_DIR = Path(config('LOG_DIR', default=str(BASE_DIR / 'logs')))
+LOG_ROTATION = {
+    'max_bytes': config('LOG_MAX_BYTES', default=50 * 1024 * 1024, cast=int),
+    'when': config('LOG_ROTATE_WHEN', default='midnight'),
+    'backup_count': config('LOG_BACKUP_COUNT', default=14, cast=int),
+    'compress': config('LOG_COMPRESS', default=True, cast=bool),
+}
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'otlp': {'()': 'school_management.tracing.OTLPFormatter'},
+    },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django.log',
+            'class': 'school_management.jsonlog.AsyncJSONLHandler',
+            'filename': LOG_DIR / 'django.jsonl',
+            **LOG_ROTATION,
+        },
+        'access': {
+            'level': 'INFO',
+            'class': 'school_management.jsonlog.AsyncJSONLHandler',
+            'filename': LOG_DIR / 'access.jsonl',
+            **LOG_ROTATION,
+        },
+        'slow_queries': {
+            'level': 'INFO',
+            'class': 'school_management.jsonlog.AsyncJSONLHandler',
+            'filename': LOG_DIR / 'slow_queries.jsonl',
+            **LOG_ROTATION,
+        },
+        'traces': {
+            'level': 'INFO',
+            'class': 'school_management.jsonlog.AsyncJSONLHandler',
+            'formatter': 'otlp',
+            'filename': LOG_DIR / 'traces.jsonl',
+            **LOG_ROTATION,
         },
     },
     'loggers': {
@@ -171,8 +331,25 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'school_management': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': True,
+        },
+        'school_management.access': {
+            'handlers': ['access'],
+            'level': config('ACCESS_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        'school_management.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'school_management.traces': {
+            'handlers': ['traces'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
-
-# Create logs directory if it doesn't exist
-os.makedirs(BASE_DIR / 'logs', exist_ok=True)
@@ -0,0 +1,201 @@
+"""
+Slow query log.
+
+``slow_query_log`` is an ``execute_wrapper`` installed on every database
+connection as it is opened (``install``, from ``AppConfig.ready``). A
+statement that takes ``SLOW_QUERY_MS`` or longer is recorded with:
+
+* the SQL as sent (with placeholders) and a fingerprint of its normalized
+  form: literals, placeholders and ``IN (...)`` lists collapsed, so the
+  same query with different values or list lengths counts as one,
+* the shape of its parameters (types and lengths, never the values),
+* the URL name of the request running it (``admission-statistics``),
+* the first stack frame in the project's own code that issued it,
+* the first time a fingerprint is seen by a process, its query plan
+  (``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on PostgreSQL), run on
+  the same connection, bypassing the wrappers.
+
+Entries are kept in a per-process ring buffer (``SLOW_QUERY_BUFFER``
+entries) and logged to ``school_management.slow_queries``
+(``logs/slow_queries.jsonl``). ``manage.py slow_queries`` summarises the
+file by fingerprint, worst total time first.
+"""
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+from .profiling import current_view
+
+
+logger = logging.getLogger('school_management.slow_queries')
+
+# Fingerprints whose plan a process remembers
+MAX_PLANS = 1000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+_EXPLAINABLE = re.compile(r'^\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """``sql`` with every value replaced by ``?`` and value lists by ``(...)``"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalize_sql(sql).encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def _value_shape(value):
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f'{name}[{len(value)}]'
+    return name
+
+
+def params_shape(params, many=False):
+    """Types and lengths of the parameters, e.g. ``['int', 'str[12]']``"""
+    if params is None:
+        return None
+    if many:
+        rows = list(params) if not isinstance(params, (list, tuple)) else params
+        return {'rows': len(rows), 'row': params_shape(rows[0]) if rows else None}
+    if isinstance(params, dict):
+        return {key: _value_shape(value) for key, value in params.items()}
+    return [_value_shape(value) for value in params]
+
+
+def _project_frame(filename):
+    base = str(settings.BASE_DIR)
+    return (filename.startswith(base) and 'site-packages' not in filename
+            and filename != __file__ and os.sep + 'migrations' + os.sep not in filename)
+
+
+def query_origin():
+    """``path:line in function`` of the innermost project frame running the query"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _project_frame(filename):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """The query plan of ``sql`` as text lines, or ``None`` if the backend has none"""
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    else:
+        return None
+    # A raw backend cursor: the plan query is not timed, counted or logged
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if connection.vendor == 'sqlite':
+        # (id, parent, unused, detail): indent each step under its parent
+        depth = {0: -1}
+        lines = []
+        for step, parent, _, detail in rows:
+            depth[step] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[step] + detail)
+        return lines
+    return [row[0] for row in rows]
+
+
+def threshold():
+    """Seconds from which a query is slow, or ``None`` when disabled"""
+    milliseconds = getattr(settings, 'SLOW_QUERY_MS', -1)
+    return None if milliseconds < 0 else milliseconds / 1000
+
+
+class SlowQueryLog:
+    """The ``execute_wrapper`` that records slow statements"""
+
+    def __init__(self, size=500):
+        self.entries = deque(maxlen=size)
+        self.plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        limit = threshold()
+        if limit is None:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= limit:
+            try:
+                self.record(context['connection'], sql, params, many, duration)
+            except Exception:
+                logger.exception('Could not record a slow query')
+        return result
+
+    def record(self, connection, sql, params, many, duration):
+        key = fingerprint(sql)
+        with self._lock:
+            first = key not in self.plans
+            if first:
+                self.plans[key] = None
+                if len(self.plans) > MAX_PLANS:
+                    self.plans.popitem(last=False)
+            else:
+                self.plans.move_to_end(key)
+        entry = {
+            'fingerprint': key,
+            'sql': sql,
+            'params': params_shape(params, many),
+            'duration_ms': round(duration * 1000, 2),
+            'alias': connection.alias,
+            'view': current_view.get(),
+            'origin': query_origin(),
+        }
+        if first and not many and getattr(settings, 'SLOW_QUERY_EXPLAIN', True) and _EXPLAINABLE.match(sql):
+            try:
+                entry['plan'] = self.plans[key] = explain(connection, sql, params)
+            except Exception as exc:
+                entry['plan'] = [f'EXPLAIN failed: {exc}']
+        self.entries.append(entry)
+        logger.warning('Slow query (%.1f ms) %s', entry['duration_ms'], key, extra=entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.plans.clear()
+
+
+slow_query_log = SlowQueryLog(getattr(settings, 'SLOW_QUERY_BUFFER', 500))
+
+
+def _connection_created(sender, connection, **kwargs):
+    # Outermost, and first in the list: ``execute_wrapper()`` blocks that
+    # are open while the connection is made pop the last item on exit
+    if slow_query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_log)
+
+
+def install():
+    """Add ``slow_query_log`` to every connection opened from now on"""
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_connection_created, dispatch_uid='slow-query-log')
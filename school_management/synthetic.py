@@ -0,0 +1,529 @@
+"""
+Deterministic synthetic data for load and scaling tests.
+
+``manage.py generate_data`` fills the database with users and profiles,
+admission applications (with their search index) and contact messages,
+drawn from realistic distributions:
+
+* names, phone numbers and towns from Ghana; birthplaces and home towns
+  weighted by regional population (2021 census), with the Ashanti
+  region over-represented since the school is in Kumasi,
+* the class stage applied from, and an age to match it,
+* application and message dates over ``years`` years up to ``end``,
+  heavier from May to September, on weekdays and in working hours, with
+  spikes on the days admissions open, results come out and school
+  reopens,
+* a status mix that depends on age: recent applications and messages
+  are mostly still pending / new.
+
+Rows are generated in batches of ``batch_size``. Each batch draws from
+its own ``random.Random`` seeded with ``(seed, table, batch number)`` and
+has a fixed range of primary keys, so the same seed and end date give
+the same rows whatever the number of worker processes and the order in
+which batches are written. (Search token rows get their ids from the
+database and may be numbered in a different order.)
+
+Batches are written with ``executemany`` on a prepared ``INSERT``
+(``execute_values`` on PostgreSQL), not ``Model.save()`` or
+``bulk_create``: on SQLite ``bulk_create`` is limited to about 90 rows
+per statement by the 999 parameter limit, and it would overwrite the
+generated ``auto_now_add`` timestamps. Signals are not sent. What the
+signals and ``save()`` would have done is done here instead: every
+user gets a profile, applications get their duplicate detection keys,
+``search_text`` and search tokens, and the response caches are
+invalidated at the end (``finish``).
+
+Generating rows costs more CPU than SQLite spends inserting them, so
+batches are generated in forked worker processes while SQLite takes the
+writes one transaction at a time.
+"""
+import multiprocessing
+import random
+import time
+from bisect import bisect
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from admissions.duplicates import duplicate_keys, soundex
+from admissions.models import AdmissionApplication, ApplicationSearchToken
+from admissions.search import build_search_text
+from contact.models import ContactMessage
+from users.models import UserProfile
+
+from .caching import invalidate
+
+
+# (region, population in millions, towns)
+REGIONS = (
+    ('Greater Accra', 5.46, ('Accra', 'Tema', 'Madina', 'Teshie', 'Ashaiman', 'Dodowa')),
+    ('Ashanti', 5.44, ('Kumasi', 'Obuasi', 'Ejisu', 'Konongo', 'Mampong', 'Bekwai')),
+    ('Eastern', 2.93, ('Koforidua', 'Nkawkaw', 'Akim Oda', 'Nsawam', 'Suhum')),
+    ('Central', 2.86, ('Cape Coast', 'Kasoa', 'Winneba', 'Mankessim', 'Saltpond')),
+    ('Northern', 2.31, ('Tamale', 'Yendi', 'Savelugu')),
+    ('Western', 2.06, ('Sekondi-Takoradi', 'Tarkwa', 'Axim')),
+    ('Volta', 1.66, ('Ho', 'Keta', 'Hohoe', 'Aflao')),
+    ('Upper East', 1.30, ('Bolgatanga', 'Navrongo', 'Bawku')),
+    ('Bono', 1.21, ('Sunyani', 'Berekum', 'Dormaa Ahenkro')),
+    ('Bono East', 1.20, ('Techiman', 'Kintampo', 'Atebubu')),
+    ('Upper West', 0.90, ('Wa', 'Tumu', 'Lawra')),
+    ('Western North', 0.88, ('Sefwi Wiawso', 'Bibiani', 'Enchi')),
+    ('Oti', 0.74, ('Dambai', 'Jasikan', 'Nkwanta')),
+    ('North East', 0.66, ('Nalerigu', 'Walewale', 'Gambaga')),
+    ('Savannah', 0.65, ('Damongo', 'Bole', 'Salaga')),
+    ('Ahafo', 0.56, ('Goaso', 'Bechem', 'Kenyasi')),
+)
+# Extra weight for the school's own region
+HOME_REGION, HOME_REGION_BONUS = 'Ashanti', 4.0
+KUMASI_SUBURBS = ('Asokwa', 'Bantama', 'Suame', 'Kwadaso', 'Tafo', 'Ayigya', 'Atonsu', 'Santasi',
+                  'Oforikrom', 'Ahodwo', 'Nhyiaeso', 'Abuakwa')
+
+SURNAMES = ('MENSAH', 'OWUSU', 'BOATENG', 'ASANTE', 'OSEI', 'AGYEMAN', 'APPIAH', 'ADDO', 'AMOAH', 'OFORI',
+            'DARKO', 'QUAYE', 'TETTEH', 'ADJEI', 'ANNAN', 'ACHEAMPONG', 'DANSO', 'FRIMPONG', 'GYAMFI',
+            'YEBOAH', 'SARPONG', 'OPOKU', 'BONSU', 'AMPONSAH', 'ABUBAKAR', 'MAHAMA', 'ISSAH', 'YAKUBU',
+            'DERY', 'KPODO', 'AGBEKO', 'ANSAH', 'ASARE', 'BAAH', 'KYEI', 'NKANSAH', 'ANTWI', 'ABOAGYE',
+            'KUMI', 'DONKOR', 'ASAMOAH', 'OWUSU-ANSAH', 'BADU', 'AMANKWAH', 'SEKYERE', 'ADOMAKO')
+MALE_NAMES = ('Kofi', 'Kwame', 'Kwaku', 'Kwabena', 'Kwadwo', 'Yaw', 'Kwesi', 'Kojo', 'Kobby', 'Nana',
+              'Emmanuel', 'Samuel', 'Daniel', 'Isaac', 'Prince', 'Richard', 'Michael', 'Joseph', 'Ibrahim',
+              'Abdul', 'Selorm', 'Elikem', 'Nii', 'Fiifi', 'Kelvin', 'Caleb', 'Jeremiah', 'Bright')
+FEMALE_NAMES = ('Ama', 'Akua', 'Abena', 'Adwoa', 'Afua', 'Yaa', 'Esi', 'Efua', 'Akosua', 'Adjoa', 'Serwaa',
+                'Abigail', 'Priscilla', 'Gifty', 'Mercy', 'Grace', 'Comfort', 'Patience', 'Esther', 'Ruth',
+                'Mavis', 'Sena', 'Dzifa', 'Naa', 'Aisha', 'Fatima', 'Nhyira', 'Maame', 'Barbara', 'Linda')
+PHONE_PREFIXES = ('024', '054', '055', '059', '020', '050', '027', '057', '026', '053')
+EMAIL_DOMAINS = ('gmail.com', 'gmail.com', 'gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com')
+
+# (class applied from, typical age, share of applications)
+CLASS_STAGES = (
+    ('Creche', 2, 4), ('Nursery 1', 3, 10), ('Nursery 2', 4, 12), ('KG 1', 5, 16), ('KG 2', 6, 26),
+    ('Primary 1', 7, 12), ('Primary 2', 8, 9), ('Primary 3', 9, 6), ('Primary 4', 10, 5),
+)
+OCCUPATIONS = ('Trader', 'Teacher', 'Nurse', 'Farmer', 'Driver', 'Civil Servant', 'Seamstress', 'Mechanic',
+               'Accountant', 'Banker', 'Pastor', 'Engineer', 'Hairdresser', 'Police Officer', 'Carpenter')
+DENOMINATIONS = ('Methodist', 'Presbyterian', 'Catholic', 'Pentecost', 'Anglican', 'SDA', 'Charismatic',
+                 'Muslim', None)
+HOBBIES = ('Football', 'Reading', 'Singing', 'Drawing', 'Dancing', 'Ampe', 'Swimming', None, None)
+LAST_SCHOOLS = ('Kumasi Preparatory School', 'Bantama M/A Basic', 'Happy Kids Montessori', 'Ridge Academy',
+                'Suame Methodist Basic', 'Tafo Presby Basic', None, None)
+MESSAGES = (
+    'When do admissions open for {stage}?',
+    'Please what are the school fees for {stage} this term?',
+    'I would like to know if there is space in {stage} for my ward.',
+    'Do you run a school bus from {town}?',
+    'When will the end of term results be released?',
+    'Can we visit the school on open day?',
+    'My child has an allergy; please advise on the feeding programme.',
+    'Where can I buy the school uniform?',
+    'I submitted an application for {stage} but have not heard back.',
+    'Thank you for the warm reception at the PTA meeting.',
+)
+USER_AGENTS = (
+    'Mozilla/5.0 (Linux; Android 12; TECNO KG5) AppleWebKit/537.36 Chrome/118.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 13; SM-A145F) AppleWebKit/537.36 Chrome/119.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 Version/16.6 Mobile Safari',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/119.0 Safari/537.36',
+    None,
+)
+# (role, share, is_staff, department)
+ROLES = (('parent', 70, False, None), ('student', 15, False, None), ('teacher', 10, True, 'Academics'),
+         ('staff', 4, True, 'Administration'), ('admin', 1, True, 'Administration'))
+
+MONTH_WEIGHTS = (1.0, 0.8, 0.9, 1.2, 1.6, 2.2, 2.8, 3.0, 2.4, 1.0, 0.8, 0.6)
+WEEKDAY_WEIGHTS = (1.2, 1.2, 1.1, 1.1, 1.0, 0.7, 0.4)
+# (month, day, multiplier): admissions open, results day, school reopens
+SPIKE_DAYS = ((6, 2, 6.0), (8, 15, 5.0), (9, 9, 4.0))
+HOUR_WEIGHTS = (1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 12, 12, 12, 11, 10, 9, 9, 8, 6, 4, 2, 1)
+
+# status -> (share when recent, share when old)
+APPLICATION_STATUSES = {'pending': (70, 3), 'reviewed': (15, 7), 'accepted': (10, 65), 'rejected': (5, 25)}
+MESSAGE_STATUSES = {'new': (60, 2), 'read': (25, 18), 'replied': (12, 60), 'archived': (3, 20)}
+RECENT_SECONDS = 30 * 86400
+
+
+def _cumulative(weights):
+    return list(accumulate(weights))
+
+
+class Calendar:
+    """Seasonal timestamps (Unix seconds, UTC) over ``years`` years up to ``end``"""
+
+    def __init__(self, end, years):
+        first = end - timedelta(days=round(365.25 * years))
+        self.end = int(datetime(end.year, end.month, end.day, tzinfo=timezone.utc).timestamp()) + 86400
+        days, weights = [], []
+        day = first
+        while day <= end:
+            weight = MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()]
+            for month, day_of_month, multiplier in SPIKE_DAYS:
+                if (day.month, day.day) == (month, day_of_month):
+                    weight *= multiplier
+            days.append(int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()))
+            weights.append(weight)
+            day += timedelta(days=1)
+        self.days = days
+        self.day_weights = _cumulative(weights)
+        self.hours = [hour * 3600 for hour in range(24)]
+        self.hour_weights = _cumulative(HOUR_WEIGHTS)
+
+    def sample(self, rng, count):
+        days = rng.choices(self.days, cum_weights=self.day_weights, k=count)
+        hours = rng.choices(self.hours, cum_weights=self.hour_weights, k=count)
+        seconds = rng.random
+        return [day + hour + int(seconds() * 3600) for day, hour in zip(days, hours)]
+
+
+class Formatter:
+    """
+    Database parameter values for timestamps: strings put together from
+    cached day and ``HH:MM`` parts, much cheaper than a ``datetime`` per value
+    """
+
+    def __init__(self, vendor):
+        suffix = '+00:00' if vendor == 'postgresql' else ''
+        self._days = {}
+        self._minutes = [f'{minute // 60:02d}:{minute % 60:02d}' for minute in range(1440)]
+        self._seconds = [f':{second:02d}{suffix}' for second in range(60)]
+
+    def date(self, seconds):
+        day = seconds - seconds % 86400
+        text = self._days.get(day)
+        if text is None:
+            text = self._days[day] = datetime.fromtimestamp(day, timezone.utc).strftime('%Y-%m-%d')
+        return text
+
+    def datetime(self, seconds):
+        if seconds is None:
+            return None
+        rest = seconds % 86400
+        return f'{self.date(seconds)} {self._minutes[rest // 60]}{self._seconds[rest % 60]}'
+
+
+class TableWriter:
+    """A prepared multi-row ``INSERT`` of ``columns`` (field names) into ``model``'s table"""
+
+    def __init__(self, model, columns, connection):
+        quote = connection.ops.quote_name
+        names = ', '.join(quote(model._meta.get_field(name).column) for name in columns)
+        self.connection = connection
+        self.table = quote(model._meta.db_table)
+        self.sql = f'INSERT INTO {self.table} ({names}) VALUES ({", ".join(["%s"] * len(columns))})'
+        self.values_sql = f'INSERT INTO {self.table} ({names}) VALUES %s'
+
+    def write(self, rows):
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                # One statement per page instead of one round trip per row
+                from psycopg2.extras import execute_values
+                execute_values(cursor.cursor, self.values_sql, rows, page_size=1000)
+            else:
+                cursor.executemany(self.sql, rows)
+
+
+class Generator:
+    """
+    Builds the rows of one batch. Everything random comes from the batch's
+    own ``Random``, drawn a column at a time (``choices(k=...)`` and
+    ``random()``), which is several times faster than a call per value.
+    """
+
+    def __init__(self, seed, end, years, vendor):
+        self.seed = seed
+        self.calendar = Calendar(end, years)
+        self.format = Formatter(vendor)
+        self.places, weights = [], []
+        for region, population, towns in REGIONS:
+            weight = population * (HOME_REGION_BONUS if region == HOME_REGION else 1) / len(towns)
+            for town in towns:
+                self.places.append((region, town))
+                weights.append(weight)
+        self.place_weights = _cumulative(weights)
+        self.stage_weights = _cumulative(weight for _, _, weight in CLASS_STAGES)
+        self.role_weights = _cumulative(share for _, share, _, _ in ROLES)
+        self.title_surnames = [surname.title() for surname in SURNAMES]
+
+    def random(self, table, batch):
+        return random.Random(f'{self.seed}:{table}:{batch}')
+
+    def phones(self, rng, count):
+        prefixes = rng.choices(PHONE_PREFIXES, k=count)
+        number = rng.random
+        return [f'{prefix}{int(number() * 10_000_000):07d}' for prefix in prefixes]
+
+    def statuses(self, rng, statuses, created):
+        """A status per ``created`` timestamp, from the recent or the old mix"""
+        names = list(statuses)
+        recent = _cumulative(shares[0] for shares in statuses.values())
+        old = _cumulative(shares[1] for shares in statuses.values())
+        cutoff = self.calendar.end - RECENT_SECONDS
+        draw = rng.random
+        chosen = []
+        for when in created:
+            weights = recent if when >= cutoff else old
+            chosen.append(names[bisect(weights, draw() * weights[-1])])
+        return chosen
+
+    def later(self, rng, times, least, most):
+        """A time between ``least`` and ``most`` seconds after each of ``times``, capped at the end date"""
+        draw = rng.random
+        last = self.calendar.end - 1
+        return [min(when + least + int(draw() * (most - least)), last) for when in times]
+
+    def user_rows(self, batch, first_id, count, first_profile_id):
+        rng = self.random('users', batch)
+        dt = self.format.datetime
+        joined = [dt(when) for when in self.calendar.sample(rng, count)]
+        roles = rng.choices(ROLES, cum_weights=self.role_weights, k=count)
+        first_names = rng.choices(MALE_NAMES + FEMALE_NAMES, k=count)
+        surnames = rng.choices(self.title_surnames, k=count)
+        domains = rng.choices(EMAIL_DOMAINS, k=count)
+        suburbs = rng.choices(KUMASI_SUBURBS, k=count)
+        phones = self.phones(rng, count)
+        users, profiles = [], []
+        for offset in range(count):
+            pk = first_id + offset
+            role, _, is_staff, department = roles[offset]
+            first_name, surname = first_names[offset], surnames[offset]
+            # '!' marks an unusable password, as set_unusable_password() does
+            users.append((pk, f'!{rng.getrandbits(128):032x}', None, False, f'{first_name}.{surname}.{pk}'.lower(),
+                          first_name, surname, f'{first_name}.{surname}{pk}@{domains[offset]}'.lower(), is_staff,
+                          True, joined[offset]))
+            profiles.append((first_profile_id + offset, pk, role, phones[offset], f'{suburbs[offset]}, Kumasi', None,
+                             None, department, f'LHE{pk:05d}' if is_staff else None, joined[offset], joined[offset]))
+        return users, profiles
+
+    def application_rows(self, batch, first_id, count, reviewer_ids):
+        rng = self.random('applications', batch)
+        dt, day = self.format.datetime, self.format.date
+        draw = rng.random
+        created = self.calendar.sample(rng, count)
+        stages = rng.choices(CLASS_STAGES, cum_weights=self.stage_weights, k=count)
+        births = rng.choices(self.places, cum_weights=self.place_weights, k=count)
+        homes = rng.choices(self.places, cum_weights=self.place_weights, k=count)
+        surnames = rng.choices(SURNAMES, k=count)
+        boys, girls = rng.choices(MALE_NAMES, k=count), rng.choices(FEMALE_NAMES, k=count)
+        fathers, mothers = rng.choices(MALE_NAMES, k=count), rng.choices(FEMALE_NAMES, k=count)
+        mother_surnames = rng.choices(self.title_surnames, k=count)
+        occupations = rng.choices(OCCUPATIONS, k=2 * count)
+        denominations = rng.choices(DENOMINATIONS, k=count)
+        hobbies = rng.choices(HOBBIES, k=count)
+        last_schools = rng.choices(LAST_SCHOOLS, k=count)
+        suburbs = rng.choices(KUMASI_SUBURBS, k=count)
+        phones = self.phones(rng, 2 * count)
+        statuses = self.statuses(rng, APPLICATION_STATUSES, created)
+        reviewed = self.later(rng, created, 3600, 21 * 86400)
+        reviewers = rng.choices(reviewer_ids, k=count) if reviewer_ids else [None] * count
+        applications, tokens = [], []
+        for offset in range(count):
+            pk = first_id + offset
+            stage, age, _ = stages[offset]
+            age += draw() < 0.3
+            date_of_birth = day(created[offset] - age * 31_557_600 - int(draw() * 31_557_600))
+            female = draw() < 0.5
+            surname = surnames[offset]
+            first_name = girls[offset] if female else boys[offset]
+            father = f'{fathers[offset]} {surname.title()}' if draw() < 0.85 else None
+            mother = f'{mothers[offset]} {mother_surnames[offset]}' if draw() < 0.95 else None
+            status = statuses[offset]
+            created_at = dt(created[offset])
+            reviewed_date = None if status == 'pending' else dt(reviewed[offset])
+            row = {
+                'id': pk, 'surname': surname, 'first_name': first_name,
+                'other_names': (boys if female else girls)[count - offset - 1] if draw() < 0.4 else None,
+                'date_of_birth': date_of_birth, 'age': age, 'gender': 'female' if female else 'male',
+                'place_of_birth': births[offset][1], 'region_of_birth': births[offset][0],
+                'home_town': homes[offset][1], 'region_of_home_town': homes[offset][0],
+                'last_school_attended': last_schools[offset], 'location_of_last_school': 'Kumasi',
+                'class_before_admission': stage, 'religious_denomination': denominations[offset],
+                'hobbies': hobbies[offset], 'disability_or_allergy': 'Peanut allergy' if draw() < 0.03 else None,
+                'father_name': father, 'mother_name': mother,
+                'father_occupation': occupations[offset] if father else None,
+                'mother_occupation': occupations[count + offset] if mother else None,
+                'father_contact': phones[offset] if father else None,
+                'mother_contact': phones[count + offset] if mother else None,
+                'father_email': f'{fathers[offset]}.{surname}{pk}@gmail.com'.lower()
+                if father and draw() < 0.4 else None,
+                'mother_email': None,
+                'postal_address': f'P.O. Box {1 + int(draw() * 9999)}, Kumasi',
+                'place_of_residence': suburbs[offset],
+                'house_number': f'{"ABCDEFGH"[int(draw() * 8)]}{1 + int(draw() * 400)}' if draw() < 0.6 else None,
+                'status': status, 'application_date': created_at, 'reviewed_date': reviewed_date,
+                'reviewed_by': None if reviewed_date is None else reviewers[offset], 'notes': None,
+                'possible_duplicate_of': None, 'created_at': created_at, 'updated_at': reviewed_date or created_at,
+            }
+            row['normalized_name'], row['surname_block_key'], row['first_name_block_key'] = duplicate_keys(
+                surname, first_name, date_of_birth
+            )
+            search_text = row['search_text'] = build_search_text(_Fields(row))
+            applications.append(tuple(row[name] for name in APPLICATION_COLUMNS))
+            tokens.extend((pk, token, '' if token.isdigit() else soundex(token)) for token in search_text.split())
+        return applications, tokens
+
+    def message_rows(self, batch, first_id, count):
+        rng = self.random('messages', batch)
+        dt = self.format.datetime
+        draw = rng.random
+        created = self.calendar.sample(rng, count)
+        first_names = rng.choices(MALE_NAMES + FEMALE_NAMES, k=count)
+        surnames = rng.choices(self.title_surnames, k=count)
+        domains = rng.choices(EMAIL_DOMAINS, k=count)
+        templates = rng.choices(MESSAGES, k=count)
+        stages = rng.choices(CLASS_STAGES, k=count)
+        suburbs = rng.choices(KUMASI_SUBURBS, k=count)
+        agents = rng.choices(USER_AGENTS, k=count)
+        statuses = self.statuses(rng, MESSAGE_STATUSES, created)
+        read = self.later(rng, created, 600, 3 * 86400)
+        replied = self.later(rng, read, 600, 2 * 86400)
+        rows = []
+        for offset in range(count):
+            pk = first_id + offset
+            first_name, surname, status = first_names[offset], surnames[offset], statuses[offset]
+            created_at = dt(created[offset])
+            read_at = None if status == 'new' else dt(read[offset])
+            replied_at = dt(replied[offset]) if status in ('replied', 'archived') else None
+            ip_address = None
+            if draw() < 0.9:
+                ip_address = f'41.{66 + int(draw() * 14)}.{int(draw() * 256)}.{1 + int(draw() * 254)}'
+            rows.append((
+                pk, f'{first_name} {surname}', f'{first_name}.{surname}{pk}@{domains[offset]}'.lower(),
+                templates[offset].format(stage=stages[offset][0], town=suburbs[offset]), status, ip_address,
+                agents[offset], created_at, replied_at or read_at or created_at, read_at, replied_at,
+            ))
+        return rows
+
+
+class _Fields:
+    """Attribute access to a row dict, for ``build_search_text``"""
+
+    def __init__(self, row):
+        self.__dict__ = row
+
+
+USER_COLUMNS = ('id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name', 'email',
+                'is_staff', 'is_active', 'date_joined')
+PROFILE_COLUMNS = ('id', 'user', 'role', 'phone_number', 'address', 'date_of_birth', 'profile_picture',
+                   'department', 'employee_id', 'created_at', 'updated_at')
+APPLICATION_COLUMNS = tuple(field.name for field in AdmissionApplication._meta.concrete_fields)
+TOKEN_COLUMNS = ('application', 'token', 'phonetic')
+MESSAGE_COLUMNS = ('id', 'name', 'email', 'message', 'status', 'ip_address', 'user_agent', 'created_at',
+                   'updated_at', 'read_at', 'replied_at')
+
+TABLES = {
+    'users': (User, USER_COLUMNS),
+    'profiles': (UserProfile, PROFILE_COLUMNS),
+    'applications': (AdmissionApplication, APPLICATION_COLUMNS),
+    'tokens': (ApplicationSearchToken, TOKEN_COLUMNS),
+    'messages': (ContactMessage, MESSAGE_COLUMNS),
+}
+# Written because of another table's rows (a profile per user, index rows
+# per application), not requested in ``counts``
+DERIVED_TABLES = ('profiles', 'tokens')
+
+
+def next_id(model, using):
+    last = model._default_manager.using(using).order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def plan(kind, total, first_id, batch_size, **extra):
+    """The batches of one kind: ``(kind, batch number, first id, count, extra)``"""
+    return [
+        (kind, number, first_id + start, min(batch_size, total - start), extra)
+        for number, start in enumerate(range(0, total, batch_size))
+    ]
+
+
+def write_batch(job, generator, using):
+    """Generate and insert one batch; return ``{table: rows written}``"""
+    kind, number, first_id, count, extra = job
+    connection = connections[using]
+    if kind == 'users':
+        first_profile_id = extra['first_profile_id'] + first_id - extra['first_user_id']
+        users, profiles = generator.user_rows(number, first_id, count, first_profile_id)
+        tables = {'users': users, 'profiles': profiles}
+    elif kind == 'applications':
+        applications, tokens = generator.application_rows(number, first_id, count, extra['reviewer_ids'])
+        tables = {'applications': applications, 'tokens': tokens}
+    else:
+        tables = {'messages': generator.message_rows(number, first_id, count)}
+    with transaction.atomic(using=using):
+        for table, rows in tables.items():
+            model, columns = TABLES[table]
+            TableWriter(model, columns, connection).write(rows)
+    return {table: len(rows) for table, rows in tables.items()}
+
+
+def finish(using):
+    """What the bypassed signals would have done once the rows are in"""
+    connection = connections[using]
+    # Explicit ids leave PostgreSQL sequences behind the data
+    statements = connection.ops.sequence_reset_sql(no_style(), [model for model, _ in TABLES.values()])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    invalidate('users', 'admissions', 'contact', using=using)
+
+
+_generator = None
+
+
+def _start_worker(generator):
+    global _generator
+    _generator = generator
+
+
+def _run(job):
+    return write_batch(job[1], _generator, job[0])
+
+
+def generate(counts, seed=0, end=None, years=3, batch_size=10_000, workers=1, using='default', progress=None):
+    """
+    Insert ``counts['users']`` users (with profiles), ``counts['applications']``
+    applications and ``counts['messages']`` contact messages; return
+    ``{table: rows}`` and the seconds taken.
+
+    Users go first, so applications can be reviewed by the staff among
+    them. Batches run in ``workers`` forked processes (``1`` runs them in
+    this one); each calls ``progress(rows_by_table)`` in this process when
+    written.
+    """
+    end = end or date.today()
+    generator = Generator(seed, end, years, connections[using].vendor)
+    totals = dict.fromkeys(TABLES, 0)
+    started = time.perf_counter()
+
+    def record(written):
+        for table, rows in written.items():
+            totals[table] += rows
+        if progress is not None:
+            progress(written)
+
+    def batches(kind):
+        total = counts.get(kind, 0)
+        if kind == 'users':
+            first_id = next_id(User, using)
+            return plan(kind, total, first_id, batch_size, first_user_id=first_id,
+                        first_profile_id=next_id(UserProfile, using))
+        if kind == 'applications':
+            reviewer_ids = list(
+                User.objects.using(using).filter(is_staff=True).order_by('pk').values_list('pk', flat=True)
+            )
+            return plan(kind, total, next_id(AdmissionApplication, using), batch_size, reviewer_ids=reviewer_ids)
+        return plan(kind, total, next_id(ContactMessage, using), batch_size)
+
+    for kind in ('users', 'applications', 'messages'):
+        jobs = batches(kind)
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                record(write_batch(job, generator, using))
+            continue
+        # Forked workers open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers, initializer=_start_worker, initargs=(generator,)) as pool:
+            for written in pool.imap_unordered(_run, [(using, job) for job in jobs]):
+                record(written)
+    finish(using)
+    return totals, time.perf_counter() - started
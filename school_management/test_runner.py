@@ -0,0 +1,53 @@
+"""
+Test runner that keeps test runs off the project's shared state.
+
+``manage.py test`` loads the same settings as the site, so without this
+its requests would read and write the on-disk caches, metrics and log
+files every worker shares. For the whole run ``TestRunner`` swaps in:
+
+* per-process locmem caches for ``default`` and ``sessions``,
+* a temporary ``METRICS_DIR`` and ``LOG_DIR`` (the ``LOGGING`` handlers
+  are rebuilt to write there), removed when the run ends.
+"""
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.utils.log import configure_logging
+
+from school_management.metrics import registry
+
+
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'sessions')
+}
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.directory = tempfile.TemporaryDirectory(prefix='school_management-test-')
+        log_dir = Path(self.directory.name) / 'logs'
+        handlers = {
+            name: {**handler, 'filename': log_dir / Path(handler['filename']).name} if 'filename' in handler else handler
+            for name, handler in settings.LOGGING.get('handlers', {}).items()
+        }
+        self.isolated_settings = override_settings(
+            CACHES=TEST_CACHES, METRICS_DIR=f'{self.directory.name}/metrics', LOG_DIR=log_dir,
+            LOGGING={**settings.LOGGING, 'handlers': handlers},
+        )
+        self.isolated_settings.enable()
+        configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+
+    def teardown_test_environment(self, **kwargs):
+        # Nothing the tests recorded is left for the exit flush to write to the real METRICS_DIR
+        registry.reset()
+        self.isolated_settings.disable()
+        # Closes the temporary handlers, which write out what they still hold
+        configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+        self.directory.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,335 @@
+"""
+Request tracing with nested spans, written as OTLP JSON.
+
+``TracingMiddleware`` (at the top of ``MIDDLEWARE``) starts a trace per
+request, continuing the caller's trace when a W3C ``traceparent`` header
+is sent. A sampled request records nested spans for:
+
+``middleware``       the middleware stack, until the view is called
+``view <url name>``  the view, with ``TracingMixin`` adding
+                     ``check_permissions``/``get_permissions``,
+                     ``get_queryset``/``filter_queryset`` and
+                     ``paginate_queryset`` spans on ViewSets
+``serialize``        list serialization, and ``to_representation`` of
+                     serializers using ``TracedRepresentationMixin``
+``db.query``         every SQL statement (an ``execute_wrapper``
+                     installed on every connection)
+``signal ...``       signal receivers decorated with ``@traced``
+``render``           turning the response into bytes
+
+Sampling: a request is traced when its ``traceparent`` says the caller
+sampled it, otherwise with probability ``TRACING_SAMPLE_RATE``. Requests
+that are not sampled only carry the trace id (for the access log).
+
+A sampled trace is written when its request ends, as one
+``ExportTraceServiceRequest`` JSON object per line in
+``logs/traces.jsonl`` (the OpenTelemetry Collector's ``otlpjsonfile``
+receiver reads it as is). ``manage.py trace_report`` prints a trace as
+a tree, or as folded stacks for flame graph tools.
+"""
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+from .profiling import url_name
+
+
+logger = logging.getLogger('school_management.traces')
+
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_ERROR = 2
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = contextvars.ContextVar('current_span', default=None)
+
+
+def _random_id(bits):
+    value = 0
+    while not value:
+        value = random.getrandbits(bits)
+    return f'{value:0{bits // 4}x}'
+
+
+def parse_traceparent(header):
+    """Return ``(trace id, parent span id, sampled)``, or ``None`` for a missing or invalid header"""
+    match = TRACEPARENT.match((header or '').strip().lower())
+    if match is None or match[1] == '0' * 32 or match[2] == '0' * 16:
+        return None
+    return match[1], match[2], bool(int(match[3], 16) & 1)
+
+
+class Trace:
+    """The spans of one request; only a sampled trace records any"""
+
+    __slots__ = ('trace_id', 'sampled', 'spans', 'dropped', 'finished')
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+        self.dropped = 0
+        self.finished = False
+
+    def start_span(self, name, parent_id, kind=KIND_INTERNAL, attributes=None, start=None):
+        span = Span(self, name, parent_id, kind, attributes, start)
+        if self.finished or len(self.spans) >= getattr(settings, 'TRACING_MAX_SPANS', 2000):
+            self.dropped += 1
+        else:
+            self.spans.append(span)
+        return span
+
+    def to_otlp(self):
+        """The trace as an OTLP/JSON ``ExportTraceServiceRequest``"""
+        return {'resourceSpans': [{
+            'resource': {'attributes': _attributes({
+                'service.name': getattr(settings, 'TRACING_SERVICE_NAME', 'school-management'),
+            })},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in self.spans if span.end is not None],
+            }],
+        }]}
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, trace, name, parent_id, kind=KIND_INTERNAL, attributes=None, start=None):
+        self.trace = trace
+        self.span_id = _random_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns() if start is None else start
+        self.end = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def child(self, name, kind=KIND_INTERNAL, attributes=None, start=None):
+        return self.trace.start_span(name, self.span_id, kind, attributes, start)
+
+    def finish(self, end=None):
+        if self.end is None:
+            self.end = time.time_ns() if end is None else end
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': _attributes(self.attributes),
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error is not None:
+            span['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return span
+
+
+def _attributes(values):
+    attributes = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        attributes.append({'key': key, 'value': typed})
+    return attributes
+
+
+def current_span():
+    """The innermost open span of a sampled trace, or ``None``"""
+    span = _current.get()
+    return span if span is not None and span.trace.sampled else None
+
+
+def current_trace_id():
+    span = _current.get()
+    return span.trace.trace_id if span is not None else None
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """Record the block as a child of the current span (a no-op when not sampled)"""
+    parent = current_span()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.error = f'{type(exc).__name__}: {exc}'
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def traced(name=None):
+    """Decorator form of ``span``, named after the function by default"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_span() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_query(execute, sql, params, many, context):
+    """``execute_wrapper`` recording each statement as a ``db.query`` span"""
+    if current_span() is None:
+        return execute(sql, params, many, context)
+    connection = context['connection']
+    with span('db.query', KIND_CLIENT, **{
+        'db.system': connection.vendor,
+        'db.name': connection.alias,
+        'db.statement': sql[:2000],
+        'db.executemany': many,
+    }):
+        return execute(sql, params, many, context)
+
+
+def _connection_created(sender, connection, **kwargs):
+    # First in the list, like the slow query log (see slowlog._connection_created)
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, trace_query)
+
+
+def install():
+    """Add ``trace_query`` to every connection opened from now on"""
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_connection_created, dispatch_uid='tracing')
+
+
+class TracingMiddleware:
+    """Start (or continue) a trace per request and export the sampled ones"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        parent = parse_traceparent(request.headers.get('traceparent'))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = _random_id(128), None
+            sampled = random.random() < getattr(settings, 'TRACING_SAMPLE_RATE', 0.0)
+        trace = Trace(trace_id, sampled)
+        root = request.trace_span = trace.start_span(request.method, parent_id, KIND_SERVER, {
+            'http.method': request.method,
+            'http.target': request.path,
+        })
+        token = _current.set(root)
+        try:
+            response = self.get_response(request)
+        except BaseException as exc:
+            root.error = f'{type(exc).__name__}: {exc}'
+            raise
+        else:
+            root.attributes['http.status_code'] = response.status_code
+            if response.status_code >= 500:
+                root.error = f'HTTP {response.status_code}'
+            return response
+        finally:
+            _current.reset(token)
+            self.finish(request, trace, root)
+
+    def finish(self, request, trace, root):
+        view = getattr(request, '_trace_view', None)
+        if view is not None:
+            view.finish()
+        route = url_name(request)
+        root.name = f'{request.method} {route}'
+        root.attributes['http.route'] = route
+        root.finish()
+        trace.finished = True
+        if trace.sampled and trace.spans:
+            if trace.dropped:
+                root.attributes['spans.dropped'] = trace.dropped
+            logger.info('Trace %s', trace.trace_id, extra={'trace': trace})
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        root = request.trace_span
+        if not root.trace.sampled:
+            return
+        root.child('middleware', start=root.start).finish()
+        # The view span stays current until the response is returned
+        request._trace_view = root.child(f'view {url_name(request)}')
+        _current.set(request._trace_view)
+
+    def process_template_response(self, request, response):
+        view = getattr(request, '_trace_view', None)
+        if view is not None:
+            view.finish()
+            render = request.trace_span.child('render')
+            _current.set(render)
+            response.add_post_render_callback(lambda response: render.finish())
+        return response
+
+
+class TracingMixin:
+    """
+    Spans for the permission and queryset steps of a ViewSet. ViewSets
+    override ``get_permissions`` without calling ``super()``, so it is
+    timed from ``check_permissions`` (DRF's loop, with spans).
+    """
+
+    def check_permissions(self, request):
+        if current_span() is None:
+            return super().check_permissions(request)
+        with span('check_permissions', **{'view.action': str(self.action)}):
+            with span('get_permissions'):
+                permissions = self.get_permissions()
+            for permission in permissions:
+                if not permission.has_permission(request, self):
+                    self.permission_denied(
+                        request, message=getattr(permission, 'message', None), code=getattr(permission, 'code', None)
+                    )
+
+    def get_queryset(self):
+        with span('get_queryset'):
+            return super().get_queryset()
+
+    def filter_queryset(self, queryset):
+        with span('filter_queryset'):
+            return super().filter_queryset(queryset)
+
+    def paginate_queryset(self, queryset):
+        with span('paginate_queryset'):
+            return super().paginate_queryset(queryset)
+
+
+class TracedRepresentationMixin:
+    """A ``to_representation`` span per serialized object"""
+
+    def to_representation(self, instance):
+        with span(f'{type(self).__name__}.to_representation'):
+            return super().to_representation(instance)
+
+
+class OTLPFormatter(logging.Formatter):
+    """Formats the ``trace`` of a record as one OTLP/JSON line"""
+
+    def format(self, record):
+        return json.dumps(record.trace.to_otlp(), separators=(',', ':'))
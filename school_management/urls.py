@@ -6,6 +6,10 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from . import views
+from .metrics import metrics_view
+
+# LazyAdminConfig leaves loading the apps' admin modules to the URLconf
+admin.autodiscover()
 
 urlpatterns = [
     # Homepage
@@ -14,6 +18,12 @@ urlpatterns = [
     # Admin panel
     path('admin/', admin.site.urls),
     
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
+    
+    # Per-worker memory report (staff only)
+    path('diagnostics/memory', views.memory_view, name='memory-diagnostics'),
+    
     # API endpoints
     path('api/', include('admissions.urls')),
     path('api/', include('contact.urls')),
@@ -5,6 +5,14 @@ from django.shortcuts import render
 from django.http import HttpResponse
 from django.conf import settings
 import os
+import tracemalloc
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .memory import profiler
+
 
 def homepage(request):
     """Serve the main homepage (index.html)"""
@@ -130,3 +138,33 @@ def serve_html(request, filename):
         </body>
         </html>
         """, status=500)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def memory_view(request):
+    """
+    ``GET /diagnostics/memory?top=N``: this worker's memory report.
+    ``POST`` ``{"action": "start" | "stop" | "baseline"}`` first.
+    """
+    if request.method == 'POST':
+        action = request.data.get('action')
+        if action == 'start':
+            try:
+                frames = int(request.data.get('frames') or 0)
+            except (TypeError, ValueError):
+                return Response({'error': 'frames must be a whole number.'}, status=400)
+            profiler.start(max(frames, 0) or None)
+        elif action == 'stop':
+            profiler.stop()
+        elif action == 'baseline':
+            if not tracemalloc.is_tracing():
+                return Response({'error': 'Tracing is off; start it first.'}, status=400)
+            profiler.take_baseline()
+        else:
+            return Response({'error': 'action must be start, stop or baseline.'}, status=400)
+    try:
+        top = min(max(int(request.query_params.get('top', 20)), 1), 200)
+    except ValueError:
+        top = 20
+    return Response(profiler.report(top))
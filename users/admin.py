@@ -18,10 +18,12 @@ class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = ['username', 'email', 'first_name', 'last_name', 'role_display', 'is_staff', 'is_active']
     list_filter = ['is_staff', 'is_active', 'profile__role']
+    list_select_related = ['profile']
     search_fields = ['username', 'email', 'first_name', 'last_name']
     
     def role_display(self, obj):
         """Display user role"""
+        # The join caches a missing profile as None, so this costs no query
         if hasattr(obj, 'profile'):
             return obj.profile.get_role_display()
         return 'No Role'
@@ -42,6 +44,7 @@ class UserProfileAdmin(admin.ModelAdmin):
         'employee_id', 'created_at'
     ]
     list_filter = ['role', 'created_at']
+    list_select_related = ['user']
     search_fields = [
         'user__username', 'user__email', 'user__first_name', 'user__last_name',
         'phone_number', 'employee_id'
@@ -5,3 +5,7 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
     verbose_name = 'User Management'
+    
+    def ready(self):
+        # Connect the role cache invalidation handlers
+        from . import roles  # noqa: F401
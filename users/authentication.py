@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from rest_framework import authentication, exceptions
+
+from .tokens import InvalidToken, check_user, read_token
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate ``Authorization: Bearer <token>`` headers carrying a token
+    from ``POST /api/users/token/``.
+
+    Verification is an HMAC check plus the same primary key lookup session
+    authentication does, instead of a PBKDF2 password hash per request.
+    """
+    keywords = ('bearer', 'token')
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower().decode() not in self.keywords:
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            token = header[1].decode()
+            payload = read_token(token)
+            user = User.objects.get(pk=payload['u'])
+            check_user(payload, user)
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        except InvalidToken as exc:
+            raise exceptions.AuthenticationFailed(str(exc))
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return user, token
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,45 @@
+import base64
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from school_management.benchmark import benchmark_database, format_row, summarize, time_call
+from users.tokens import issue_token
+
+
+class Command(BaseCommand):
+    help = 'Benchmark authenticated API requests with Basic, Session and signed token authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user(username='bench', password='bench-pass-123')
+            url = reverse('user-me')
+
+            basic = APIClient(HTTP_HOST='localhost')
+            basic.credentials(HTTP_AUTHORIZATION=self.basic_header('bench', 'bench-pass-123'))
+
+            session = APIClient(HTTP_HOST='localhost')
+            session.login(username='bench', password='bench-pass-123')
+
+            token = APIClient(HTTP_HOST='localhost')
+            token.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(user)[0]}')
+
+            self.stdout.write(f'GET {url}, {options["repeat"]} requests per scheme\n')
+            results = {}
+            for label, client in [('basic', basic), ('session', session), ('token', token)]:
+                assert client.get(url).status_code == 200, label
+                results[label] = summarize(time_call(lambda: client.get(url), repeat=options['repeat']))
+                self.stdout.write(format_row(label, results[label]))
+            self.stdout.write(
+                f"\ntoken vs basic: {results['basic']['p50_ms'] / results['token']['p50_ms']:.1f}x faster"
+            )
+
+    @staticmethod
+    def basic_header(username, password):
+        credentials = base64.b64encode(f'{username}:{password}'.encode()).decode()
+        return f'Basic {credentials}'
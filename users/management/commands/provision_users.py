@@ -0,0 +1,43 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import provision_users
+from users.serializers import BulkUserProvisionSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users and profiles from a CSV file (columns: username, email, first_name, '
+        'last_name, password, role, phone_number, department, employee_id)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Password hashing processes (default: CPU count)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+
+    def handle(self, *args, **options):
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as handle:
+            rows = [{key: value for key, value in row.items() if value} for row in csv.DictReader(handle)]
+
+        serializer = BulkUserProvisionSerializer(data={'users': rows})
+        if not serializer.is_valid():
+            for index, errors in enumerate(serializer.errors.get('users', [])):
+                if not isinstance(errors, dict):
+                    self.stderr.write(str(errors))
+                elif errors:
+                    # Line 1 is the header
+                    self.stderr.write(f'line {index + 2}: {dict(errors)}')
+            raise CommandError('No users were created.')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{len(rows)} row(s) are valid.'))
+            return
+        users = provision_users(
+            serializer.validated_data['users'], batch_size=options['batch_size'], workers=options['workers']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created {len(users)} user(s).'))
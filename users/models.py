@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from school_management.tracing import traced
+
 
 class UserProfile(models.Model):
     """
@@ -35,9 +37,53 @@ class UserProfile(models.Model):
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
     
+    # Fields whose changes require a write; timestamps and keys are excluded
+    TRACKED_FIELDS = (
+        'role', 'phone_number', 'address', 'date_of_birth', 'profile_picture',
+        'department', 'employee_id',
+    )
+    
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.get_role_display()}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+    
+    def _snapshot_tracked_fields(self):
+        self._saved_values = {
+            name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__
+        }
+    
+    def get_dirty_fields(self):
+        """Return the tracked fields changed since the profile was loaded or saved"""
+        saved = getattr(self, '_saved_values', None)
+        if saved is None:
+            return list(self.TRACKED_FIELDS)
+        return [
+            name for name in self.TRACKED_FIELDS
+            if name in self.__dict__ and (name not in saved or saved[name] != self.__dict__[name])
+        ]
+    
+    @property
+    def is_dirty(self):
+        """Check if the profile has unsaved changes"""
+        return bool(self.get_dirty_fields())
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._snapshot_tracked_fields()
+        else:
+            saved = self.__dict__.setdefault('_saved_values', {})
+            saved.update({
+                name: self.__dict__[name] for name in update_fields
+                if name in self.TRACKED_FIELDS and name in self.__dict__
+            })
+    
     @property
     def full_name(self):
         """Return the full name of the user"""
@@ -54,15 +100,44 @@ class UserProfile(models.Model):
         return self.role in ['admin', 'staff', 'teacher']
 
 
+class RevokedToken(models.Model):
+    """
+    A signed API token revoked before its expiry (see users/tokens.py).
+
+    Rows are only needed until ``expires_at``; after that the signature
+    check rejects the token on its own, and ``manage.py purge_sessions``
+    deletes them.
+    """
+    jti = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Revoked Token'
+        verbose_name_plural = 'Revoked Tokens'
+    
+    def __str__(self):
+        return self.jti
+
+
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
+@traced('signal create_user_profile')
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
     """Create user profile when a new user is created"""
-    if created:
-        UserProfile.objects.create(user=instance)
+    if created and not raw:
+        profile, _ = UserProfile.objects.get_or_create(user=instance)
+        # Cache it so `user.profile` right after creation costs no query
+        User.profile.related.set_cached_value(instance, profile)
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save user profile when user is updated"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+@traced('signal save_user_profile')
+def save_user_profile(sender, instance, created, raw=False, **kwargs):
+    """Save the user's profile along with the user, only if it was changed"""
+    # Never load the profile here: most user saves (last_login on every login,
+    # password changes) do not touch it
+    if created or raw or not User.profile.related.is_cached(instance):
+        return
+    profile = User.profile.related.get_cached_value(instance)
+    if profile is not None and profile.is_dirty:
+        profile.save(update_fields=profile.get_dirty_fields() + ['updated_at'])
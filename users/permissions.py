@@ -0,0 +1,44 @@
+from rest_framework.permissions import BasePermission
+
+from .roles import get_user_roles
+
+
+class HasRole(BasePermission):
+    """
+    Allow users whose profile role is one of ``roles``.
+
+    Roles come from the role cache (users/roles.py), so checks cost no
+    queries once a user's roles have been resolved.
+    """
+    roles = ()
+
+    def has_permission(self, request, view):
+        return get_user_roles(request.user).has_role(*self.roles)
+
+
+class IsSchoolAdmin(BasePermission):
+    """Allow administrators (admin role or superuser)"""
+
+    def has_permission(self, request, view):
+        return get_user_roles(request.user).is_admin
+
+
+class IsStaffMember(BasePermission):
+    """Allow administrators, staff and teachers"""
+
+    def has_permission(self, request, view):
+        return get_user_roles(request.user).is_staff_member
+
+
+class HasDjangoPermission(BasePermission):
+    """Allow users holding every permission in ``perms`` (``'app_label.codename'``)"""
+    perms = ()
+
+    def has_permission(self, request, view):
+        roles = get_user_roles(request.user)
+        return all(roles.has_perm(perm) for perm in self.perms)
+
+
+def role_required(*roles):
+    """Return a ``HasRole`` subclass for ``roles``, e.g. ``role_required('teacher', 'admin')``"""
+    return type(f"HasRole[{','.join(roles)}]", (HasRole,), {'roles': roles})
@@ -0,0 +1,79 @@
+"""
+Bulk creation of user accounts (start-of-term onboarding).
+
+``provision_users`` hashes passwords and inserts ``User`` and
+``UserProfile`` rows with ``bulk_create``. No ``post_save`` signal runs,
+so nothing creates a profile and then saves it again. Validate rows
+first with ``BulkUserProvisionSerializer``. It checks username and email
+uniqueness for the whole batch in one query.
+
+Hashing spreads across a process pool only when ``workers`` asks for one,
+as the ``provision_users`` command does. The API hashes in the request's
+process: forking a web worker that runs the log queue and metrics flush
+threads can deadlock the children.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from school_management.caching import invalidate
+
+from .models import UserProfile
+
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name')
+PROFILE_FIELDS = ('role', 'phone_number', 'department', 'employee_id')
+
+# Below this many passwords a pool costs more to start than it saves
+PARALLEL_MIN_PASSWORDS = 32
+
+
+def _hash_chunk(hasher, passwords):
+    # Runs in a worker: hashers do not need Django settings to encode
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def hash_passwords(passwords, workers=1):
+    """Hash ``passwords`` (None or '' gives an unusable password), across ``workers`` processes when worthwhile"""
+    usable = [i for i, password in enumerate(passwords) if password]
+    hashed = [make_password(None) if not password else None for password in passwords]
+    if not usable:
+        return hashed
+
+    hasher = get_hasher()
+    values = [passwords[i] for i in usable]
+    if workers <= 1 or len(values) < PARALLEL_MIN_PASSWORDS:
+        results = _hash_chunk(hasher, values)
+    else:
+        size = -(-len(values) // workers)
+        chunks = [values[start:start + size] for start in range(0, len(values), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [encoded for chunk in pool.map(_hash_chunk, [hasher] * len(chunks), chunks) for encoded in chunk]
+    for i, encoded in zip(usable, results):
+        hashed[i] = encoded
+    return hashed
+
+
+def provision_users(rows, batch_size=500, workers=1):
+    """
+    Create one user and profile per validated row and return the users.
+
+    Everything is inserted in one transaction; the unique username
+    constraint still guards against a concurrent insert.
+    """
+    passwords = hash_passwords([row.get('password') for row in rows], workers=workers)
+    users = [
+        User(password=password, **{field: row.get(field) or '' for field in USER_FIELDS})
+        for row, password in zip(rows, passwords)
+    ]
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, **{field: row[field] for field in PROFILE_FIELDS if row.get(field)})
+            for user, row in zip(users, rows)
+        ], batch_size=batch_size)
+        # bulk_create sends no post_save
+        invalidate('users')
+    return users
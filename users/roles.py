@@ -0,0 +1,164 @@
+"""
+Cached role and permission resolution.
+
+``get_user_roles(user)`` returns the user's profile role, group names and
+Django permissions without touching ``user.profile``. Results are kept in
+two places:
+
+* on the user object itself, which lives for one request,
+* in a per-process dict for ``ROLE_CACHE_TTL`` seconds, so later requests
+  by the same user cost no queries at all.
+
+Saving or deleting a profile, changing a user's flags, groups or
+permissions, or changing a group's permissions drops the affected
+entries (signal handlers below). Other processes pick up the change
+when their entry expires.
+"""
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from school_management.tracing import traced
+
+
+ADMIN_ROLES = frozenset({'admin'})
+STAFF_ROLES = frozenset({'admin', 'staff', 'teacher'})
+
+
+class ResolvedRoles(NamedTuple):
+    role: str
+    is_superuser: bool
+    groups: frozenset
+    permissions: frozenset
+
+    @property
+    def is_admin(self):
+        """Same rule as UserProfile.is_admin"""
+        return self.role in ADMIN_ROLES or self.is_superuser
+
+    @property
+    def is_staff_member(self):
+        """Same rule as UserProfile.is_staff_member"""
+        return self.role in STAFF_ROLES
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.permissions
+
+
+ANONYMOUS_ROLES = ResolvedRoles(role='', is_superuser=False, groups=frozenset(), permissions=frozenset())
+
+
+class RoleCache:
+    """Per-process ``user id -> (expires, ResolvedRoles)`` map"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def ttl(self):
+        return getattr(settings, 'ROLE_CACHE_TTL', 30)
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id, roles):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl(), roles)
+
+    def invalidate(self, user_ids=None):
+        """Drop the given users, or everyone when ``user_ids`` is None"""
+        with self._lock:
+            if user_ids is None:
+                self._entries.clear()
+            else:
+                for user_id in user_ids:
+                    self._entries.pop(user_id, None)
+
+
+role_cache = RoleCache()
+
+
+def resolve_roles(user):
+    """Load a user's roles and permissions from the database (2-4 queries)"""
+    from .models import UserProfile
+    role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first() or ''
+    groups = frozenset(user.groups.values_list('name', flat=True))
+    permissions = frozenset() if user.is_superuser else frozenset(user.get_all_permissions())
+    return ResolvedRoles(role=role, is_superuser=user.is_superuser, groups=groups, permissions=permissions)
+
+
+def get_user_roles(user):
+    """Return the cached ``ResolvedRoles`` for ``user``"""
+    if user is None or not user.is_authenticated or not user.is_active:
+        return ANONYMOUS_ROLES
+    roles = user.__dict__.get('_resolved_roles')
+    if roles is None:
+        roles = role_cache.get(user.pk)
+        if roles is None:
+            roles = resolve_roles(user)
+            role_cache.set(user.pk, roles)
+        user.__dict__['_resolved_roles'] = roles
+    return roles
+
+
+def invalidate_user_roles(user):
+    for attr in ('_resolved_roles', '_perm_cache', '_user_perm_cache', '_group_perm_cache'):
+        user.__dict__.pop(attr, None)
+    role_cache.invalidate([user.pk])
+
+
+@receiver(post_save, sender='users.UserProfile')
+@receiver(post_delete, sender='users.UserProfile')
+@traced('signal profile_changed')
+def profile_changed(sender, instance, **kwargs):
+    role_cache.invalidate([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@traced('signal user_changed')
+def user_changed(sender, instance, **kwargs):
+    # Logins and password changes do not affect roles; any other save might
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+    invalidate_user_roles(instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@traced('signal user_relations_changed')
+def user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_user_roles(instance)
+    else:
+        # group.user_set.add(...): pk_set holds user ids; None after a clear
+        role_cache.invalidate(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@traced('signal group_permissions_changed')
+def group_permissions_changed(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        # Affects every member of the group(s); rare enough to drop everything
+        role_cache.invalidate()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+@traced('signal group_or_permission_deleted')
+def group_or_permission_deleted(sender, **kwargs):
+    role_cache.invalidate()
@@ -1,10 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.db.models.functions import Lower
+from school_management.tracing import TracedRepresentationMixin
+
 from .models import UserProfile
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TracedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for UserProfile model"""
     
     class Meta:
@@ -13,7 +19,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TracedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     profile = UserProfileSerializer(read_only=True)
     
@@ -99,3 +105,103 @@ class ChangePasswordSerializer(serializers.Serializer):
         if not user.check_password(value):
             raise serializers.ValidationError("Old password is incorrect.")
         return value
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    """Serializer for exchanging credentials for a signed API token"""
+    username = serializers.CharField(required=True)
+    password = serializers.CharField(required=True, write_only=True)
+    
+    def validate(self, attrs):
+        """Check the credentials once; the token replaces them afterwards"""
+        user = authenticate(
+            request=self.context.get('request'),
+            username=attrs['username'],
+            password=attrs['password']
+        )
+        if user is None:
+            raise serializers.ValidationError('Unable to log in with provided credentials.')
+        attrs['user'] = user
+        return attrs
+
+
+class UserProvisionSerializer(serializers.Serializer):
+    """
+    One row of a bulk provisioning request.
+
+    A plain Serializer on purpose: ModelSerializer would add a
+    per-row uniqueness query for the username.
+    """
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    password = serializers.CharField(required=False, allow_blank=True, write_only=True, default='')
+    role = serializers.ChoiceField(choices=UserProfile.ROLE_CHOICES, default='parent')
+    phone_number = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    department = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    employee_id = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    
+    def validate_username(self, value):
+        """Apply the User model's username validator without a query"""
+        for validator in User._meta.get_field('username').validators:
+            validator(value)
+        return value
+    
+    def validate(self, attrs):
+        """Validate the password against the row's own attributes"""
+        if attrs['password']:
+            user = User(**{field: attrs[field] for field in ('username', 'email', 'first_name', 'last_name')})
+            try:
+                validate_password(attrs['password'], user)
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({'password': list(exc.messages)})
+        return attrs
+
+
+class BulkUserProvisionSerializer(serializers.Serializer):
+    """Serializer for creating many users and profiles at once"""
+    users = UserProvisionSerializer(many=True, allow_empty=False)
+    
+    def validate_users(self, rows):
+        """Check username/email uniqueness for the whole batch with one query"""
+        usernames = [row['username'] for row in rows]
+        emails = [row['email'].lower() for row in rows if row['email']]
+        
+        existing = User.objects.alias(email_lower=Lower('email')).filter(
+            Q(username__in=usernames) | Q(email_lower__in=emails)
+        ).values_list('username', 'email')
+        taken_usernames = {username for username, _ in existing}
+        taken_emails = {email.lower() for _, email in existing if email}
+        
+        # Same shape as per-row field errors: one dict per row, empty if valid
+        errors = [{} for _ in rows]
+        seen_usernames, seen_emails = set(), set()
+        for index, row in enumerate(rows):
+            email = row['email'].lower()
+            row_errors = {}
+            if row['username'] in taken_usernames or row['username'] in seen_usernames:
+                row_errors['username'] = ['A user with that username already exists.']
+            if email and (email in taken_emails or email in seen_emails):
+                row_errors['email'] = ['A user with that email already exists.']
+            errors[index] = row_errors
+            seen_usernames.add(row['username'])
+            seen_emails.add(email)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+
+# Hashing a password takes about 0.3 s, so larger API batches would run past
+# the worker timeout
+API_PROVISION_MAX_USERS = 50
+
+
+class BulkUserProvisionAPISerializer(BulkUserProvisionSerializer):
+    """``BulkUserProvisionSerializer`` limited to what one web request can hash"""
+    users = UserProvisionSerializer(
+        many=True, allow_empty=False, max_length=API_PROVISION_MAX_USERS,
+        error_messages={'max_length': (
+            'At most {max_length} users per request; use "manage.py provision_users" for larger batches.'
+        )},
+    )
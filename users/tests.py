@@ -0,0 +1,426 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import AnonymousUser, Group, Permission, User
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework import status
+from .models import RevokedToken, UserProfile
+from .permissions import HasDjangoPermission, IsSchoolAdmin, IsStaffMember, role_required
+from .roles import get_user_roles, role_cache
+from .tokens import issue_token, revoked_tokens
+
+
+def profile_queries(queries):
+    """Return the captured SQL statements that touch the profile table"""
+    return [q['sql'] for q in queries.captured_queries if UserProfile._meta.db_table in q['sql']]
+
+
+class UserProfileSignalTest(TestCase):
+    """Test cases for the User post_save profile signals"""
+    
+    def test_profile_created_once_and_cached(self):
+        """Test that creating a user creates its profile and caches it on the user"""
+        user = User.objects.create_user(username='kofi', password='kofipass123')
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile.role, 'staff')
+        self.assertEqual(UserProfile.objects.filter(user=user).count(), 1)
+    
+    def test_dirty_field_tracking(self):
+        """Test that only changed profile fields are reported dirty"""
+        User.objects.create_user(username='ama')
+        profile = UserProfile.objects.get(user__username='ama')
+        self.assertFalse(profile.is_dirty)
+        profile.department = 'Science'
+        self.assertEqual(profile.get_dirty_fields(), ['department'])
+        profile.save()
+        self.assertFalse(profile.is_dirty)
+    
+    def test_user_save_skips_unchanged_profile(self):
+        """Test that saving a user with a loaded, unchanged profile writes nothing else"""
+        user = User.objects.get(pk=User.objects.create_user(username='yaw').pk)
+        user.profile  # loaded but unchanged
+        user.first_name = 'Yaw'
+        with self.assertNumQueries(1):
+            user.save()
+        
+        user.profile.phone_number = '0241234567'
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        self.assertEqual(len(profile_queries(queries)), 1)
+        self.assertEqual(UserProfile.objects.get(user=user).phone_number, '0241234567')
+
+
+class UserProfileQueryCountTest(APITestCase):
+    """Login, update_me and change_password must not do redundant profile work"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(username='efua', password='Efua-pass-2025')
+    
+    def test_login_does_not_touch_profile(self):
+        """Test that the last_login update on login does not read or write the profile"""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.client.login(username='efua', password='Efua-pass-2025'))
+        self.assertEqual(profile_queries(queries), [])
+    
+    def test_change_password_does_not_touch_profile(self):
+        """Test that changing the password writes only the password"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('user-change-password')
+        data = {
+            'old_password': 'Efua-pass-2025',
+            'new_password': 'New-Efua-pass-2025',
+            'new_password_confirm': 'New-Efua-pass-2025',
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(profile_queries(queries), [])
+    
+    def test_update_me_writes_profile_once(self):
+        """Test that update_me loads and writes the profile once"""
+        user = User.objects.get(pk=self.user.pk)
+        self.client.force_authenticate(user=user)
+        url = reverse('user-update-me')
+        data = {'first_name': 'Efua', 'profile': {'department': 'Mathematics'}}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [sql.split()[0] for sql in profile_queries(queries)]
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+        self.assertEqual(UserProfile.objects.get(user=user).department, 'Mathematics')
+
+
+class SignedTokenAuthenticationTest(APITestCase):
+    """Test cases for signed API tokens"""
+    
+    def setUp(self):
+        """Set up test data"""
+        revoked_tokens.clear()
+        self.user = User.objects.create_user(username='esi', password='esipass123')
+        self.me_url = reverse('user-me')
+    
+    def obtain_token(self, password='esipass123'):
+        return self.client.post(reverse('user-token'), {'username': 'esi', 'password': password})
+    
+    def test_obtain_and_use_token(self):
+        """Test that a token authenticates without hashing the password again"""
+        response = self.obtain_token()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'esi')
+        self.assertFalse(any('UPDATE' in q['sql'] for q in queries.captured_queries))
+    
+    def test_bad_credentials_rejected(self):
+        """Test that wrong passwords get no token"""
+        response = self.obtain_token(password='wrong')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_tampered_and_expired_tokens_rejected(self):
+        """Test that modified or expired tokens are refused with 401"""
+        token = self.obtain_token().data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token[:-1]}x')
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with self.settings(API_TOKEN_TTL=-1):
+            self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_revoke_token(self):
+        """Test that a revoked token stops working, in this and other processes"""
+        token = self.obtain_token().data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.post(reverse('user-revoke-token'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        # A process that has not seen the revocation picks it up from the table
+        revoked_tokens.clear()
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_revoke_other_users_token(self):
+        """Test that only the owner or staff can revoke a token passed in the body"""
+        token, _ = issue_token(self.user)
+        other = User.objects.create_user(username='kojo', password='kojopass123')
+        self.client.force_authenticate(other)
+        response = self.client.post(reverse('user-revoke-token'), {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RevokedToken.objects.exists())
+        self.client.force_authenticate(User.objects.create_user(username='head', is_staff=True))
+        response = self.client.post(reverse('user-revoke-token'), {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_expired_revocations_purged(self):
+        """Test that purge_sessions deletes revocations of expired tokens only"""
+        now = timezone.now()
+        RevokedToken.objects.create(jti='old', expires_at=now - timedelta(hours=1))
+        RevokedToken.objects.create(jti='live', expires_at=now + timedelta(hours=1))
+        call_command('purge_sessions', pause=0, stdout=StringIO())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+    
+    def test_password_change_invalidates_tokens(self):
+        """Test that changing the password revokes every existing token"""
+        token = self.obtain_token().data['token']
+        self.user.set_password('newpass456!')
+        self.user.save(update_fields=['password'])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserEndpointQueryCountTest(APITestCase):
+    """Regression tests: users listings must not issue a query per row"""
+    
+    # Queries per request with session authentication; the same for any number of rows
+    EXPECTED_QUERIES = {
+        'user-list': 3,
+        'user-detail': 2,
+        'user-me': 2,
+        'user-statistics': 2,
+        'profile-list': 3,
+        'profile-detail': 2,
+        'admin:auth_user_changelist': 4,
+        'admin:users_userprofile_changelist': 4,
+    }
+    
+    def setUp(self):
+        """Set up test data"""
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'bosspass123')
+        self.client.force_login(self.admin)
+    
+    def add_users(self, count):
+        for i in range(count):
+            user = User.objects.create_user(username=f'user{User.objects.count()}', first_name='Kojo')
+            user.profile.role = 'teacher' if i % 2 else 'parent'
+            user.profile.save()
+        # Admin rows are counted with and without a profile
+        User.objects.create_user(username=f'user{User.objects.count()}').profile.delete()
+    
+    def urls(self):
+        user = User.objects.exclude(pk=self.admin.pk).filter(profile__isnull=False).last()
+        return {
+            'user-list': reverse('user-list'),
+            'user-detail': reverse('user-detail', args=[user.pk]),
+            'user-me': reverse('user-me'),
+            'user-statistics': reverse('user-statistics'),
+            'profile-list': reverse('profile-list'),
+            'profile-detail': reverse('profile-detail', args=[user.profile.pk]),
+            'admin:auth_user_changelist': reverse('admin:auth_user_changelist'),
+            'admin:users_userprofile_changelist': reverse('admin:users_userprofile_changelist'),
+        }
+    
+    def test_query_counts_do_not_grow_with_rows(self):
+        """Test every users endpoint at two table sizes"""
+        for count in (3, 15):
+            self.add_users(count)
+            for name, url in self.urls().items():
+                with self.subTest(endpoint=name, rows=count):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(
+                        len(queries.captured_queries), self.EXPECTED_QUERIES[name],
+                        '\n'.join(q['sql'] for q in queries.captured_queries)
+                    )
+    
+    def test_update_me_query_count(self):
+        """Test that updating the current user and profile is a fixed number of writes"""
+        self.add_users(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                reverse('user-update-me'), {'first_name': 'Ama', 'profile': {'department': 'Science'}}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 4)
+    
+    def test_statistics_single_aggregate(self):
+        """Test that statistics match per-figure counts"""
+        self.add_users(4)
+        response = self.client.get(reverse('user-statistics'))
+        self.assertEqual(response.data['total_users'], 6)
+        self.assertEqual(response.data['staff_users'], 1)
+        self.assertEqual(response.data['recent_users'], 6)
+        self.assertEqual(
+            sorted((row['role'], row['count']) for row in response.data['role_statistics']),
+            [('parent', 2), ('staff', 1), ('teacher', 2)]
+        )
+
+
+# A fast hasher keeps the batch tests quick; the code path is the same
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkProvisioningTest(APITestCase):
+    """Test cases for bulk user provisioning"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'bosspass123')
+        User.objects.create_user('taken', email='Taken@example.com')
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('user-provision')
+    
+    def rows(self, count):
+        return [
+            {'username': f'parent{i}', 'email': f'parent{i}@example.com', 'first_name': 'Akua',
+             'password': f'Term-{i}-pass!', 'role': 'parent', 'phone_number': '0241234567'}
+            for i in range(count)
+        ]
+    
+    def test_provision_creates_users_and_profiles(self):
+        """Test that rows become users with hashed passwords and profiles"""
+        rows = self.rows(40)
+        rows[0]['password'] = ''
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch('users.provisioning.ProcessPoolExecutor') as pool:
+            response = self.client.post(self.url, {'users': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Web workers hash in-process; only the command forks a pool
+        pool.assert_not_called()
+        self.assertEqual(response.data['created'], 40)
+        # One uniqueness check, one insert per table, plus the transaction
+        self.assertLessEqual(len(queries.captured_queries), 5)
+        user = User.objects.get(username='parent7')
+        self.assertTrue(user.check_password('Term-7-pass!'))
+        self.assertEqual(user.profile.role, 'parent')
+        self.assertEqual(user.profile.phone_number, '0241234567')
+        self.assertFalse(User.objects.get(username='parent0').has_usable_password())
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='parent').count(), 40)
+    
+    def test_duplicates_rejected_up_front(self):
+        """Test that existing and repeated usernames/emails fail the whole batch"""
+        rows = self.rows(3)
+        rows[1]['username'] = 'taken'
+        rows[2]['email'] = 'TAKEN@example.com'
+        rows.append(dict(rows[0]))
+        response = self.client.post(self.url, {'users': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['users']
+        self.assertEqual(errors[0], {})
+        self.assertIn('username', errors[1])
+        self.assertIn('email', errors[2])
+        self.assertEqual(set(errors[3]), {'username', 'email'})
+        self.assertFalse(User.objects.filter(username__startswith='parent').exists())
+    
+    def test_weak_password_rejected(self):
+        """Test that password validators run per row"""
+        rows = self.rows(1)
+        rows[0]['password'] = '12345'
+        response = self.client.post(self.url, {'users': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.data['users'][0])
+    
+    def test_api_batch_size_limited(self):
+        """Test that the API refuses batches too large to hash within one request"""
+        from .serializers import API_PROVISION_MAX_USERS
+        response = self.client.post(self.url, {'users': self.rows(API_PROVISION_MAX_USERS + 1)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('provision_users', str(response.data['users']))
+        self.assertFalse(User.objects.filter(username__startswith='parent').exists())
+    
+    def test_parallel_hashing(self):
+        """Test that the process pool produces verifiable hashes"""
+        from .provisioning import hash_passwords
+        passwords = [f'secret-{i}' for i in range(40)] + [None]
+        hashed = hash_passwords(passwords, workers=2)
+        self.assertTrue(check_password('secret-39', hashed[39]))
+        self.assertFalse(check_password('secret-1', hashed[0]))
+        self.assertTrue(hashed[40].startswith('!'))
+    
+    def test_provision_command(self):
+        """Test provisioning from a CSV file"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('username,email,role,password\nkwesi,kwesi@example.com,student,Kwesi-pass-1\n')
+        self.addCleanup(os.remove, handle.name)
+        call_command('provision_users', handle.name, stdout=StringIO())
+        self.assertEqual(User.objects.get(username='kwesi').profile.role, 'student')
+    
+    def test_provision_admin_only(self):
+        """Test that non-staff users cannot provision accounts"""
+        self.client.force_authenticate(User.objects.get(username='taken'))
+        response = self.client.post(self.url, {'users': self.rows(1)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RoleCacheTest(TestCase):
+    """Test cases for cached role and permission resolution"""
+    
+    def setUp(self):
+        """Set up test data"""
+        role_cache.invalidate()
+        self.user = User.objects.create_user(username='teacher1', password='teachpass123')
+        self.user.profile.role = 'teacher'
+        self.user.profile.save()
+        role_cache.invalidate()
+    
+    def fresh_user(self):
+        """Load the user as a new request would"""
+        return User.objects.get(pk=self.user.pk)
+    
+    def check(self, permission_class):
+        request = APIRequestFactory().get('/')
+        request.user = self.fresh_user()
+        return permission_class().has_permission(request, None)
+    
+    def test_steady_state_costs_no_queries(self):
+        """Test that roles are resolved once, then served from the caches"""
+        user = self.fresh_user()
+        roles = get_user_roles(user)
+        self.assertTrue(roles.is_staff_member)
+        self.assertFalse(roles.is_admin)
+        with self.assertNumQueries(0):
+            get_user_roles(user)
+        request = APIRequestFactory().get('/')
+        request.user = user
+        with self.assertNumQueries(0):
+            self.assertTrue(IsStaffMember().has_permission(request, None))
+            self.assertTrue(role_required('teacher')().has_permission(request, None))
+            self.assertFalse(IsSchoolAdmin().has_permission(request, None))
+        # A later request loads a new user object but still hits the process cache
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_roles(user).role, 'teacher')
+    
+    def test_profile_change_invalidates(self):
+        """Test that saving the profile drops the cached role"""
+        self.assertTrue(self.check(IsStaffMember))
+        profile = UserProfile.objects.get(user=self.user)
+        profile.role = 'parent'
+        profile.save()
+        self.assertFalse(self.check(IsStaffMember))
+        self.assertTrue(self.check(role_required('parent')))
+    
+    def test_group_and_permission_changes_invalidate(self):
+        """Test that group membership and group permissions are re-resolved after changes"""
+        perm_class = type('CanDelete', (HasDjangoPermission,), {'perms': ('admissions.delete_admissionapplication',)})
+        self.assertFalse(self.check(perm_class))
+        group = Group.objects.create(name='Registrars')
+        group.permissions.add(Permission.objects.get(codename='delete_admissionapplication'))
+        group.user_set.add(self.user)
+        self.assertTrue(self.check(perm_class))
+        self.assertEqual(get_user_roles(self.fresh_user()).groups, frozenset({'Registrars'}))
+        group.permissions.clear()
+        self.assertFalse(self.check(perm_class))
+    
+    def test_ttl_expiry(self):
+        """Test that process cache entries expire"""
+        get_user_roles(self.fresh_user())
+        with self.settings(ROLE_CACHE_TTL=-1):
+            role_cache.set(self.user.pk, get_user_roles(self.fresh_user()))
+            self.assertIsNone(role_cache.get(self.user.pk))
+    
+    def test_anonymous_and_inactive(self):
+        """Test that anonymous and inactive users have no roles"""
+        self.assertEqual(get_user_roles(AnonymousUser()).role, '')
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.check(IsStaffMember))
@@ -0,0 +1,125 @@
+"""
+Signed, expiring, revocable API tokens.
+
+A token is a ``TimestampSigner`` (HMAC-SHA256) signature over the user id,
+a random token id and a fingerprint of the user's password hash. Verifying
+one needs no password hashing and no token table lookup:
+
+* expiry comes from the signed timestamp (``API_TOKEN_TTL``),
+* changing the password invalidates every token of that user,
+* single tokens are revoked through ``RevokedToken`` rows, mirrored into a
+  per-process set refreshed every ``API_TOKEN_REVOCATION_REFRESH`` seconds.
+"""
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+
+TOKEN_SALT = 'users.tokens'
+
+
+def token_ttl():
+    return getattr(settings, 'API_TOKEN_TTL', 12 * 60 * 60)
+
+
+def password_fingerprint(user):
+    return salted_hmac(TOKEN_SALT, user.password, algorithm='sha256').hexdigest()[:16]
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class RevocationCache:
+    """Process-local set of revoked token ids, refreshed from the database"""
+
+    def __init__(self):
+        self._revoked = set()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def refresh_interval(self):
+        return getattr(settings, 'API_TOKEN_REVOCATION_REFRESH', 5)
+
+    def _load(self):
+        from .models import RevokedToken
+        revoked = set(RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True))
+        self._revoked = revoked
+        self._loaded_at = time.monotonic()
+
+    def __contains__(self, jti):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval():
+            with self._lock:
+                if self._loaded_at is loaded_at:
+                    self._load()
+        return jti in self._revoked
+
+    def add(self, jti):
+        self._revoked.add(jti)
+
+    def clear(self):
+        with self._lock:
+            self._revoked = set()
+            self._loaded_at = None
+
+
+revoked_tokens = RevocationCache()
+
+
+def issue_token(user):
+    """Return (token, expires_at) for ``user``"""
+    payload = {'u': user.pk, 'j': secrets.token_urlsafe(12), 'h': password_fingerprint(user)}
+    token = signing.TimestampSigner(salt=TOKEN_SALT).sign_object(payload, compress=False)
+    return token, timezone.now() + timedelta(seconds=token_ttl())
+
+
+def read_token(token):
+    """Return the payload of a valid, unexpired, unrevoked token or raise InvalidToken"""
+    try:
+        payload = signing.TimestampSigner(salt=TOKEN_SALT).unsign_object(token, max_age=token_ttl())
+    except signing.SignatureExpired:
+        raise InvalidToken('Token has expired.')
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+    if payload.get('j') in revoked_tokens:
+        raise InvalidToken('Token has been revoked.')
+    return payload
+
+
+def check_user(payload, user):
+    """Reject tokens issued before the user's last password change"""
+    if not constant_time_compare(payload.get('h', ''), password_fingerprint(user)):
+        raise InvalidToken('Token has been revoked.')
+
+
+def revoke_token(token, user=None):
+    """
+    Revoke a single token everywhere; returns False if it was not valid,
+    or, given ``user``, belongs to someone else and ``user`` is not staff.
+    """
+    from .models import RevokedToken
+    try:
+        payload = read_token(token)
+    except InvalidToken:
+        return False
+    if user is not None and not user.is_staff and payload.get('u') != user.pk:
+        return False
+    _, timestamp, _ = token.rsplit(signing.TimestampSigner().sep, 2)
+    issued_at = signing.b62_decode(timestamp)
+    expires_at = datetime.fromtimestamp(issued_at + token_ttl(), tz=dt_timezone.utc)
+    RevokedToken.objects.get_or_create(jti=payload['j'], defaults={'expires_at': expires_at})
+    revoked_tokens.add(payload['j'])
+    return True
+
+
+def purge_revoked_tokens():
+    """Delete revocations of tokens that have expired anyway; return how many"""
+    from .models import RevokedToken
+    return RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()[0]
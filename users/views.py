@@ -1,11 +1,19 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
-from django.db.models import Count
+from django.db.models import Count, Q
+from django.utils import timezone
+from datetime import timedelta
+
+from school_management.budgets import Budget
+from school_management.caching import cache_response
+from school_management.fast_serializers import FastSerializationMixin
+from school_management.routing import ReplicaReadMixin
+from school_management.tracing import TracingMixin
 
 from .models import UserProfile
 from .serializers import (
@@ -13,25 +21,39 @@ from .serializers import (
     UserCreateSerializer,
     UserUpdateSerializer,
     UserProfileSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    TokenObtainSerializer,
+    BulkUserProvisionAPISerializer
 )
+from .provisioning import provision_users
+from .tokens import issue_token, revoke_token
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(TracingMixin, ReplicaReadMixin, FastSerializationMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing users
     """
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('profile')
+    # Safe to serve slightly stale, from the read replica when configured
+    replica_actions = ('list', 'statistics')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_active', 'is_staff']
     search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering_fields = ['username', 'email', 'date_joined']
     ordering = ['username']
+    performance_budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=2),
+        'me': Budget(queries=2),
+        'statistics': Budget(queries=2),
+    }
     
     def get_permissions(self):
         """Set permissions based on action"""
-        if self.action in ['create', 'list', 'destroy']:
+        if self.action in ['create', 'list', 'destroy', 'provision']:
             permission_classes = [IsAdminUser]
+        elif self.action == 'token':
+            permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
@@ -48,9 +70,13 @@ class UserViewSet(viewsets.ModelViewSet):
         """Filter queryset based on user permissions"""
         if not self.request.user.is_staff:
             # Non-staff users can only see their own profile
-            return User.objects.filter(id=self.request.user.id)
+            return self.queryset.filter(id=self.request.user.id)
         return super().get_queryset()
     
+    @cache_response('users')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
         """Get current user's profile"""
@@ -73,40 +99,71 @@ class UserViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             user = request.user
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            user.save(update_fields=['password'])
             return Response({'message': 'Password changed successfully.'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    def token(self, request):
+        """Exchange username and password for a signed API token"""
+        serializer = TokenObtainSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            token, expires_at = issue_token(serializer.validated_data['user'])
+            return Response({'token': token, 'expires_at': expires_at})
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def revoke_token(self, request):
+        """Revoke the token used for this request (or one of the user's in the body; staff may revoke any)"""
+        token = request.data.get('token') or (request.auth if isinstance(request.auth, str) else None)
+        if not token or not revoke_token(token, request.user):
+            return Response({'error': 'No valid token to revoke.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Token revoked.'})
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def provision(self, request):
+        """Create many users and profiles at once (e.g. a new term's parents)"""
+        serializer = BulkUserProvisionAPISerializer(data=request.data)
+        if serializer.is_valid():
+            users = provision_users(serializer.validated_data['users'])
+            return Response({
+                'created': len(users),
+                'users': [{'id': user.id, 'username': user.username} for user in users],
+            }, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @cache_response('users', stale=True)
     def statistics(self, request):
         """Get user statistics for admin dashboard"""
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        staff_users = User.objects.filter(is_staff=True).count()
+        thirty_days_ago = timezone.now() - timedelta(days=30)
+        roles = [role for role, _ in UserProfile.ROLE_CHOICES]
         
-        # Users by role
-        role_stats = UserProfile.objects.values('role').annotate(
-            count=Count('id')
+        # One pass over the user table instead of one query per figure
+        stats = User.objects.aggregate(
+            total_users=Count('id'),
+            active_users=Count('id', filter=Q(is_active=True)),
+            staff_users=Count('id', filter=Q(is_staff=True)),
+            recent_users=Count('id', filter=Q(date_joined__gte=thirty_days_ago)),
+            **{f'role_{role}': Count('id', filter=Q(profile__role=role)) for role in roles}
         )
         
-        # Recent users (last 30 days)
-        from django.utils import timezone
-        from datetime import timedelta
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_users = User.objects.filter(
-            date_joined__gte=thirty_days_ago
-        ).count()
+        # Users by role
+        role_stats = [
+            {'role': role, 'count': stats[f'role_{role}']}
+            for role in roles if stats[f'role_{role}']
+        ]
         
         return Response({
-            'total_users': total_users,
-            'active_users': active_users,
-            'staff_users': staff_users,
-            'recent_users': recent_users,
-            'role_statistics': list(role_stats),
+            'total_users': stats['total_users'],
+            'active_users': stats['active_users'],
+            'staff_users': stats['staff_users'],
+            'recent_users': stats['recent_users'],
+            'role_statistics': role_stats,
         })
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(TracingMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing user profiles
     """
@@ -118,6 +175,10 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     search_fields = ['user__username', 'user__email', 'user__first_name', 'user__last_name']
     ordering_fields = ['created_at', 'user__username']
     ordering = ['-created_at']
+    performance_budgets = {
+        'list': Budget(queries=3),
+        'retrieve': Budget(queries=2),
+    }
     
     def get_queryset(self):
         """Filter queryset based on user permissions"""